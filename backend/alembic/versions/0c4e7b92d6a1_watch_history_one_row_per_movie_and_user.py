@@ -0,0 +1,35 @@
+"""watch_history one row per movie and user
+
+Revision ID: 0c4e7b92d6a1
+Revises: 7b1e4d09c3f2
+Create Date: 2026-10-19 15:47:05.217304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c4e7b92d6a1'
+down_revision: Union[str, None] = '7b1e4d09c3f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # movie_id and user_id were each unique on their own, allowing a single
+    # row per movie and per user; movie_user_uc already covers the pair and
+    # is the conflict target of the heartbeat upsert
+    op.drop_index('ix_watch_history_user_id', table_name='watch_history')
+    op.drop_index('ix_watch_history_movie_id', table_name='watch_history')
+    op.create_index(op.f('ix_watch_history_movie_id'), 'watch_history', ['movie_id'], unique=False)
+    op.create_index(op.f('ix_watch_history_user_id'), 'watch_history', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_watch_history_user_id'), table_name='watch_history')
+    op.drop_index(op.f('ix_watch_history_movie_id'), table_name='watch_history')
+    op.create_index('ix_watch_history_movie_id', 'watch_history', ['movie_id'], unique=True)
+    op.create_index('ix_watch_history_user_id', 'watch_history', ['user_id'], unique=True)
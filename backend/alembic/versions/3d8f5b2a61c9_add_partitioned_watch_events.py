@@ -0,0 +1,64 @@
+"""add partitioned watch_events
+
+Revision ID: 3d8f5b2a61c9
+Revises: e4a9c1f7b820
+Create Date: 2026-10-19 17:55:03.118264
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d8f5b2a61c9'
+down_revision: Union[str, None] = 'e4a9c1f7b820'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created with the table; the app keeps creating them ahead
+INITIAL_MONTHS = 3
+
+
+def _add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def upgrade() -> None:
+    op.create_table('watch_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('occurred_at', sa.DateTime(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('movie_id', sa.String(length=50), nullable=False),
+    sa.Column('watch_duration', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'occurred_at'),
+    postgresql_partition_by='RANGE (occurred_at)',
+    )
+    op.create_index('ix_watch_events_movie_id_occurred_at', 'watch_events', ['movie_id', 'occurred_at'], unique=False)
+    op.create_index('ix_watch_events_user_id_occurred_at', 'watch_events', ['user_id', 'occurred_at'], unique=False)
+
+    month = datetime.now(timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+    )
+    for offset in range(INITIAL_MONTHS):
+        start = _add_months(month, offset)
+        end = _add_months(start, 1)
+        op.execute(
+            f'CREATE TABLE "watch_events_y{start.year:04d}m{start.month:02d}" '
+            f"PARTITION OF watch_events FOR VALUES FROM ('{start.isoformat()}') "
+            f"TO ('{end.isoformat()}')"
+        )
+
+
+def downgrade() -> None:
+    # Dropping the partitioned table drops its attached partitions;
+    # detached archives are left alone
+    op.drop_index('ix_watch_events_user_id_occurred_at', table_name='watch_events')
+    op.drop_index('ix_watch_events_movie_id_occurred_at', table_name='watch_events')
+    op.drop_table('watch_events')
@@ -0,0 +1,30 @@
+"""subtitles one track per language
+
+Revision ID: 7b1e4d09c3f2
+Revises: a83d6f0c2e15
+Create Date: 2026-10-19 15:02:11.384520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1e4d09c3f2'
+down_revision: Union[str, None] = 'a83d6f0c2e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A unique movie_id allowed a single subtitle track per movie;
+    # movie_language_uc already limits it to one track per language
+    op.drop_index('ix_subtitles_movie_id', table_name='subtitles')
+    op.create_index(op.f('ix_subtitles_movie_id'), 'subtitles', ['movie_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_subtitles_movie_id'), table_name='subtitles')
+    op.create_index('ix_subtitles_movie_id', 'subtitles', ['movie_id'], unique=True)
@@ -0,0 +1,42 @@
+"""comments: drop one-per-movie/user uniqueness, add thread index
+
+Revision ID: b6e1f4a9d327
+Revises: 5f0d2c8e7a14
+Create Date: 2026-10-19 20:14:52.730915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1f4a9d327'
+down_revision: Union[str, None] = '5f0d2c8e7a14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_comments_movie_id', table_name='comments')
+    op.drop_index('ix_comments_user_id', table_name='comments')
+    op.create_index('ix_comments_user_id', 'comments', ['user_id'], unique=False)
+    # The thread index leads with movie_id, so it also serves plain movie_id lookups
+    op.create_index(
+        'ix_comments_movie_id_created_at_id',
+        'comments',
+        ['movie_id', 'created_at', 'id'],
+        unique=False,
+    )
+    # Keyset comparisons on (created_at, id) would skip rows with a NULL
+    op.execute("UPDATE comments SET created_at = now() WHERE created_at IS NULL")
+    op.alter_column('comments', 'created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    # Fails if a movie or a user has more than one comment by then
+    op.alter_column('comments', 'created_at', existing_type=sa.DateTime(), nullable=True)
+    op.drop_index('ix_comments_movie_id_created_at_id', table_name='comments')
+    op.drop_index('ix_comments_user_id', table_name='comments')
+    op.create_index('ix_comments_user_id', 'comments', ['user_id'], unique=True)
+    op.create_index('ix_comments_movie_id', 'comments', ['movie_id'], unique=True)
@@ -0,0 +1,32 @@
+"""watch_history continue watching index
+
+Revision ID: e4a9c1f7b820
+Revises: 0c4e7b92d6a1
+Create Date: 2026-10-19 16:41:27.905133
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c1f7b820'
+down_revision: Union[str, None] = '0c4e7b92d6a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # id breaks ties between rows with the same watched_at for keyset pagination
+    op.create_index(
+        'ix_watch_history_user_completed_watched_at',
+        'watch_history',
+        ['user_id', 'completed', sa.text('watched_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_watch_history_user_completed_watched_at', table_name='watch_history')
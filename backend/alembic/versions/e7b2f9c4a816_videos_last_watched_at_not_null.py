@@ -0,0 +1,31 @@
+"""videos last_watched_at not null
+
+Revision ID: e7b2f9c4a816
+Revises: c3a7d2e9f041
+Create Date: 2026-10-20 09:12:27.604518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2f9c4a816'
+down_revision: Union[str, None] = 'c3a7d2e9f041'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Never watched videos age from when they were downloaded, or created,
+    # so eviction can filter and order on ix_videos_last_watched_at alone
+    op.execute(
+        "UPDATE videos SET last_watched_at = COALESCE(downloaded_at, created_at) "
+        "WHERE last_watched_at IS NULL"
+    )
+    op.alter_column('videos', 'last_watched_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    op.alter_column('videos', 'last_watched_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,3 @@
+class MovieNotFoundException(Exception):
+    """Exception raised when commenting on a movie that does not exist."""
+    pass
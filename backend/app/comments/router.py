@@ -0,0 +1,49 @@
+"""Comment API routes."""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import get_current_active_user
+from app.comments.exceptions import MovieNotFoundException
+from app.comments.schemas import CommentCreate, CommentPage, CommentResponse
+from app.comments.service import CommentService
+from app.db.session import get_db
+from app.models.models import User
+from app.utils.cursor import InvalidCursor
+
+router = APIRouter(prefix="/comments", tags=["comments"])
+
+
+@router.get("/{movie_id}", response_model=CommentPage)
+async def list_comments(
+    movie_id: str,
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """Get a movie's comments, newest first."""
+    try:
+        items, next_cursor = await CommentService.list_by_movie(db, movie_id, limit, cursor)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.post("/{movie_id}", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
+async def post_comment(
+    movie_id: str,
+    request: CommentCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """Post a comment on a movie as the current user."""
+    try:
+        return await CommentService.create(db, movie_id, current_user, request.content)
+    except MovieNotFoundException:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Movie not found",
+        )
@@ -0,0 +1,36 @@
+"""Comment Pydantic schemas using v2."""
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class CommentCreate(BaseModel):
+    """Schema for posting a comment."""
+
+    content: str = Field(..., min_length=1, max_length=5000)
+
+
+class CommentAuthor(BaseModel):
+    """Schema for the public profile shown next to a comment."""
+
+    id: int
+    username: str | None = None
+    profile_picture: str | None = None
+
+
+class CommentResponse(BaseModel):
+    """Schema for one comment with its author."""
+
+    id: int
+    movie_id: str
+    content: str
+    created_at: datetime
+    updated_at: datetime | None = None
+    author: CommentAuthor | None = None
+
+
+class CommentPage(BaseModel):
+    """Schema for a page of a movie's comments."""
+
+    items: list[CommentResponse]
+    next_cursor: str | None = None
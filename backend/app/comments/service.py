@@ -0,0 +1,113 @@
+"""Comment service layer for business logic."""
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.comments.exceptions import MovieNotFoundException
+from app.models.comment import Comment
+from app.models.models import User
+from app.models.movie import Movie
+from app.trending.service import COMMENT_WEIGHT, trending
+from app.utils.cursor import decode_cursor, encode_cursor
+
+
+class CommentService:
+    """Service layer for comment operations."""
+
+    @staticmethod
+    async def authors(db: AsyncSession, user_ids: Iterable[int]) -> dict[int, dict]:
+        """Public profile of each given user, by id, in one query."""
+        user_ids = set(user_ids)
+        if not user_ids:
+            return {}
+        result = await db.execute(
+            select(User.id, User.username, User.profile_picture).where(User.id.in_(user_ids))
+        )
+        return {row.id: row._asdict() for row in result}
+
+    @staticmethod
+    async def list_by_movie(
+        db: AsyncSession, movie_id: str, limit: int, cursor: str | None = None
+    ) -> tuple[list[dict], str | None]:
+        """
+        Get a page of a movie's comments, newest first, with their authors.
+
+        Pages are addressed by the (created_at, id) of their last row, so
+        each page is a range scan of ix_comments_movie_id_created_at_id
+        however long the thread is. Authors are read with one projection
+        query per page instead of loading the User of every comment.
+
+        Args:
+            db: Database session
+            movie_id: Movie of the thread
+            limit: Page size
+            cursor: next_cursor of the previous page, None for the first page
+
+        Returns:
+            The comments of the page and the cursor of the next one (None on the last page)
+
+        Raises:
+            InvalidCursor: If the cursor cannot be decoded
+        """
+        query = select(
+            Comment.id,
+            Comment.movie_id,
+            Comment.user_id,
+            Comment.content,
+            Comment.created_at,
+            Comment.updated_at,
+        ).where(Comment.movie_id == movie_id)
+        if cursor is not None:
+            created_at, comment_id = decode_cursor(cursor, (datetime, int))
+            query = query.where(
+                tuple_(Comment.created_at, Comment.id) < tuple_(created_at, comment_id)
+            )
+        query = query.order_by(Comment.created_at.desc(), Comment.id.desc())
+
+        # One extra row tells whether another page follows
+        result = await db.execute(query.limit(limit + 1))
+        rows = result.all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+        authors = await CommentService.authors(db, (row.user_id for row in rows))
+        items = []
+        for row in rows:
+            item = row._asdict()
+            item["author"] = authors.get(item.pop("user_id"))
+            items.append(item)
+        return items, next_cursor
+
+    @staticmethod
+    async def create(db: AsyncSession, movie_id: str, user: User, content: str) -> dict:
+        """
+        Post a comment on a movie.
+
+        Raises:
+            MovieNotFoundException: If the movie does not exist
+        """
+        result = await db.execute(select(Movie.id).where(Movie.id == movie_id))
+        if result.scalar_one_or_none() is None:
+            raise MovieNotFoundException(f"Movie {movie_id} not found")
+
+        comment = Comment(movie_id=movie_id, user_id=user.id, content=content)
+        db.add(comment)
+        await db.commit()
+        trending.record(movie_id, COMMENT_WEIGHT)
+
+        return {
+            "id": comment.id,
+            "movie_id": comment.movie_id,
+            "content": comment.content,
+            "created_at": comment.created_at,
+            "updated_at": comment.updated_at,
+            "author": {
+                "id": user.id,
+                "username": user.username,
+                "profile_picture": user.profile_picture,
+            },
+        }
@@ -90,6 +90,86 @@ class Settings(BaseSettings):
     # Frontend URL (for redirects after OAuth)
     FRONTEND_URL: str = "http://localhost:3000"
 
+    # Video storage and conversion
+    MEDIA_ROOT: str = "media"
+    FFMPEG_BINARY: str = "ffmpeg"
+    FFPROBE_BINARY: str = "ffprobe"
+    HLS_SEGMENT_SECONDS: int = 6
+    PROBE_WORKERS: int = 2
+    # A growing file's keyframe index is rebuilt at most this often
+    KEYFRAME_REBUILD_SECONDS: int = 30
+    THUMBNAIL_WORKERS: int = 1
+    THUMBNAIL_NICENESS: int = 19
+    THUMBNAIL_INTERVAL_SECONDS: int = 10
+    THUMBNAIL_WIDTH: int = 160
+    THUMBNAIL_COLUMNS: int = 10
+    THUMBNAIL_ROWS: int = 10
+    PROGRESS_FLUSH_SECONDS: int = 5
+    PROGRESS_NOTIFY_SECONDS: float = 0.5
+    SSE_KEEPALIVE_SECONDS: int = 15
+    STREAM_CHUNK_SIZE: int = 1024**2
+    CHUNK_CACHE_MAX_BYTES: int = 256 * 1024**2
+    READAHEAD_MIN_BYTES: int = 2 * 1024**2
+    READAHEAD_MAX_BYTES: int = 32 * 1024**2
+    READAHEAD_SESSION_TTL_SECONDS: int = 120
+
+    # Torrent engine
+    TORRENT_HASH_WORKERS: int = 0  # 0 means one per CPU core
+    TORRENT_HASH_MAX_INFLIGHT_BYTES: int = 64 * 1024**2
+    TORRENT_PREALLOCATE: Literal['sparse', 'full'] = "sparse"
+    TORRENT_WRITE_FLUSH_BYTES: int = 8 * 1024**2
+    TORRENT_BITFIELD_CHECKPOINT_SECONDS: int = 10
+    TORRENT_MAX_DOWNLOAD_RATE: int = 50 * 1024**2  # bytes per second, all downloads
+    TORRENT_MAX_PEER_CONNECTIONS: int = 200
+    TORRENT_TARGET_BUFFER_SECONDS: int = 60
+
+    # Concurrency
+    ADVISORY_LOCKS_MAX_HELD: int = 5  # per worker, each may use two pooled connections
+
+    # Subtitles
+    SUBTITLE_ROOT: str = "subtitles"
+    SUBTITLE_SOURCE_TIMEOUT_SECONDS: float = 10
+    SUBTITLE_MAX_BYTES: int = 5 * 1024**2
+    SUBTITLE_CUE_CACHE_ENTRIES: int = 128
+    OPENSUBTITLES_API_URL: str = "https://api.opensubtitles.com/api/v1"
+    OPENSUBTITLES_API_KEY: str | None = None
+    OPENSUBTITLES_USER_AGENT: str = "Hypertube v1.0"
+
+    # Watch history
+    WATCH_FLUSH_SECONDS: int = 30
+    WATCH_SESSION_GAP_SECONDS: int = 60
+    HEARTBEAT_FLUSH_SECONDS: int = 10
+    WATCHED_CACHE_USERS: int = 10_000
+    WATCHED_CACHE_TTL_SECONDS: int = 300
+    WATCHED_MIN_SECONDS: int = 10 * 60  # below this, only a completed row counts as watched
+    WATCH_EVENTS_PARTITIONS_AHEAD: int = 2
+    WATCH_EVENTS_RETENTION_MONTHS: int = 12
+    WATCH_EVENTS_DROP_DETACHED: bool = False
+    WATCH_EVENTS_MAINTENANCE_SECONDS: int = 6 * 3600
+
+    # Recommendations
+    RECOMMENDATION_DIR: str = "data/recommendations"
+    RECOMMENDATION_TOP_K: int = 20
+    RECOMMENDATION_MIN_SHARED_VIEWERS: int = 2
+    RECOMMENDATION_INTERVAL_SECONDS: int = 3600
+    RECOMMENDATION_BATCH_ROWS: int = 100_000
+    RECOMMENDATION_RESCAN_IDS: int = 100_000  # history ids re-read for rows committed late
+
+    # Trending
+    TRENDING_HALF_LIFE_SECONDS: int = 12 * 3600
+    TRENDING_MERGE_SECONDS: int = 30
+    TRENDING_MAX_ITEMS: int = 100
+    TRENDING_MIN_SCORE: float = 0.01
+    TRENDING_VIEWERS_WINDOW_SECONDS: int = 7 * 24 * 3600
+
+    # Video store eviction
+    VIDEO_STORE_MAX_BYTES: int = 200 * 1024**3
+    VIDEO_STORE_MIN_FREE_BYTES: int = 10 * 1024**3
+    VIDEO_MAX_AGE_DAYS: int = 30
+    VIDEO_PIN_GRACE_SECONDS: int = 900
+    VIDEO_EVICTION_INTERVAL_SECONDS: int = 300
+    VIDEO_EVICTION_BATCH_SIZE: int = 20
+
     @property
     def allowed_origins_list(self) -> List[str]:
         """Get ALLOWED_ORIGINS as a list."""
@@ -0,0 +1,68 @@
+"""Postgres advisory locks for coordinating work across workers."""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import engine
+
+# Every holder keeps the lock connection and usually opens a session for
+# its work too, so at most this many locks are held per worker, leaving
+# the rest of the pool (5 + 10 by default) to requests.
+_held = asyncio.Semaphore(settings.ADVISORY_LOCKS_MAX_HELD)
+
+
+@asynccontextmanager
+async def advisory_lock(namespace: str, key: str) -> AsyncIterator[None]:
+    """
+    Hold a session level advisory lock on (namespace, key).
+
+    The lock lives on a dedicated connection for the whole block, so it is
+    released even if the worker dies (Postgres drops it with the session).
+    Waiting workers block in Postgres, not in Python. Within a worker,
+    callers beyond ADVISORY_LOCKS_MAX_HELD wait for a slot before checking
+    out a connection, so concurrent lock holders cannot exhaust the pool.
+    Holders must not take a second advisory lock inside the block.
+    """
+    params = {"namespace": namespace, "key": key}
+    async with _held, engine.connect() as connection:
+        await connection.execute(
+            text("SELECT pg_advisory_lock(hashtext(:namespace), hashtext(:key))"),
+            params,
+        )
+        await connection.commit()
+        try:
+            yield
+        finally:
+            await connection.execute(
+                text("SELECT pg_advisory_unlock(hashtext(:namespace), hashtext(:key))"),
+                params,
+            )
+            await connection.commit()
+
+
+async def is_advisory_locked(namespace: str, key: str) -> bool:
+    """
+    Check whether any session holds the advisory lock on (namespace, key).
+
+    Takes the lock with pg_try_advisory_lock and gives it back at once, so
+    a lock left by a dead worker, which Postgres dropped with its session,
+    reads as free.
+    """
+    params = {"namespace": namespace, "key": key}
+    async with engine.connect() as connection:
+        acquired = (
+            await connection.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:namespace), hashtext(:key))"),
+                params,
+            )
+        ).scalar_one()
+        if acquired:
+            await connection.execute(
+                text("SELECT pg_advisory_unlock(hashtext(:namespace), hashtext(:key))"),
+                params,
+            )
+        await connection.commit()
+    return not acquired
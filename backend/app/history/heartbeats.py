@@ -0,0 +1,166 @@
+"""Write-behind buffer of player watch-progress heartbeats."""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.security import utcnow
+from app.db.session import async_session_maker
+from app.history.session_tracker import (
+    UPSERT_BATCH_SIZE,
+    ViewingKey,
+    append_watch_events,
+    watch_sessions,
+)
+from app.history.watched import is_watched, watched_sets
+from app.models.movie import Movie
+from app.models.watch_history import WatchHistory
+from app.trending.service import HEARTBEAT_WEIGHT, trending
+
+logger = logging.getLogger(__name__)
+
+# Known movie ids kept per worker before the set is reset
+KNOWN_MOVIES_LIMIT = 10_000
+
+
+@dataclass
+class Heartbeat:
+    """Latest reported state of one user on one movie."""
+
+    watch_duration: int
+    completed: bool
+    watched_at: datetime
+
+
+class HeartbeatBuffer:
+    """
+    Coalesces player heartbeats per (user, movie) until the next flush.
+
+    A heartbeat only replaces the buffered state of its viewer, so however
+    often players report, each flush writes one row per active viewer with
+    a single multi-row INSERT ... ON CONFLICT (movie_id, user_id). Durations
+    never go backwards and completion is sticky, both in the buffer and in
+    the upsert, so reordered or replayed heartbeats are harmless.
+    """
+
+    def __init__(self):
+        self._pending: dict[ViewingKey, Heartbeat] = {}
+        self._known_movies: set[str] = set()
+        self._task: asyncio.Task | None = None
+
+    async def movie_exists(self, movie_id: str) -> bool:
+        """Check a movie id once per worker, so buffered rows never break the batch FK."""
+        if movie_id in self._known_movies:
+            return True
+        async with async_session_maker() as db:
+            result = await db.execute(select(Movie.id).where(Movie.id == movie_id))
+            if result.scalar_one_or_none() is None:
+                return False
+        if len(self._known_movies) >= KNOWN_MOVIES_LIMIT:
+            self._known_movies.clear()
+        self._known_movies.add(movie_id)
+        return True
+
+    def record(self, user_id: int, movie_id: str, watch_duration: int, completed: bool) -> None:
+        """Buffer a heartbeat, keeping only the latest state of the viewer."""
+        key = (user_id, movie_id)
+        # The player knows exactly what was watched; stop estimating from streams
+        watch_sessions.mark_reported(user_id, movie_id)
+        trending.record(movie_id, HEARTBEAT_WEIGHT)
+        heartbeat = self._pending.get(key)
+        if heartbeat is None:
+            self._pending[key] = Heartbeat(watch_duration, completed, utcnow())
+            return
+        heartbeat.watch_duration = max(heartbeat.watch_duration, watch_duration)
+        heartbeat.completed = heartbeat.completed or completed
+        heartbeat.watched_at = utcnow()
+
+    async def flush(self) -> None:
+        """Write every buffered heartbeat in one transaction."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        rows = [
+            {
+                "user_id": user_id,
+                "movie_id": movie_id,
+                "watched_at": heartbeat.watched_at,
+                "watch_duration": heartbeat.watch_duration,
+                "completed": heartbeat.completed,
+            }
+            for (user_id, movie_id), heartbeat in pending.items()
+        ]
+        try:
+            await self._write(rows)
+        except Exception:
+            # Put the batch back under anything received meanwhile
+            for key, heartbeat in pending.items():
+                newer = self._pending.get(key)
+                if newer is None:
+                    self._pending[key] = heartbeat
+                else:
+                    newer.watch_duration = max(newer.watch_duration, heartbeat.watch_duration)
+                    newer.completed = newer.completed or heartbeat.completed
+            raise
+        watched_sets.add(
+            key
+            for key, heartbeat in pending.items()
+            if is_watched(heartbeat.watch_duration, heartbeat.completed)
+        )
+
+    @staticmethod
+    async def _write(rows: list[dict]) -> None:
+        async with async_session_maker() as db:
+            connection = await db.connection()
+            if rows:
+                await append_watch_events(connection, rows)
+
+            for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+                statement = insert(WatchHistory).values(rows[i:i + UPSERT_BATCH_SIZE])
+                statement = statement.on_conflict_do_update(
+                    index_elements=[WatchHistory.movie_id, WatchHistory.user_id],
+                    set_={
+                        "watched_at": func.greatest(
+                            WatchHistory.watched_at, statement.excluded.watched_at
+                        ),
+                        "watch_duration": func.greatest(
+                            WatchHistory.watch_duration, statement.excluded.watch_duration
+                        ),
+                        "completed": func.coalesce(WatchHistory.completed, False)
+                        | statement.excluded.completed,
+                    },
+                )
+                await connection.execute(statement)
+            await db.commit()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.HEARTBEAT_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing watch heartbeats failed")
+
+    def start(self) -> None:
+        """Start the periodic flush."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write what is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+heartbeats = HeartbeatBuffer()
@@ -0,0 +1,147 @@
+"""Monthly partitions of the watch_events table, created ahead and retired."""
+import asyncio
+import logging
+import re
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.security import utcnow
+from app.db.locks import advisory_lock
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "watch_events"
+_PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def month_start(moment: datetime) -> datetime:
+    """First instant of the month of a moment."""
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    """Shift the first instant of a month by a number of months."""
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    """Name of the partition holding a month, e.g. watch_events_y2026m10."""
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> datetime | None:
+    """Month held by a partition, or None for a table not named by partition_name."""
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1)
+
+
+class PartitionManager:
+    """
+    Keeps watch_events partitioned by calendar month.
+
+    Partitions are created WATCH_EVENTS_PARTITIONS_AHEAD months in advance,
+    so inserts never hit a missing range. Partitions older than
+    WATCH_EVENTS_RETENTION_MONTHS are detached: they leave every query
+    plan but stay on disk as plain tables for archiving, unless
+    WATCH_EVENTS_DROP_DETACHED is set. Maintenance runs under an advisory
+    lock and every step is idempotent, so each worker may run it.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    async def _partitions(connection) -> list[str]:
+        result = await connection.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :parent"
+            ),
+            {"parent": PARENT_TABLE},
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def create_ahead(connection, now: datetime) -> list[str]:
+        """Create the partitions of the current and coming months, return the new ones."""
+        existing = set(await PartitionManager._partitions(connection))
+        created = []
+        current = month_start(now)
+        for offset in range(settings.WATCH_EVENTS_PARTITIONS_AHEAD + 1):
+            start = add_months(current, offset)
+            name = partition_name(start)
+            if name in existing:
+                continue
+            # Names and bounds are generated here, never taken from input
+            await connection.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT_TABLE} '
+                f"FOR VALUES FROM ('{start.isoformat()}') "
+                f"TO ('{add_months(start, 1).isoformat()}')"
+            ))
+            created.append(name)
+        return created
+
+    @staticmethod
+    async def retire(connection, now: datetime) -> list[str]:
+        """Detach (and optionally drop) partitions past retention, return them."""
+        cutoff = add_months(month_start(now), -settings.WATCH_EVENTS_RETENTION_MONTHS)
+        retired = []
+        for name in await PartitionManager._partitions(connection):
+            month = partition_month(name)
+            if month is None or month >= cutoff:
+                continue
+            await connection.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{name}"'))
+            if settings.WATCH_EVENTS_DROP_DETACHED:
+                await connection.execute(text(f'DROP TABLE "{name}"'))
+            retired.append(name)
+        return retired
+
+    async def maintain(self, now: datetime | None = None) -> None:
+        """Create upcoming partitions and retire expired ones."""
+        now = now or utcnow()
+        async with advisory_lock("partitions", PARENT_TABLE):
+            async with engine.begin() as connection:
+                created = await self.create_ahead(connection, now)
+                retired = await self.retire(connection, now)
+        if created:
+            logger.info("Created partitions %s", created)
+        if retired:
+            logger.info("Retired partitions %s", retired)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.WATCH_EVENTS_MAINTENANCE_SECONDS)
+            try:
+                await self.maintain()
+            except Exception:
+                logger.exception("Watch event partition maintenance failed")
+
+    async def start(self) -> None:
+        """Make sure this month has a partition, then maintain periodically."""
+        try:
+            await self.maintain()
+        except Exception:
+            logger.exception("Watch event partition maintenance failed")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic maintenance."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+partition_manager = PartitionManager()
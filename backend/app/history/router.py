@@ -0,0 +1,74 @@
+"""Watch history API routes."""
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import get_current_active_user
+from app.db.session import get_db
+from app.history.heartbeats import heartbeats
+from app.history.schemas import (
+    ContinueWatchingPage,
+    HeartbeatRequest,
+    WatchedRequest,
+    WatchedResponse,
+)
+from app.history.service import WatchHistoryService
+from app.history.watched import watched_sets
+from app.models.models import User
+from app.utils.cursor import InvalidCursor
+
+router = APIRouter(prefix="/history", tags=["history"])
+
+
+@router.post("/{movie_id}/heartbeat", status_code=status.HTTP_204_NO_CONTENT)
+async def heartbeat(
+    movie_id: str,
+    request: HeartbeatRequest,
+    current_user: User = Depends(get_current_active_user),
+) -> Response:
+    """
+    Report the watch progress of the current user on a movie.
+
+    Heartbeats are buffered in memory and written in bulk every
+    HEARTBEAT_FLUSH_SECONDS; only the latest state per movie is kept.
+    """
+    if not await heartbeats.movie_exists(movie_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Movie not found",
+        )
+    heartbeats.record(current_user.id, movie_id, request.watch_duration, request.completed)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/watched", response_model=WatchedResponse)
+async def get_watched(
+    request: WatchedRequest,
+    current_user: User = Depends(get_current_active_user),
+) -> dict:
+    """
+    Tell which movies of a result page the current user has watched.
+
+    Served from the user's cached watched set: at most one query per
+    user and TTL, whatever the page size.
+    """
+    return {"watched": await watched_sets.annotate(current_user.id, request.movie_ids)}
+
+
+@router.get("/continue", response_model=ContinueWatchingPage)
+async def continue_watching(
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """Get the current user's unfinished movies, most recently watched first."""
+    try:
+        items, next_cursor = await WatchHistoryService.continue_watching(
+            db, current_user.id, limit, cursor
+        )
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,40 @@
+"""Watch history Pydantic schemas using v2."""
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class HeartbeatRequest(BaseModel):
+    """Schema for a player watch-progress heartbeat."""
+
+    watch_duration: int = Field(..., ge=0, description="Seconds watched so far")
+    completed: bool = False
+
+
+class WatchedRequest(BaseModel):
+    """Schema for the movie ids of a result page to annotate."""
+
+    movie_ids: list[str] = Field(..., max_length=500)
+
+
+class WatchedResponse(BaseModel):
+    """Schema for "already watched" flags, by movie id."""
+
+    watched: dict[str, bool]
+
+
+class ContinueWatchingItem(BaseModel):
+    """Schema for one unfinished movie of a user."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    movie_id: str
+    watched_at: datetime
+    watch_duration: int | None = None
+
+
+class ContinueWatchingPage(BaseModel):
+    """Schema for a page of the continue watching feed."""
+
+    items: list[ContinueWatchingItem]
+    next_cursor: str | None = None
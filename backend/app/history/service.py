@@ -0,0 +1,82 @@
+"""Watch history service layer for business logic."""
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import distinct, false, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import utcnow
+from app.models.watch_event import WatchEvent
+from app.models.watch_history import WatchHistory
+from app.utils.cursor import decode_cursor, encode_cursor
+
+
+class WatchHistoryService:
+    """Service layer for watch history queries."""
+
+    @staticmethod
+    async def continue_watching(
+        db: AsyncSession, user_id: int, limit: int, cursor: str | None = None
+    ) -> tuple[list[WatchHistory], str | None]:
+        """
+        Get a page of a user's unfinished movies, most recently watched first.
+
+        Pages are addressed by the (watched_at, id) of their last row, so
+        each page is a range scan of ix_watch_history_user_completed_watched_at
+        however deep the history is, instead of an OFFSET that reads and
+        discards every earlier row.
+
+        Args:
+            db: Database session
+            user_id: Owner of the history
+            limit: Page size
+            cursor: next_cursor of the previous page, None for the first page
+
+        Returns:
+            The rows of the page and the cursor of the next one (None on the last page)
+
+        Raises:
+            InvalidCursor: If the cursor cannot be decoded
+        """
+        query = select(WatchHistory).where(
+            WatchHistory.user_id == user_id,
+            WatchHistory.completed == false(),
+        )
+        if cursor is not None:
+            watched_at, row_id = decode_cursor(cursor, (datetime, int))
+            query = query.where(
+                tuple_(WatchHistory.watched_at, WatchHistory.id) < tuple_(watched_at, row_id)
+            )
+        query = query.order_by(WatchHistory.watched_at.desc(), WatchHistory.id.desc())
+
+        # One extra row tells whether another page follows
+        result = await db.execute(query.limit(limit + 1))
+        rows = list(result.scalars().all())
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].watched_at, rows[-1].id)
+
+    @staticmethod
+    async def viewer_counts(
+        db: AsyncSession,
+        since: datetime,
+        until: datetime | None = None,
+        movie_ids: Iterable[str] | None = None,
+    ) -> dict[str, int]:
+        """
+        Count distinct viewers per movie from the watch event log.
+
+        Both bounds are plain comparisons on the partition key, so only the
+        monthly partitions overlapping [since, until) are scanned. With
+        movie_ids, only those movies are counted, on the
+        (movie_id, occurred_at) index.
+        """
+        until = until or utcnow()
+        query = select(WatchEvent.movie_id, func.count(distinct(WatchEvent.user_id))).where(
+            WatchEvent.occurred_at >= since, WatchEvent.occurred_at < until
+        )
+        if movie_ids is not None:
+            query = query.where(WatchEvent.movie_id.in_(list(movie_ids)))
+        result = await db.execute(query.group_by(WatchEvent.movie_id))
+        return dict(result.all())
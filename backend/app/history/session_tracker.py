@@ -0,0 +1,257 @@
+"""Batched watch-session accounting from stream requests."""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.security import utcnow
+from app.db.session import async_session_maker
+from app.history.watched import is_watched, watched_sets
+from app.models.video import Video
+from app.models.watch_event import WatchEvent
+from app.models.watch_history import WatchHistory
+from app.trending.service import STREAM_START_WEIGHT, trending
+
+logger = logging.getLogger(__name__)
+
+ViewingKey = tuple[int, str]
+
+UPSERT_BATCH_SIZE = 1000
+
+
+async def append_watch_events(connection: AsyncConnection, rows: list[dict]) -> None:
+    """
+    Append watch_history rows to the watch_events log.
+
+    Runs in a savepoint: the event log must not cost the history write if,
+    say, a partition is missing.
+    """
+    events = [
+        {
+            "user_id": row["user_id"],
+            "movie_id": row["movie_id"],
+            "occurred_at": row["watched_at"],
+            "watch_duration": row["watch_duration"],
+            "completed": row["completed"],
+        }
+        for row in rows
+    ]
+    try:
+        async with connection.begin_nested():
+            for i in range(0, len(events), UPSERT_BATCH_SIZE):
+                await connection.execute(insert(WatchEvent).values(events[i:i + UPSERT_BATCH_SIZE]))
+    except Exception:
+        logger.exception("Writing watch events failed")
+
+
+@dataclass
+class Viewing:
+    """Aggregated activity of one user on one movie seen by this worker."""
+
+    last_seen: float
+    watched_at: datetime
+    # Estimated playback position, in seconds
+    seconds: float = 0.0
+    # Playback time of the bytes sent by the latest request, if known
+    served_seconds: float | None = None
+    dirty: bool = True
+    # The player sends heartbeats with the exact position
+    reported: bool = False
+
+
+class WatchSessionTracker:
+    """
+    Aggregates viewing time per (user, movie) in memory.
+
+    Every stream request only touches a dict. Time between two requests of
+    the same viewer counts as watched when the gap is shorter than
+    WATCH_SESSION_GAP_SECONDS, but never more than the playback time of the
+    bytes the earlier request sent, so a paused player is not credited for
+    the wait. Every WATCH_FLUSH_SECONDS the aggregate is written with one
+    batched UPDATE of videos.last_watched_at and one multi-row upsert into
+    watch_history, and every written estimate is appended to watch_events.
+
+    watch_duration is a playback position, as reported by heartbeats: the
+    estimate is written with GREATEST, never added, so flushes of several
+    workers seeing the same viewer cannot count the same time twice. The
+    estimate is only a fallback for players without heartbeats; once a
+    viewer's heartbeats reach this worker, its estimate is no longer written.
+    """
+
+    def __init__(self):
+        self._viewings: dict[ViewingKey, Viewing] = {}
+        self._videos: dict[str, datetime] = {}
+        self._task: asyncio.Task | None = None
+
+    def record(
+        self, user_id: int, movie_id: str, served_seconds: float | None = None
+    ) -> None:
+        """
+        Account for a stream request of a user on a movie.
+
+        `served_seconds` is the playback time of the bytes being sent, when
+        the video's duration is known; it caps the time credited until the
+        next request.
+        """
+        now = time.monotonic()
+        watched_at = utcnow()
+        self._videos[movie_id] = watched_at
+
+        key = (user_id, movie_id)
+        viewing = self._viewings.get(key)
+        if viewing is None:
+            self._viewings[key] = Viewing(
+                last_seen=now, watched_at=watched_at, served_seconds=served_seconds
+            )
+            trending.record(movie_id, STREAM_START_WEIGHT)
+            return
+        gap = now - viewing.last_seen
+        if gap > settings.WATCH_SESSION_GAP_SECONDS:
+            trending.record(movie_id, STREAM_START_WEIGHT)
+        elif not viewing.reported:
+            if viewing.served_seconds is not None:
+                gap = min(gap, viewing.served_seconds)
+            viewing.seconds += gap
+        viewing.served_seconds = served_seconds
+        viewing.last_seen = now
+        viewing.watched_at = watched_at
+        viewing.dirty = True
+
+    def mark_reported(self, user_id: int, movie_id: str) -> None:
+        """Stop estimating a viewer's position, heartbeats report it exactly."""
+        key = (user_id, movie_id)
+        viewing = self._viewings.get(key)
+        if viewing is None:
+            self._viewings[key] = Viewing(
+                last_seen=time.monotonic(), watched_at=utcnow(), dirty=False, reported=True
+            )
+            return
+        viewing.reported = True
+        viewing.dirty = False
+
+    def _take_batch(self) -> tuple[list[dict], list[dict]]:
+        """Swap out what must be written."""
+        history_rows = []
+        for (user_id, movie_id), viewing in self._viewings.items():
+            if not viewing.dirty:
+                continue
+            viewing.dirty = False
+            if viewing.reported:
+                continue
+            history_rows.append(
+                {
+                    "user_id": user_id,
+                    "movie_id": movie_id,
+                    "watched_at": viewing.watched_at,
+                    "watch_duration": int(viewing.seconds),
+                    "completed": False,
+                }
+            )
+
+        video_rows = [
+            {"b_movie_id": movie_id, "b_watched_at": watched_at}
+            for movie_id, watched_at in self._videos.items()
+        ]
+        self._videos = {}
+        return history_rows, video_rows
+
+    def _prune(self) -> None:
+        """Forget sessions idle past the gap, they will not accumulate any more time."""
+        idle = time.monotonic() - settings.WATCH_SESSION_GAP_SECONDS
+        for key in [k for k, v in self._viewings.items() if v.last_seen < idle and not v.dirty]:
+            del self._viewings[key]
+
+    async def flush(self) -> None:
+        """
+        Write the aggregated activity in one transaction.
+
+        Idle sessions are pruned only once the batch is written, so a failed
+        write can still mark the viewings it took dirty again.
+        """
+        history_rows, video_rows = self._take_batch()
+        if history_rows or video_rows:
+            try:
+                await self._write(history_rows, video_rows)
+            except Exception:
+                self._restore(history_rows, video_rows)
+                raise
+            watched_sets.add(
+                (row["user_id"], row["movie_id"])
+                for row in history_rows
+                if is_watched(row["watch_duration"], row["completed"])
+            )
+        self._prune()
+
+    def _restore(self, history_rows: list[dict], video_rows: list[dict]) -> None:
+        """Put a failed batch back so the next flush retries it."""
+        for row in history_rows:
+            viewing = self._viewings.get((row["user_id"], row["movie_id"]))
+            if viewing is not None and not viewing.reported:
+                viewing.dirty = True
+        for row in video_rows:
+            self._videos.setdefault(row["b_movie_id"], row["b_watched_at"])
+
+    @staticmethod
+    async def _write(history_rows: list[dict], video_rows: list[dict]) -> None:
+        async with async_session_maker() as db:
+            connection = await db.connection()
+            if video_rows:
+                table = Video.__table__
+                await connection.execute(
+                    update(table)
+                    .where(table.c.movie_id == bindparam("b_movie_id"))
+                    .values(last_watched_at=bindparam("b_watched_at")),
+                    video_rows,
+                )
+            if history_rows:
+                await append_watch_events(connection, history_rows)
+
+            # Stay well under the 32767 bind parameters of one statement
+            for i in range(0, len(history_rows), UPSERT_BATCH_SIZE):
+                statement = insert(WatchHistory).values(history_rows[i:i + UPSERT_BATCH_SIZE])
+                statement = statement.on_conflict_do_update(
+                    index_elements=[WatchHistory.movie_id, WatchHistory.user_id],
+                    set_={
+                        "watched_at": func.greatest(
+                            WatchHistory.watched_at, statement.excluded.watched_at
+                        ),
+                        "watch_duration": func.greatest(
+                            WatchHistory.watch_duration, statement.excluded.watch_duration
+                        ),
+                    },
+                )
+                await connection.execute(statement)
+            await db.commit()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.WATCH_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing watch sessions failed")
+
+    def start(self) -> None:
+        """Start the periodic flush."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write what is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+watch_sessions = WatchSessionTracker()
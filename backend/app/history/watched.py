@@ -0,0 +1,112 @@
+"""Per-user sets of watched movies for "already watched" badges."""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import or_, select
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.models.watch_history import WatchHistory
+
+
+def is_watched(watch_duration: int | None, completed: bool | None) -> bool:
+    """
+    Whether a history row counts as watched.
+
+    Every stream request creates a row, so probing or seeking into a movie
+    must not mark it: only a completed row or one past WATCHED_MIN_SECONDS
+    counts.
+    """
+    return bool(completed) or (watch_duration or 0) >= settings.WATCHED_MIN_SECONDS
+
+
+@dataclass
+class WatchedSet:
+    """Movies a user has watched, as of when it was loaded plus later flushes."""
+
+    movie_ids: set[str]
+    loaded_at: float = field(default_factory=time.monotonic)
+
+
+class WatchedSetCache:
+    """
+    LRU with TTL of the watched movie ids of recently active users.
+
+    A user's set is loaded with one query on the watch_history.user_id
+    index, keeping only rows that count as watched (see is_watched);
+    annotating a result page is then a set lookup per movie, with
+    no query however large the page. Watch history flushes of this worker
+    add to cached sets as they are written; the TTL bounds how long a
+    change made by another worker goes unseen.
+    """
+
+    def __init__(self, max_users: int | None = None, ttl: int | None = None):
+        self.max_users = max_users or settings.WATCHED_CACHE_USERS
+        self.ttl = ttl or settings.WATCHED_CACHE_TTL_SECONDS
+        self._sets: OrderedDict[int, WatchedSet] = OrderedDict()
+        self._loading: dict[int, asyncio.Task] = {}
+        # Flushed while a load was running, which may predate them
+        self._added_while_loading: dict[int, set[str]] = {}
+
+    @staticmethod
+    async def _load(user_id: int) -> set[str]:
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(WatchHistory.movie_id).where(
+                    WatchHistory.user_id == user_id,
+                    or_(
+                        WatchHistory.completed.is_(True),
+                        WatchHistory.watch_duration >= settings.WATCHED_MIN_SECONDS,
+                    ),
+                )
+            )
+            return set(result.scalars().all())
+
+    async def get(self, user_id: int) -> set[str]:
+        """Get the watched movie ids of a user, loading them on a miss."""
+        watched = self._sets.get(user_id)
+        if watched is not None and time.monotonic() - watched.loaded_at < self.ttl:
+            self._sets.move_to_end(user_id)
+            return watched.movie_ids
+
+        task = self._loading.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._load(user_id))
+            self._loading[user_id] = task
+            self._added_while_loading[user_id] = set()
+            task.add_done_callback(lambda _: self._loading.pop(user_id, None))
+        movie_ids = await asyncio.shield(task)
+
+        added = self._added_while_loading.pop(user_id, None)
+        if added:
+            movie_ids |= added
+        self._sets[user_id] = WatchedSet(movie_ids)
+        self._sets.move_to_end(user_id)
+        while len(self._sets) > self.max_users:
+            self._sets.popitem(last=False)
+        return movie_ids
+
+    def add(self, pairs: Iterable[tuple[int, str]]) -> None:
+        """Record (user_id, movie_id) pairs of written rows that count as watched."""
+        for user_id, movie_id in pairs:
+            watched = self._sets.get(user_id)
+            if watched is not None:
+                watched.movie_ids.add(movie_id)
+            added = self._added_while_loading.get(user_id)
+            if added is not None:
+                added.add(movie_id)
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget a user's set, e.g. after history rows were deleted."""
+        self._sets.pop(user_id, None)
+
+    async def annotate(self, user_id: int, movie_ids: Iterable[str]) -> dict[str, bool]:
+        """Map each movie id of a result page to whether the user watched it."""
+        watched = await self.get(user_id)
+        return {movie_id: movie_id in watched for movie_id in movie_ids}
+
+
+watched_sets = WatchedSetCache()
@@ -1,15 +1,62 @@
 """Main FastAPI application."""
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.auth.router import router as auth_router
+from app.comments.router import router as comments_router
 from app.core.config import settings
+from app.history.heartbeats import heartbeats
+from app.history.partitions import partition_manager
+from app.history.router import router as history_router
+from app.history.session_tracker import watch_sessions
+# Register every model so string relationship() targets resolve at runtime
+from app.models import cast, comment, models, movie, movie_neighbors, recommendation_state, subtitle, trending_score, video, watch_event, watch_history  # noqa: F401
+from app.recommendations.router import router as recommendations_router
+from app.recommendations.service import recommendation_job
+from app.subtitles.router import router as subtitles_router
+from app.subtitles.service import subtitle_fetcher
+from app.trending.router import router as trending_router
+from app.trending.service import trending
 from app.users.router import router as users_router
 from app.Oauth.router import router as oauth_router
+from app.torrent.resume import resume_tracker
+from app.videos.cache_manager import cache_manager
+from app.videos.metadata import metadata_store
+from app.videos.progress import progress_hub
+from app.videos.router import router as videos_router
+from app.videos.thumbnails import thumbnail_jobs
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi.staticfiles import StaticFiles
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background workers."""
+    cache_manager.start()
+    progress_hub.start()
+    await resume_tracker.start()
+    watch_sessions.start()
+    await partition_manager.start()
+    heartbeats.start()
+    await trending.start()
+    await metadata_store.start()
+    await thumbnail_jobs.start()
+    recommendation_job.start()
+    yield
+    await recommendation_job.stop()
+    await subtitle_fetcher.stop()
+    await thumbnail_jobs.stop()
+    await metadata_store.stop()
+    await trending.stop()
+    await heartbeats.stop()
+    await partition_manager.stop()
+    await watch_sessions.stop()
+    await resume_tracker.stop()
+    await progress_hub.stop()
+    await cache_manager.stop()
+
 
 def create_application() -> FastAPI:
     """Create and configure FastAPI application."""
@@ -18,6 +65,7 @@ def create_application() -> FastAPI:
         debug=settings.DEBUG,
         description="Production-ready FastAPI with secure cookie-based JWT authentication",
         version="1.0.0",
+        lifespan=lifespan,
     )
 
     # CORS middleware
@@ -40,6 +88,12 @@ def create_application() -> FastAPI:
     app.include_router(auth_router)
     app.include_router(users_router)
     app.include_router(oauth_router)
+    app.include_router(videos_router)
+    app.include_router(subtitles_router)
+    app.include_router(history_router)
+    app.include_router(comments_router)
+    app.include_router(recommendations_router)
+    app.include_router(trending_router)
 
     @app.get("/")
     async def root():
@@ -4,6 +4,7 @@ from sqlalchemy import (
     TEXT,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
 )
@@ -21,24 +22,27 @@ class Comment(Base):
     """Model for Comments"""
 
     __tablename__ = "comments"
+    __table_args__ = (
+        # Keyset pages of a movie's thread
+        Index("ix_comments_movie_id_created_at_id", "movie_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     movie_id: Mapped[str] = mapped_column(
         String(50),
         ForeignKey("movies.id", ondelete="CASCADE"),
-        index=True,
-        unique=True,
         nullable=False,
     )
-    user_id: Mapped[str] = mapped_column(
+    user_id: Mapped[int] = mapped_column(
         Integer,
         ForeignKey("users.id", ondelete="CASCADE"),
         index=True,
-        unique=True,
         nullable=False,
     )
-    content: Mapped[int] = mapped_column(TEXT, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, index=True)
+    content: Mapped[str] = mapped_column(TEXT, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, index=True, nullable=False
+    )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=utcnow, onupdate=utcnow
     )
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import ARRAY, DateTime, ForeignKey, REAL, String
+from app.db.session import Base
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.security import utcnow
+
+
+class MovieNeighbors(Base):
+    """
+    Movie Neighbors Model
+
+    Precomputed "because you watched" list of a movie: the ids of its most
+    similar movies and their scores, best first, in one row read by
+    primary key.
+    """
+
+    __tablename__ = "movie_neighbors"
+
+    movie_id: Mapped[str] = mapped_column(
+        String(50),
+        ForeignKey("movies.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    neighbor_ids: Mapped[list[str]] = mapped_column(ARRAY(String(50)), nullable=False)
+    scores: Mapped[list[float]] = mapped_column(ARRAY(REAL), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Movie Neighbors(movie_id='{self.movie_id}', count={len(self.neighbor_ids)})>"
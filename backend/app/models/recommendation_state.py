@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, String
+from app.db.session import Base
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.security import utcnow
+
+
+class RecommendationState(Base):
+    """
+    Recommendation State Model
+
+    Which saved co-occurrence model movie_neighbors was last computed from.
+    The model file is local to the host that ran the job; a host whose file
+    does not carry `token` rebuilds from the whole history instead of
+    counting rows another host already counted.
+    """
+
+    __tablename__ = "recommendation_state"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    token: Mapped[str] = mapped_column(String(32), nullable=False)
+    watermark: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Recommendation State(name='{self.name}', watermark={self.watermark})>"
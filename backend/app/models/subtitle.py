@@ -25,7 +25,6 @@ class Subtitle(Base):
         String(50),
         ForeignKey("movies.id", ondelete="CASCADE"),
         index=True,
-        unique=True,
         nullable=False,
     )
     language: Mapped[str] = mapped_column(String(10), nullable=False)
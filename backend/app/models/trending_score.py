@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Double, ForeignKey, String
+from app.db.session import Base
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.security import utcnow
+
+
+class TrendingScore(Base):
+    """
+    Trending Score Model
+
+    Exponentially decayed activity of a movie, merged from every worker.
+    `score` is the value as of `updated_at`; it keeps decaying from there.
+    """
+
+    __tablename__ = "trending_scores"
+
+    movie_id: Mapped[str] = mapped_column(
+        String(50),
+        ForeignKey("movies.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    score: Mapped[float] = mapped_column(Double, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Trending Score(movie_id='{self.movie_id}', score={self.score})>"
@@ -29,6 +29,15 @@ class StatusType(str, Enum):
     ERROR = "error"
 
 
+class ConversionMode(str, Enum):
+    """Enum for how a source file is turned into a browser playable file"""
+
+    NONE = "none"  # already browser playable, served as is
+    REMUX = "remux"  # every stream copied, only the container changes
+    PARTIAL = "partial"  # one stream copied, the other re-encoded
+    TRANSCODE = "transcode"  # full re-encode
+
+
 class Video(Base):
     """Video model"""
 
@@ -45,6 +54,11 @@ class Video(Base):
     file_path: Mapped[str] = mapped_column(String(500), nullable=False)
     original_format: Mapped[str | None] = mapped_column(String(10))
     converted_format: Mapped[str | None] = mapped_column(String(10))
+    video_codec: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    audio_codec: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    conversion_mode: Mapped[str | None] = mapped_column(
+        SQLEnum(ConversionMode, native_enum=False, length=20), nullable=True
+    )
     file_size: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     duration: Mapped[int | None] = mapped_column(Integer, nullable=True)
     progress: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -54,7 +68,11 @@ class Video(Base):
         default=StatusType.DOWNLOADING,
     )
     downloaded_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
-    last_watched_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    # Set on creation and when the video becomes ready or fails, so eviction
+    # can scan the index alone
+    last_watched_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=utcnow, index=True
+    )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, nullable=True, default=utcnow, onupdate=utcnow
     )
@@ -81,6 +99,9 @@ class Video(Base):
             "file_path": self.file_path,
             "original_format": self.original_format,
             "converted_format": self.converted_format,
+            "video_codec": self.video_codec,
+            "audio_codec": self.audio_codec,
+            "conversion_mode": self.conversion_mode,
             "file_size": self.file_size,
             "duration": self.duration,
             "status": self.status,
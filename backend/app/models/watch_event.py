@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
+from app.db.session import Base
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.security import utcnow
+
+
+class WatchEvent(Base):
+    """
+    Watch Event Model
+
+    Append-only log of player heartbeats and of the watch time estimated
+    from stream requests, range partitioned by month on
+    occurred_at (partitions are managed by app.history.partitions). Every
+    query should bound occurred_at so the planner only touches the
+    partitions it needs.
+    """
+
+    __tablename__ = "watch_events"
+
+    # The partition key must be part of the primary key
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=utcnow)
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    movie_id: Mapped[str] = mapped_column(
+        String(50),
+        ForeignKey("movies.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    watch_duration: Mapped[int] = mapped_column(Integer, nullable=False)
+    completed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+
+    __table_args__ = (
+        Index("ix_watch_events_movie_id_occurred_at", "movie_id", "occurred_at"),
+        Index("ix_watch_events_user_id_occurred_at", "user_id", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+    def __repr__(self) -> str:
+        return f"<Watch Event(id={self.id}, movie_id='{self.movie_id}', occurred_at='{self.occurred_at}')>"
@@ -4,6 +4,7 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
@@ -28,14 +29,12 @@ class WatchHistory(Base):
         String(50),
         ForeignKey("movies.id", ondelete="CASCADE"),
         index=True,
-        unique=True,
         nullable=False,
     )
     user_id: Mapped[str] = mapped_column(
         Integer,
         ForeignKey("users.id", ondelete="CASCADE"),
         index=True,
-        unique=True,
         nullable=False,
     )
     watched_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, index=True)
@@ -45,7 +44,17 @@ class WatchHistory(Base):
     movie: Mapped["Movie"] = relationship("Movie", back_populates="watch_history")
     user: Mapped["User"] = relationship("User", back_populates="watch_history")
 
-    __table_args__ = (UniqueConstraint("movie_id", "user_id", name="movie_user_uc"),)
+    __table_args__ = (
+        UniqueConstraint("movie_id", "user_id", name="movie_user_uc"),
+        # "Continue watching": a user's incomplete rows, newest first
+        Index(
+            "ix_watch_history_user_completed_watched_at",
+            "user_id",
+            "completed",
+            watched_at.desc(),
+            id.desc(),
+        ),
+    )
 
     def __repr__(self) -> str:
         return f"<Watch History(id={self.id}, movie_id='{self.movie_id}', watched_at='{self.watched_at}')>"
@@ -0,0 +1,178 @@
+"""Item-item co-occurrence model over watch history, with NumPy/SciPy."""
+import os
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+from scipy import sparse
+
+Pair = tuple[int, str]  # (user_id, movie_id)
+
+
+class CooccurrenceModel:
+    """
+    Movie x movie co-occurrence counts: C[i, j] is the number of users who
+    watched both movies i and j, and C[i, i] the viewers of movie i.
+
+    With X the binary user x movie matrix, C = X^T X. New history rows
+    form a matrix D disjoint from X, so (X + D)^T (X + D) only needs
+    D^T X_u + X_u^T D + D^T D, where X_u is restricted to the users in D:
+    updates cost the activity since the last run, not the whole history.
+    Similarity is the cosine C[i, j] / sqrt(C[i, i] C[j, j]).
+
+    History ids are allocated before their rows commit, so a row can show
+    up below ids already counted. Every id at or below `floor` is taken as
+    counted; above it, the counted ids are kept in `recent`, so rows that
+    commit late within that window are still picked up.
+    """
+
+    def __init__(self):
+        self.movies: list[str] = []
+        self._index: dict[str, int] = {}
+        self.counts = sparse.csr_matrix((0, 0), dtype=np.int32)
+        # Highest watch_history.id included in the counts
+        self.watermark = 0
+        self.floor = 0
+        self.recent: set[int] = set()
+        # Identifies a saved state, see RecommendationState
+        self.token = ""
+
+    def __len__(self) -> int:
+        return len(self.movies)
+
+    def is_counted(self, history_id: int) -> bool:
+        """Whether a watch_history row is already in the counts."""
+        return history_id <= self.floor or history_id in self.recent
+
+    def mark_counted(self, history_ids: Iterable[int], window: int) -> None:
+        """Record counted rows, remembering the ids of the last `window` ones."""
+        self.recent.update(history_ids)
+        if self.recent:
+            self.watermark = max(self.watermark, max(self.recent))
+        self.floor = max(self.floor, self.watermark - window)
+        self.recent = {history_id for history_id in self.recent if history_id > self.floor}
+
+    def _movie_indexes(self, movie_ids: Iterable[str]) -> np.ndarray:
+        """Column of each movie id, registering new movies."""
+        columns = []
+        for movie_id in movie_ids:
+            column = self._index.get(movie_id)
+            if column is None:
+                column = len(self.movies)
+                self._index[movie_id] = column
+                self.movies.append(movie_id)
+            columns.append(column)
+        size = len(self.movies)
+        if self.counts.shape[0] < size:
+            self.counts.resize((size, size))
+        return np.asarray(columns, dtype=np.int64)
+
+    def _user_matrix(self, pairs: list[Pair], users: dict[int, int]) -> sparse.csr_matrix:
+        """Binary matrix of pairs, rows in the order of `users`."""
+        rows = np.fromiter(
+            (users[user_id] for user_id, _ in pairs), dtype=np.int64, count=len(pairs)
+        )
+        columns = self._movie_indexes(movie_id for _, movie_id in pairs)
+        data = np.ones(len(pairs), dtype=np.int32)
+        matrix = sparse.csr_matrix(
+            (data, (rows, columns)), shape=(len(users), len(self.movies)), dtype=np.int32
+        )
+        # Duplicated pairs would count a viewer twice
+        matrix.data[:] = 1
+        return matrix
+
+    def add(self, new_pairs: list[Pair], previous_pairs: list[Pair]) -> np.ndarray:
+        """
+        Add history rows to the counts.
+
+        Args:
+            new_pairs: Pairs not counted yet
+            previous_pairs: Every already counted pair of the users in new_pairs
+
+        Returns:
+            Indexes of the movies whose neighbors may have changed
+        """
+        if not new_pairs:
+            return np.empty(0, dtype=np.int64)
+        users = {user_id: i for i, user_id in enumerate(dict.fromkeys(u for u, _ in new_pairs))}
+        delta = self._user_matrix(new_pairs, users)
+        previous = self._user_matrix(previous_pairs, users)
+        # _user_matrix may have registered movies, widen the earlier matrix
+        delta.resize((len(users), len(self.movies)))
+
+        cross = delta.T @ previous
+        self.counts = (self.counts + cross + cross.T + delta.T @ delta).tocsr()
+
+        # Every movie of an affected user has a changed row or a changed norm
+        changed = (delta + previous).indices
+        # A movie with new viewers has a new norm, which moves its score in
+        # the neighbor list of every movie that shares a viewer with it
+        viewed = np.unique(delta.indices)
+        adjacent = self.counts[viewed].indices
+        return np.unique(np.concatenate([changed, adjacent]))
+
+    def top_k(
+        self, rows: Iterable[int], k: int, min_shared: int = 1
+    ) -> dict[str, list[tuple[str, float]]]:
+        """Best k neighbors of each given movie by cosine, most similar first."""
+        diagonal = self.counts.diagonal()
+        result = {}
+        for row in rows:
+            start, end = self.counts.indptr[row], self.counts.indptr[row + 1]
+            columns = self.counts.indices[start:end]
+            shared = self.counts.data[start:end]
+            keep = (columns != row) & (shared >= min_shared)
+            columns, shared = columns[keep], shared[keep].astype(np.float64)
+            if len(columns) == 0:
+                result[self.movies[row]] = []
+                continue
+            scores = shared / np.sqrt(float(diagonal[row]) * diagonal[columns])
+            if len(scores) > k:
+                best = np.argpartition(-scores, k - 1)[:k]
+            else:
+                best = np.arange(len(scores))
+            best = best[np.argsort(-scores[best], kind="stable")]
+            result[self.movies[row]] = [
+                (self.movies[columns[i]], float(scores[i])) for i in best
+            ]
+        return result
+
+    def save(self, path: str | Path) -> None:
+        """Atomically write the model to an .npz file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        counts = self.counts.tocsr()
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                movies=np.asarray(self.movies, dtype=str),
+                data=counts.data,
+                indices=counts.indices,
+                indptr=counts.indptr,
+                watermark=np.asarray(self.watermark, dtype=np.int64),
+                floor=np.asarray(self.floor, dtype=np.int64),
+                recent=np.fromiter(self.recent, dtype=np.int64, count=len(self.recent)),
+                token=np.asarray(self.token, dtype=str),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CooccurrenceModel | None":
+        """Read a saved model, or None if missing, unreadable or of an older format."""
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                model = cls()
+                model.movies = [str(movie_id) for movie_id in saved["movies"]]
+                size = len(model.movies)
+                model.counts = sparse.csr_matrix(
+                    (saved["data"], saved["indices"], saved["indptr"]), shape=(size, size)
+                )
+                model.watermark = int(saved["watermark"])
+                model.floor = int(saved["floor"])
+                model.recent = set(saved["recent"].tolist())
+                model.token = str(saved["token"])
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            return None
+        model._index = {movie_id: i for i, movie_id in enumerate(model.movies)}
+        return model
@@ -0,0 +1,36 @@
+"""Recommendation API routes."""
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import get_current_active_user
+from app.db.session import get_db
+from app.models.models import User
+from app.recommendations.schemas import NeighborResponse, RecommendationsResponse
+from app.recommendations.service import RecommendationService
+
+router = APIRouter(prefix="/recommendations", tags=["recommendations"])
+
+
+@router.get("/{movie_id}", response_model=RecommendationsResponse)
+async def because_you_watched(
+    movie_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> RecommendationsResponse:
+    """
+    Get the movies most often watched by the viewers of a movie.
+
+    Neighbors are precomputed by the recommendation job; a movie it has not
+    scored yet has none.
+    """
+    row = await RecommendationService.neighbors(db, movie_id)
+    if row is None:
+        return RecommendationsResponse(movie_id=movie_id, neighbors=[])
+    return RecommendationsResponse(
+        movie_id=movie_id,
+        neighbors=[
+            NeighborResponse(movie_id=neighbor_id, score=score)
+            for neighbor_id, score in zip(row.neighbor_ids, row.scores)
+        ],
+        updated_at=row.updated_at,
+    )
@@ -0,0 +1,19 @@
+"""Recommendation Pydantic schemas using v2."""
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class NeighborResponse(BaseModel):
+    """Schema for one similar movie."""
+
+    movie_id: str
+    score: float
+
+
+class RecommendationsResponse(BaseModel):
+    """Schema for the "because you watched" movies of a movie."""
+
+    movie_id: str
+    neighbors: list[NeighborResponse]
+    updated_at: datetime | None = None
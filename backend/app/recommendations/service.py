@@ -0,0 +1,229 @@
+"""Precomputed item-item recommendations, refreshed from watch history."""
+import asyncio
+import logging
+import uuid
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import utcnow
+from app.db.locks import advisory_lock
+from app.db.session import async_session_maker
+from app.history.session_tracker import UPSERT_BATCH_SIZE
+from app.models.movie_neighbors import MovieNeighbors
+from app.models.recommendation_state import RecommendationState
+from app.models.watch_history import WatchHistory
+from app.recommendations.engine import CooccurrenceModel, Pair
+
+logger = logging.getLogger(__name__)
+
+# Users per IN (...) when reading earlier history, under the bind limit
+USER_BATCH_SIZE = 10_000
+# Key of the job's row in recommendation_state
+STATE_NAME = "cooccurrence"
+
+
+class RecommendationService:
+    """Service for reading precomputed recommendations."""
+
+    @staticmethod
+    async def neighbors(db: AsyncSession, movie_id: str) -> MovieNeighbors | None:
+        """Get the neighbors of a movie, or None before the job has scored it."""
+        result = await db.execute(
+            select(MovieNeighbors).where(MovieNeighbors.movie_id == movie_id)
+        )
+        return result.scalar_one_or_none()
+
+
+class RecommendationJob:
+    """
+    Keeps movie_neighbors up to date from watch_history.
+
+    The co-occurrence counts live in a CooccurrenceModel saved under
+    RECOMMENDATION_DIR with the history ids it has counted. Each run reads
+    the rows not counted yet, re-reading the last RECOMMENDATION_RESCAN_IDS
+    ids for rows that committed late, plus the earlier history of the users
+    behind them. It updates the counts and rewrites the neighbors of the
+    movies whose scores moved. Runs are serialized across workers with an
+    advisory lock. The model file is local to a host, so recommendation_state
+    records the token of the model the neighbors were last computed from; a
+    host whose file does not carry it, or that has none, rebuilds from the
+    whole history.
+    """
+
+    def __init__(self):
+        self.path = Path(settings.RECOMMENDATION_DIR) / "cooccurrence.npz"
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    async def _new_rows(
+        db: AsyncSession, model: CooccurrenceModel, after_id: int
+    ) -> tuple[list[tuple[int, int, str]], int]:
+        """
+        Next batch of history rows after an id, and the id to continue from.
+
+        Rows the model already counted are dropped from the batch, so it may
+        be empty while the scan is not over.
+        """
+        result = await db.execute(
+            select(WatchHistory.id, WatchHistory.user_id, WatchHistory.movie_id)
+            .where(WatchHistory.id > after_id)
+            .order_by(WatchHistory.id)
+            .limit(settings.RECOMMENDATION_BATCH_ROWS)
+        )
+        rows = result.tuples().all()
+        if not rows:
+            return [], after_id
+        return [row for row in rows if not model.is_counted(row[0])], rows[-1][0]
+
+    @staticmethod
+    async def _previous_pairs(
+        db: AsyncSession, model: CooccurrenceModel, users: list[int]
+    ) -> list[Pair]:
+        """Already counted history rows of some users."""
+        pairs = []
+        for i in range(0, len(users), USER_BATCH_SIZE):
+            result = await db.execute(
+                select(WatchHistory.id, WatchHistory.user_id, WatchHistory.movie_id).where(
+                    WatchHistory.user_id.in_(users[i:i + USER_BATCH_SIZE]),
+                    WatchHistory.id <= model.watermark,
+                )
+            )
+            pairs.extend(
+                (user_id, movie_id)
+                for history_id, user_id, movie_id in result.tuples().all()
+                if model.is_counted(history_id)
+            )
+        return pairs
+
+    @staticmethod
+    async def _load_model(db: AsyncSession, path: Path) -> CooccurrenceModel:
+        """The saved model if it is the one the stored neighbors come from, else an empty one."""
+        model = await asyncio.to_thread(CooccurrenceModel.load, path)
+        state = await db.get(RecommendationState, STATE_NAME)
+        if model is not None and state is not None and model.token == state.token:
+            return model
+        if model is not None or state is not None:
+            # Another host ran last, or this file was never committed
+            logger.info("Saved recommendation model is not current, rebuilding it")
+        return CooccurrenceModel()
+
+    @staticmethod
+    async def _write(
+        db: AsyncSession,
+        neighbors: dict[str, list[tuple[str, float]]],
+        model: CooccurrenceModel,
+    ) -> None:
+        """Write neighbors and the state of the model they come from in one transaction."""
+        now = utcnow()
+        rows = [
+            {
+                "movie_id": movie_id,
+                "neighbor_ids": [neighbor_id for neighbor_id, _ in best],
+                "scores": [score for _, score in best],
+                "updated_at": now,
+            }
+            for movie_id, best in neighbors.items()
+        ]
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            statement = insert(MovieNeighbors).values(rows[i:i + UPSERT_BATCH_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=[MovieNeighbors.movie_id],
+                set_={
+                    "neighbor_ids": statement.excluded.neighbor_ids,
+                    "scores": statement.excluded.scores,
+                    "updated_at": statement.excluded.updated_at,
+                },
+            )
+            await db.execute(statement)
+
+        statement = insert(RecommendationState).values(
+            name=STATE_NAME, token=model.token, watermark=model.watermark, updated_at=now
+        )
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[RecommendationState.name],
+                set_={
+                    "token": statement.excluded.token,
+                    "watermark": statement.excluded.watermark,
+                    "updated_at": statement.excluded.updated_at,
+                },
+            )
+        )
+        await db.commit()
+
+    async def update(self) -> int:
+        """
+        Fold new watch history into the model and rewrite changed neighbors.
+
+        Returns:
+            Number of movies whose neighbors were rewritten
+        """
+        async with advisory_lock("recommendations", "cooccurrence"):
+            changed: set[int] = set()
+            async with async_session_maker() as db:
+                # Reloaded every run: another worker may have saved a newer one
+                model = await self._load_model(db, self.path)
+                after_id = model.floor
+                while True:
+                    rows, next_id = await self._new_rows(db, model, after_id)
+                    if next_id == after_id:
+                        break
+                    after_id = next_id
+                    if not rows:
+                        # Only rows counted by an earlier run so far
+                        continue
+                    new_pairs = [(user_id, movie_id) for _, user_id, movie_id in rows]
+                    users = list(dict.fromkeys(user_id for user_id, _ in new_pairs))
+                    previous_pairs = await self._previous_pairs(db, model, users)
+                    changed_rows = await asyncio.to_thread(model.add, new_pairs, previous_pairs)
+                    model.mark_counted(
+                        (history_id for history_id, _, _ in rows),
+                        settings.RECOMMENDATION_RESCAN_IDS,
+                    )
+                    changed.update(changed_rows.tolist())
+
+                if changed:
+                    neighbors = await asyncio.to_thread(
+                        model.top_k,
+                        sorted(changed),
+                        settings.RECOMMENDATION_TOP_K,
+                        settings.RECOMMENDATION_MIN_SHARED_VIEWERS,
+                    )
+                    model.token = uuid.uuid4().hex
+                    await self._write(db, neighbors, model)
+                    # A failed save leaves a file whose token is not current,
+                    # so the next run rebuilds rather than double counting
+                    await asyncio.to_thread(model.save, self.path)
+        return len(changed)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                updated = await self.update()
+                if updated:
+                    logger.info("Updated recommendations of %d movies", updated)
+            except Exception:
+                logger.exception("Updating recommendations failed")
+            await asyncio.sleep(settings.RECOMMENDATION_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        """Start the periodic update."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic update."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+recommendation_job = RecommendationJob()
@@ -0,0 +1,162 @@
+"""Array-backed index of subtitle cues for time lookups."""
+import asyncio
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from app.core.config import settings
+
+TIMING_SEPARATOR = " --> "
+
+
+@dataclass
+class Cue:
+    """One cue, materialized for a response."""
+
+    start: float
+    end: float
+    text: str
+
+
+def parse_timestamp(value: str) -> int:
+    """WebVTT timestamp (HH:MM:SS.mmm or MM:SS.mmm) to milliseconds."""
+    clock, _, millis = value.strip().partition(".")
+    seconds = 0
+    for part in clock.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds * 1000 + int(millis.ljust(3, "0")[:3])
+
+
+class CueIndex:
+    """
+    Cues of one subtitle track, sorted by start time.
+
+    Start and end times are two arrays of milliseconds and all texts are
+    concatenated in one UTF-8 buffer addressed by an offsets array, so a
+    track costs about 20 bytes per cue plus its text, instead of a dict
+    and three objects per cue. Lookups are binary searches on the starts.
+    """
+
+    def __init__(self):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.offsets = array("I", [0])
+        self._text = bytearray()
+        # Longest cue, bounds how far before T a cue covering T can start
+        self.max_duration = 0
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index."""
+        return (
+            self.starts.itemsize * len(self.starts)
+            + self.ends.itemsize * len(self.ends)
+            + self.offsets.itemsize * len(self.offsets)
+            + len(self._text)
+        )
+
+    def _append(self, start: int, end: int, text: str) -> None:
+        self.starts.append(start)
+        self.ends.append(end)
+        self._text += text.encode("utf-8")
+        self.offsets.append(len(self._text))
+        self.max_duration = max(self.max_duration, end - start)
+
+    @classmethod
+    def from_lines(cls, lines: Iterator[str]) -> "CueIndex":
+        """Build an index from the lines of a WebVTT file."""
+        cues: list[tuple[int, int, str]] = []
+        timing: tuple[int, int] | None = None
+        text: list[str] = []
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if TIMING_SEPARATOR in line and timing is None:
+                start, _, end = line.partition(TIMING_SEPARATOR)
+                try:
+                    # Cue settings may follow the end timestamp
+                    timing = (parse_timestamp(start), parse_timestamp(end.split()[0]))
+                except (ValueError, IndexError):
+                    timing = None
+                continue
+            if not line:
+                if timing is not None:
+                    cues.append((*timing, "\n".join(text)))
+                timing, text = None, []
+                continue
+            if timing is not None:
+                text.append(line)
+        if timing is not None:
+            cues.append((*timing, "\n".join(text)))
+
+        index = cls()
+        # Sources are nearly always sorted; a stable sort keeps ties in order
+        cues.sort(key=lambda cue: cue[0])
+        for start, end, cue_text in cues:
+            index._append(start, end, cue_text)
+        return index
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CueIndex":
+        """Parse a WebVTT file (blocking)."""
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return cls.from_lines(f)
+
+    def cue(self, i: int) -> Cue:
+        """Materialize the i-th cue."""
+        text = self._text[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+        return Cue(start=self.starts[i] / 1000, end=self.ends[i] / 1000, text=text)
+
+    def between(self, start: float, end: float) -> list[Cue]:
+        """Cues overlapping the [start, end] interval, in seconds."""
+        start_ms, end_ms = int(start * 1000), int(end * 1000)
+        lo = bisect_left(self.starts, start_ms - self.max_duration)
+        hi = bisect_right(self.starts, end_ms)
+        return [self.cue(i) for i in range(lo, hi) if self.ends[i] > start_ms]
+
+    def at(self, time: float) -> list[Cue]:
+        """Cues displayed at a time, in seconds."""
+        return self.between(time, time)
+
+
+class CueIndexCache:
+    """
+    LRU of the cue indexes of hot subtitle tracks.
+
+    Keyed by subtitle file path; files are content-addressed and never
+    change, so entries need no invalidation. Concurrent loads of the same
+    track share one parse.
+    """
+
+    def __init__(self, max_entries: int | None = None):
+        self.max_entries = max_entries or settings.SUBTITLE_CUE_CACHE_ENTRIES
+        self._indexes: OrderedDict[str, CueIndex] = OrderedDict()
+        self._loading: dict[str, asyncio.Task] = {}
+
+    async def get(self, path: str) -> CueIndex:
+        """Get the index of a WebVTT file, parsing it on a miss."""
+        index = self._indexes.get(path)
+        if index is not None:
+            self._indexes.move_to_end(path)
+            return index
+
+        task = self._loading.get(path)
+        if task is None:
+            task = asyncio.create_task(asyncio.to_thread(CueIndex.load, path))
+            self._loading[path] = task
+            task.add_done_callback(lambda _: self._loading.pop(path, None))
+        index = await asyncio.shield(task)
+
+        self._indexes[path] = index
+        self._indexes.move_to_end(path)
+        while len(self._indexes) > self.max_entries:
+            self._indexes.popitem(last=False)
+        return index
+
+
+cue_indexes = CueIndexCache()
@@ -0,0 +1,7 @@
+class SubtitleNotFoundException(Exception):
+    """Exception raised when no source has a subtitle for a language."""
+    pass
+
+class SubtitleSourceError(Exception):
+    """Exception raised when a subtitle source answers with an error."""
+    pass
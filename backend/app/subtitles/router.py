@@ -0,0 +1,123 @@
+"""Subtitle API routes."""
+import re
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import get_current_active_user
+from app.db.session import get_db
+from app.models.models import User
+from app.models.subtitle import Subtitle
+from app.subtitles.cues import Cue, cue_indexes
+from app.subtitles.schemas import CueResponse, SubtitleFetchRequest, SubtitleResponse
+from app.subtitles.service import SubtitleService, subtitle_fetcher
+from app.subtitles.webvtt import etag, negotiate
+
+router = APIRouter(prefix="/subtitles", tags=["subtitles"])
+
+LANGUAGE_PATTERN = re.compile(r"^[a-z]{2,3}(-[a-z]{2})?$")
+
+
+@router.get("/{movie_id}", response_model=list[SubtitleResponse])
+async def list_subtitles(
+    movie_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> list[Subtitle]:
+    """Get every subtitle track already available for a movie."""
+    return await SubtitleService.get_by_movie_id(db, movie_id)
+
+
+@router.post("/{movie_id}", response_model=list[SubtitleResponse])
+async def fetch_subtitles(
+    movie_id: str,
+    request: SubtitleFetchRequest,
+    current_user: User = Depends(get_current_active_user),
+) -> list[Subtitle]:
+    """
+    Acquire subtitle tracks of a movie in the requested languages.
+
+    Languages already stored are returned as is, the others are fetched
+    concurrently. Languages no source has are left out of the response.
+    """
+    languages = [language.lower() for language in request.languages]
+    invalid = [language for language in languages if not LANGUAGE_PATTERN.match(language)]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid language codes: {', '.join(invalid)}",
+        )
+    return await subtitle_fetcher.fetch(movie_id, languages)
+
+
+async def get_webvtt_variants(
+    movie_id: str, language: str, db: AsyncSession
+) -> tuple[Subtitle, dict]:
+    """Get a subtitle track and its WebVTT variants or raise 404/500."""
+    subtitle = await SubtitleService.get(db, movie_id, language.lower())
+    if subtitle is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Subtitle not found",
+        )
+
+    try:
+        variants = await SubtitleService.webvtt(subtitle)
+    except (OSError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Subtitle conversion failed",
+        )
+    return subtitle, variants
+
+
+@router.get("/{movie_id}/{language}.vtt")
+async def get_webvtt(
+    movie_id: str,
+    language: str,
+    accept_encoding: str | None = Header(None),
+    if_none_match: str | None = Header(None),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Get a subtitle track as WebVTT.
+
+    The track is converted once and stored next to the source with gzip
+    and brotli copies; requests are then served from disk, precompressed
+    for the client, and revalidated with strong ETags.
+    """
+    subtitle, variants = await get_webvtt_variants(movie_id, language, db)
+    encoding = next(e for e in negotiate(accept_encoding) if e in variants)
+    headers = {
+        "ETag": etag(subtitle.file_path, encoding),
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "private, max-age=86400",
+    }
+    if if_none_match and headers["ETag"] in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return FileResponse(variants[encoding], media_type="text/vtt; charset=utf-8", headers=headers)
+
+
+@router.get("/{movie_id}/{language}/cues", response_model=list[CueResponse])
+async def get_cues(
+    movie_id: str,
+    language: str,
+    t: float = Query(..., ge=0, description="Time in seconds"),
+    window: float = Query(0, ge=0, le=600, description="Seconds before and after t"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> list[Cue]:
+    """
+    Get the cues of a subtitle track around a time.
+
+    The track is parsed once into a cue index kept in an LRU, and the
+    lookup is a binary search; with window=0 only the cues on screen at
+    t are returned.
+    """
+    _, variants = await get_webvtt_variants(movie_id, language, db)
+    index = await cue_indexes.get(str(variants["identity"]))
+    return index.between(max(t - window, 0), t + window)
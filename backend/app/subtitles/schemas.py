@@ -0,0 +1,38 @@
+"""Subtitle Pydantic schemas using v2."""
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class SubtitleResponse(BaseModel):
+    """Schema for subtitle response."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    movie_id: str
+    language: str
+    language_name: str
+    source: str
+    created_at: datetime
+
+
+class SubtitleFetchRequest(BaseModel):
+    """Schema for a subtitle acquisition request."""
+
+    languages: list[str] = Field(
+        ...,
+        min_length=1,
+        max_length=10,
+        json_schema_extra={"example": ["en", "fr"]},
+    )
+
+
+class CueResponse(BaseModel):
+    """Schema for one subtitle cue, times in seconds."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    start: float
+    end: float
+    text: str
@@ -0,0 +1,208 @@
+"""Subtitle service layer for business logic."""
+import asyncio
+import logging
+from pathlib import Path
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.models.subtitle import Subtitle
+from app.subtitles.exceptions import SubtitleSourceError
+from app.subtitles.sources import SubtitleSource, configured_sources
+from app.subtitles.storage import SubtitleStore, subtitle_store
+from app.subtitles.webvtt import convert_file, is_converted, variant_paths
+from app.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+LANGUAGE_NAMES = {
+    "ar": "Arabic",
+    "de": "German",
+    "en": "English",
+    "es": "Spanish",
+    "fr": "French",
+    "it": "Italian",
+    "ja": "Japanese",
+    "ko": "Korean",
+    "nl": "Dutch",
+    "pl": "Polish",
+    "pt": "Portuguese",
+    "pt-br": "Portuguese (Brazil)",
+    "ru": "Russian",
+    "tr": "Turkish",
+    "zh-cn": "Chinese (simplified)",
+}
+
+# One acquisition per (movie, language), across requests and workers
+subtitle_jobs = SingleFlight("subtitle")
+# One WebVTT conversion per subtitle file
+webvtt_jobs = SingleFlight("subtitle-vtt")
+
+
+class SubtitleService:
+    """Service layer for subtitle queries."""
+
+    @staticmethod
+    async def get_by_movie_id(db: AsyncSession, movie_id: str) -> list[Subtitle]:
+        """Get every subtitle track of a movie."""
+        result = await db.execute(
+            select(Subtitle).where(Subtitle.movie_id == movie_id).order_by(Subtitle.language)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get(db: AsyncSession, movie_id: str, language: str) -> Subtitle | None:
+        """Get the subtitle track of a movie in a language."""
+        result = await db.execute(
+            select(Subtitle).where(Subtitle.movie_id == movie_id, Subtitle.language == language)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def webvtt(subtitle: Subtitle) -> dict[str, Path]:
+        """
+        Get the WebVTT variants of a subtitle, converting it on first use.
+
+        Returns:
+            Paths of the variants, by content encoding
+        """
+        source = subtitle.file_path
+        if await asyncio.to_thread(is_converted, source):
+            return variant_paths(source)
+
+        def convert_if_missing() -> dict[str, Path]:
+            if is_converted(source):
+                return variant_paths(source)
+            return convert_file(source)
+
+        return await webvtt_jobs.run(
+            Path(source).stem,
+            lambda flight: asyncio.to_thread(convert_if_missing),
+        )
+
+
+class SubtitleFetcher:
+    """
+    Acquires subtitles of a movie in several languages at once.
+
+    Every requested language is fetched concurrently, and for each
+    language every source is queried concurrently under its own timeout;
+    the answer of the most preferred source wins. Files go to the
+    content-addressed store, and concurrent requests for the same
+    (movie, language) share one acquisition.
+    """
+
+    def __init__(
+        self,
+        sources: list[SubtitleSource] | None = None,
+        store: SubtitleStore = subtitle_store,
+    ):
+        self._sources = sources
+        self.store = store
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def sources(self) -> list[SubtitleSource]:
+        if self._sources is None:
+            self._sources = configured_sources()
+        return self._sources
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Shared by every flight: a flight outlives the request that started it
+        if self._client is None:
+            self._client = httpx.AsyncClient(follow_redirects=True)
+        return self._client
+
+    async def _try_source(
+        self, source: SubtitleSource, movie_id: str, language: str
+    ) -> bytes | None:
+        try:
+            data = await asyncio.wait_for(
+                source.fetch(self.client, movie_id, language), source.timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("%s timed out for %s (%s)", source.name, movie_id, language)
+            return None
+        except (httpx.HTTPError, SubtitleSourceError, ValueError) as e:
+            logger.warning("%s failed for %s (%s): %s", source.name, movie_id, language, e)
+            return None
+        if data and len(data) > settings.SUBTITLE_MAX_BYTES:
+            logger.warning("%s returned an oversized file for %s", source.name, movie_id)
+            return None
+        return data
+
+    async def _from_sources(
+        self, movie_id: str, language: str
+    ) -> tuple[SubtitleSource, bytes] | None:
+        results = await asyncio.gather(
+            *(self._try_source(source, movie_id, language) for source in self.sources)
+        )
+        for source, data in zip(self.sources, results):
+            if data:
+                return source, data
+        return None
+
+    async def acquire(self, movie_id: str, language: str) -> Subtitle | None:
+        """
+        Get a subtitle track, fetching and storing it if needed.
+
+        Runs under subtitle_jobs, so the track is looked up again first in
+        case another worker stored it while this one waited for the lock.
+        No pooled connection is held while the sources are queried.
+        """
+        async with async_session_maker() as db:
+            subtitle = await SubtitleService.get(db, movie_id, language)
+        if subtitle is not None:
+            return subtitle
+
+        found = await self._from_sources(movie_id, language)
+        if found is None:
+            return None
+        source, data = found
+        path = await asyncio.to_thread(self.store.put, data)
+
+        async with async_session_maker() as db:
+            statement = insert(Subtitle).values(
+                movie_id=movie_id,
+                language=language,
+                language_name=LANGUAGE_NAMES.get(language, language),
+                file_path=str(path),
+                source=source.name,
+            )
+            await db.execute(statement.on_conflict_do_nothing(constraint="movie_language_uc"))
+            await db.commit()
+            return await SubtitleService.get(db, movie_id, language)
+
+    async def fetch(self, movie_id: str, languages: list[str]) -> list[Subtitle]:
+        """
+        Acquire the tracks of several languages concurrently, return those found.
+
+        Each language holds an advisory lock connection while it runs, so
+        at most ADVISORY_LOCKS_MAX_HELD of them run at once per worker and
+        the others wait for a slot without touching the pool.
+        """
+        results = await asyncio.gather(
+            *(
+                subtitle_jobs.run(
+                    f"{movie_id}:{language}",
+                    lambda flight, language=language: self.acquire(movie_id, language),
+                )
+                for language in dict.fromkeys(languages)
+            ),
+            return_exceptions=True,
+        )
+        return [result for result in results if isinstance(result, Subtitle)]
+
+    async def stop(self) -> None:
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+subtitle_fetcher = SubtitleFetcher()
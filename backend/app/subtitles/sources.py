@@ -0,0 +1,116 @@
+"""Remote subtitle providers."""
+from abc import ABC, abstractmethod
+
+import httpx
+
+from app.core.config import settings
+from app.subtitles.exceptions import SubtitleSourceError
+
+
+class SubtitleSource(ABC):
+    """
+    A provider of subtitle files.
+
+    Each source has its own timeout; a slow provider only delays its own
+    answer, never the other sources queried for the same language.
+    """
+
+    name: str = "unknown"
+
+    def __init__(self, timeout: float | None = None):
+        self.timeout = timeout or settings.SUBTITLE_SOURCE_TIMEOUT_SECONDS
+
+    @abstractmethod
+    async def fetch(self, client: httpx.AsyncClient, movie_id: str, language: str) -> bytes | None:
+        """
+        Download the best subtitle of a movie in a language.
+
+        Returns:
+            The subtitle file, or None if the source has none
+
+        Raises:
+            SubtitleSourceError: If the source answers with an error
+            httpx.HTTPError: If the source cannot be reached
+        """
+
+
+class OpenSubtitlesSource(SubtitleSource):
+    """
+    OpenSubtitles REST API: search by IMDb id, then download the most
+    downloaded match. The base URL is configurable so a local stand-in
+    server can replace the real API.
+    """
+
+    name = "opensubtitles"
+
+    def __init__(
+        self,
+        api_url: str | None = None,
+        api_key: str | None = None,
+        timeout: float | None = None,
+    ):
+        super().__init__(timeout)
+        self.api_url = (api_url or settings.OPENSUBTITLES_API_URL).rstrip("/")
+        self.api_key = api_key if api_key is not None else settings.OPENSUBTITLES_API_KEY
+
+    @property
+    def headers(self) -> dict:
+        return {
+            "Api-Key": self.api_key or "",
+            "User-Agent": settings.OPENSUBTITLES_USER_AGENT,
+            "Accept": "application/json",
+        }
+
+    @staticmethod
+    def imdb_number(movie_id: str) -> str | None:
+        """IMDb numeric id expected by the API ("tt0111161" -> "111161")."""
+        number = movie_id.removeprefix("tt").lstrip("0")
+        return number if number.isdigit() else None
+
+    async def fetch(self, client: httpx.AsyncClient, movie_id: str, language: str) -> bytes | None:
+        imdb_id = self.imdb_number(movie_id)
+        if imdb_id is None:
+            return None
+
+        response = await client.get(
+            f"{self.api_url}/subtitles",
+            params={"imdb_id": imdb_id, "languages": language, "order_by": "download_count"},
+            headers=self.headers,
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            raise SubtitleSourceError(f"{self.name} search failed: {response.status_code}")
+
+        file_id = None
+        for result in response.json().get("data", []):
+            files = result.get("attributes", {}).get("files", [])
+            if files:
+                file_id = files[0].get("file_id")
+                break
+        if file_id is None:
+            return None
+
+        response = await client.post(
+            f"{self.api_url}/download",
+            json={"file_id": file_id, "sub_format": "srt"},
+            headers=self.headers,
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            raise SubtitleSourceError(f"{self.name} download failed: {response.status_code}")
+        link = response.json().get("link")
+        if not link:
+            return None
+
+        response = await client.get(link, timeout=self.timeout)
+        if response.status_code != 200:
+            raise SubtitleSourceError(f"{self.name} file failed: {response.status_code}")
+        return response.content
+
+
+def configured_sources() -> list[SubtitleSource]:
+    """Sources enabled by the settings, in order of preference."""
+    sources: list[SubtitleSource] = []
+    if settings.OPENSUBTITLES_API_KEY:
+        sources.append(OpenSubtitlesSource())
+    return sources
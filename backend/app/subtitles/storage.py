@@ -0,0 +1,39 @@
+"""Content-addressed store of subtitle files."""
+import hashlib
+import os
+from pathlib import Path
+
+from app.core.config import settings
+
+
+class SubtitleStore:
+    """
+    Subtitle files named after the SHA-256 of their content.
+
+    The same release subtitle is often returned for several movies or
+    languages (and by several sources); it is written to disk once, and
+    storing a file that already exists is a no-op.
+    """
+
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root or settings.SUBTITLE_ROOT)
+
+    def path_for(self, digest: str, extension: str = "srt") -> Path:
+        """Where a file with a given digest lives (fanned out by prefix)."""
+        return self.root / digest[:2] / f"{digest}.{extension}"
+
+    def put(self, data: bytes, extension: str = "srt") -> Path:
+        """Store a file and return its path (blocking, run in a thread)."""
+        path = self.path_for(hashlib.sha256(data).hexdigest(), extension)
+        if path.exists():
+            return path
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
+
+
+subtitle_store = SubtitleStore()
@@ -0,0 +1,265 @@
+"""Streaming SRT to WebVTT conversion with precompressed variants."""
+import codecs
+import gzip
+import os
+import re
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# Bumped whenever the output of the converter changes, so ETags change too
+CONVERTER_VERSION = "vtt2"
+READ_SIZE = 64 * 1024
+
+# Encodings tried, in order, on files without a byte order mark
+FALLBACK_ENCODINGS = ("utf-8", "cp1252")
+
+_TIMING = re.compile(
+    r"^\s*(\d{1,2}:)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*"
+    r"(\d{1,2}:)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})"
+)
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Guess the encoding of a subtitle file from its first bytes.
+
+    A byte order mark wins; otherwise the sample must decode as UTF-8
+    (a multi-byte character cut at the end of the sample is allowed),
+    and anything else is taken as Windows-1252, the usual encoding of
+    Western European SRT files.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return FALLBACK_ENCODINGS[-1]
+
+
+def _timestamp(hours: str | None, minutes: str, seconds: str, millis: str) -> str:
+    hours = hours[:-1] if hours else "0"
+    return f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}.{millis.ljust(3, '0')}"
+
+
+def convert_timing(line: str) -> str | None:
+    """Rewrite an SRT timing line as WebVTT, or None if it is not one."""
+    match = _TIMING.match(line)
+    if match is None:
+        return None
+    groups = match.groups()
+    return f"{_timestamp(*groups[:4])} --> {_timestamp(*groups[4:])}"
+
+
+def decode_lines(chunks: Iterator[bytes], encoding: str | None = None) -> Iterator[str]:
+    """
+    Decode a byte stream into lines without line endings (CRLF, CR or LF).
+
+    Unless given, the encoding is detected on the first chunk. A guess
+    made without a byte order mark is decoded strictly, since only the
+    first chunk backed it; the last fallback encoding and byte order
+    marks replace undecodable bytes rather than failing the whole file.
+
+    Raises:
+        UnicodeDecodeError: If a guessed encoding fails further on; the
+            caller restarts with FALLBACK_ENCODINGS[-1]
+    """
+    decoder = None
+    pending = ""
+    for chunk in chunks:
+        if decoder is None:
+            if encoding is None:
+                encoding = detect_encoding(chunk)
+                guessed = encoding in FALLBACK_ENCODINGS[:-1]
+            else:
+                guessed = False
+            errors = "strict" if guessed else "replace"
+            decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        text = pending + decoder.decode(chunk)
+        # A trailing CR may be the first half of a CRLF split across chunks
+        text = text.replace("\r\n", "\n")
+        if text.endswith("\r"):
+            text, pending = text[:-1], "\r"
+        else:
+            pending = ""
+        lines = text.replace("\r", "\n").split("\n")
+        pending = lines.pop() + pending
+        yield from lines
+    if decoder is not None:
+        pending += decoder.decode(b"", final=True)
+    pending = pending.replace("\r", "")
+    if pending:
+        yield pending
+
+
+def srt_to_vtt_lines(lines: Iterator[str]) -> Iterator[str]:
+    """
+    Convert SRT lines to WebVTT lines, one line of lookahead at most.
+
+    Numeric cue counters are dropped, even when no timing follows them,
+    timings get a dot before the milliseconds and "-->" inside cue text,
+    which would end the cue, is neutralized.
+    """
+    yield "WEBVTT"
+    yield ""
+    counter: str | None = None
+    in_cue = False
+    for line in lines:
+        line = line.replace("\x00", "").rstrip()
+        if counter is not None:
+            timing = convert_timing(line)
+            if timing is not None:
+                yield timing
+                in_cue = True
+                counter = None
+                continue
+            # A lone number outside a cue with no timing after it is stray
+            # text, which is not valid WebVTT
+            counter = None
+
+        if not line:
+            if in_cue:
+                yield ""
+            in_cue = False
+            continue
+        if not in_cue:
+            if line.isdigit():
+                counter = line
+                continue
+            timing = convert_timing(line)
+            if timing is None:
+                # Stray text between cues is not valid WebVTT
+                continue
+            yield timing
+            in_cue = True
+            continue
+        yield line.replace("-->", "->")
+
+    if in_cue:
+        yield ""
+
+
+def read_chunks(path: str | Path) -> Iterator[bytes]:
+    """Read a file in fixed size chunks."""
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_SIZE):
+            yield chunk
+
+
+def variant_paths(source: str | Path) -> dict[str, Path]:
+    """
+    Paths of the WebVTT file and its precompressed variants, by encoding.
+
+    Names carry CONVERTER_VERSION ("<sha>.vtt2.vtt"), so outputs of an
+    older converter are never taken for current ones.
+    """
+    vtt = Path(source).with_suffix(f".{CONVERTER_VERSION}.vtt")
+    paths = {"identity": vtt, "gzip": vtt.with_name(vtt.name + ".gz")}
+    if brotli is not None:
+        paths["br"] = vtt.with_name(vtt.name + ".br")
+    return paths
+
+
+def etag(source: str | Path, encoding: str) -> str:
+    """
+    Strong ETag of a variant.
+
+    Subtitle files are named after the SHA-256 of their content, so the
+    source name and the converter version identify the output exactly.
+    """
+    suffix = "" if encoding == "identity" else f"-{encoding}"
+    return f'"{Path(source).stem}-{CONVERTER_VERSION}{suffix}"'
+
+
+def convert_file(source: str | Path) -> dict[str, Path]:
+    """
+    Convert an SRT file to WebVTT plus gzip and brotli copies (blocking).
+
+    The source is read and every output written in a single streaming
+    pass, so memory use does not depend on the file size. Outputs are
+    written to temporary files and renamed once all are complete.
+
+    Returns:
+        Paths of the variants, by content encoding
+    """
+    paths = variant_paths(source)
+    tmp_paths = {
+        encoding: path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        for encoding, path in paths.items()
+    }
+    try:
+        try:
+            _write_variants(source, tmp_paths)
+        except UnicodeDecodeError:
+            # The start of the file decoded as UTF-8 but a later part did
+            # not: convert the whole file again with the fallback encoding
+            _write_variants(source, tmp_paths, FALLBACK_ENCODINGS[-1])
+        for encoding, tmp_path in tmp_paths.items():
+            os.replace(tmp_path, paths[encoding])
+    finally:
+        for tmp_path in tmp_paths.values():
+            tmp_path.unlink(missing_ok=True)
+    _remove_stale_variants(source, paths)
+    return paths
+
+
+def _remove_stale_variants(source: str | Path, current: dict[str, Path]) -> None:
+    """Delete the outputs of older converter versions of a source."""
+    source = Path(source)
+    keep = set(current.values())
+    for pattern in (f"{source.stem}.vtt*", f"{source.stem}.*.vtt*"):
+        for path in source.parent.glob(pattern):
+            if path not in keep:
+                path.unlink(missing_ok=True)
+
+
+def _write_variants(
+    source: str | Path, tmp_paths: dict[str, Path], encoding: str | None = None
+) -> None:
+    """Write the WebVTT file and its compressed copies in one pass."""
+    compressor = brotli.Compressor(mode=brotli.MODE_TEXT) if brotli is not None else None
+    with open(tmp_paths["identity"], "wb") as vtt, open(tmp_paths["gzip"], "wb") as gz_raw:
+        br = open(tmp_paths["br"], "wb") if compressor is not None else None
+        try:
+            with gzip.GzipFile(fileobj=gz_raw, mode="wb", compresslevel=9, mtime=0) as gz:
+                for line in srt_to_vtt_lines(decode_lines(read_chunks(source), encoding)):
+                    data = (line + "\n").encode("utf-8")
+                    vtt.write(data)
+                    gz.write(data)
+                    if br is not None:
+                        br.write(compressor.process(data))
+            if br is not None:
+                br.write(compressor.finish())
+        finally:
+            if br is not None:
+                br.close()
+
+
+def is_converted(source: str | Path) -> bool:
+    """Check if every variant of a source already exists."""
+    return all(path.exists() for path in variant_paths(source).values())
+
+
+def negotiate(accept_encoding: str | None) -> list[str]:
+    """Content encodings to try for an Accept-Encoding header, best first."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    encodings = [e for e in ("br", "gzip") if e in accepted or "*" in accepted]
+    return encodings + ["identity"]
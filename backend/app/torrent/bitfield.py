@@ -0,0 +1,145 @@
+"""Compact bitfield of completed pieces, persisted next to the download."""
+import os
+import struct
+from pathlib import Path
+
+MAGIC = b"HTB2"
+HEADER = struct.Struct(">4sI20sQ")  # magic, piece count, info-hash, file size
+
+
+def sidecar_path(file_path: str | Path) -> Path:
+    """Where the bitfield of a download is stored."""
+    path = Path(file_path)
+    return path.with_name(path.name + ".bitfield")
+
+
+class Bitfield:
+    """
+    One bit per piece, most significant bit first as on the BitTorrent wire.
+
+    A 4 GiB movie in 1 MiB pieces is 512 bytes, so loading it at startup is
+    instant compared with re-hashing the partial file. The info-hash and
+    size of the torrent are saved with it, so a sidecar is never trusted
+    for another torrent that happens to have as many pieces.
+    """
+
+    def __init__(
+        self,
+        piece_count: int,
+        data: bytes | bytearray | None = None,
+        info_hash: bytes = b"",
+        file_size: int = 0,
+    ):
+        size = (piece_count + 7) // 8
+        if data is not None and len(data) != size:
+            raise ValueError(f"Expected {size} bytes for {piece_count} pieces, got {len(data)}")
+        if len(info_hash) not in (0, 20):
+            raise ValueError(f"Expected a 20 byte info-hash, got {len(info_hash)} bytes")
+        self.piece_count = piece_count
+        self.info_hash = info_hash
+        self.file_size = file_size
+        self._bits = bytearray(data) if data is not None else bytearray(size)
+        self.dirty = False
+
+    def matches(self, info_hash: bytes, file_size: int, piece_count: int) -> bool:
+        """Check that the bitfield belongs to a torrent."""
+        return (
+            self.info_hash == info_hash
+            and self.file_size == file_size
+            and self.piece_count == piece_count
+        )
+
+    def copy(self) -> "Bitfield":
+        """Independent snapshot, e.g. to save while downloading goes on."""
+        return Bitfield(self.piece_count, self.to_bytes(), self.info_hash, self.file_size)
+
+    @classmethod
+    def from_flags(
+        cls, flags: list[bool], info_hash: bytes = b"", file_size: int = 0
+    ) -> "Bitfield":
+        """Build a bitfield from a list of per piece flags (e.g. a recheck)."""
+        bitfield = cls(len(flags), info_hash=info_hash, file_size=file_size)
+        for index, valid in enumerate(flags):
+            if valid:
+                bitfield.set(index)
+        bitfield.dirty = False
+        return bitfield
+
+    def _check(self, index: int) -> None:
+        if not 0 <= index < self.piece_count:
+            raise IndexError(f"Piece {index} out of range 0..{self.piece_count - 1}")
+
+    def has(self, index: int) -> bool:
+        """Check if a piece is complete."""
+        self._check(index)
+        return bool(self._bits[index >> 3] & (0x80 >> (index & 7)))
+
+    def set(self, index: int) -> None:
+        """Mark a piece complete."""
+        self._check(index)
+        mask = 0x80 >> (index & 7)
+        if not self._bits[index >> 3] & mask:
+            self._bits[index >> 3] |= mask
+            self.dirty = True
+
+    def count(self) -> int:
+        """Number of complete pieces."""
+        return int.from_bytes(self._bits, "big").bit_count()
+
+    @property
+    def is_complete(self) -> bool:
+        return self.count() == self.piece_count
+
+    @property
+    def percent(self) -> int:
+        """Completion as an integer percentage, as stored in Video.progress."""
+        if not self.piece_count:
+            return 100
+        return self.count() * 100 // self.piece_count
+
+    def missing(self) -> list[int]:
+        """Indexes of pieces still to download, in order."""
+        missing = []
+        for byte_index, byte in enumerate(self._bits):
+            if byte == 0xFF:
+                continue
+            base = byte_index << 3
+            for bit in range(8):
+                index = base + bit
+                if index < self.piece_count and not byte & (0x80 >> bit):
+                    missing.append(index)
+        return missing
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits)
+
+    def save(self, path: str | Path) -> None:
+        """Atomically write the bitfield to disk."""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.piece_count, self.info_hash.ljust(20, b"\0"), self.file_size))
+            f.write(self._bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Bitfield | None":
+        """Read a saved bitfield, or None if missing, corrupt or of an older format."""
+        try:
+            raw = Path(path).read_bytes()
+        except FileNotFoundError:
+            return None
+        if len(raw) < HEADER.size:
+            return None
+        magic, piece_count, info_hash, file_size = HEADER.unpack_from(raw)
+        if magic != MAGIC:
+            return None
+        if info_hash == bytes(20):
+            info_hash = b""
+        try:
+            return cls(piece_count, raw[HEADER.size:], info_hash, file_size)
+        except ValueError:
+            return None
@@ -0,0 +1,201 @@
+"""Resuming interrupted downloads from persisted bitfields."""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.models.video import StatusType, Video
+from app.torrent.bitfield import Bitfield, sidecar_path
+from app.torrent.storage import PieceWriter
+from app.torrent.verify import PieceVerifier
+from app.videos.progress import progress_hub
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrackedDownload:
+    """A download whose bitfield is checkpointed."""
+
+    file_path: Path
+    bitfield: Bitfield
+    # Writer of the data file, once the download is running in this worker
+    writer: PieceWriter | None = None
+
+    @property
+    def sidecar(self) -> Path:
+        return sidecar_path(self.file_path)
+
+
+def sync_file(path: Path) -> None:
+    """Force the data of a file to disk (blocking)."""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fdatasync(fd)
+    finally:
+        os.close(fd)
+
+
+class ResumeTracker:
+    """
+    Completed-piece bitfields of every download of this worker.
+
+    Bitfields live in memory while downloading and are checkpointed to
+    their sidecar file every TORRENT_BITFIELD_CHECKPOINT_SECONDS (only if
+    changed) and on shutdown. The piece data is forced to disk before the
+    bitfield that marks it complete, so a crash can lose the last interval,
+    which only means re-downloading those pieces, but never leaves a
+    sidecar vouching for bytes that were not written.
+    """
+
+    def __init__(self):
+        self.bitfields: dict[str, TrackedDownload] = {}
+        self._task: asyncio.Task | None = None
+
+    def track(
+        self,
+        movie_id: str,
+        file_path: str,
+        bitfield: Bitfield,
+        writer: PieceWriter | None = None,
+    ) -> None:
+        """Start checkpointing the bitfield of a download."""
+        self.bitfields[movie_id] = TrackedDownload(Path(file_path), bitfield, writer)
+
+    def get(self, movie_id: str) -> Bitfield | None:
+        entry = self.bitfields.get(movie_id)
+        return entry.bitfield if entry else None
+
+    async def load_or_recheck(
+        self,
+        movie_id: str,
+        file_path: str,
+        info_hash: bytes,
+        file_size: int,
+        piece_length: int,
+        piece_hashes: Sequence[bytes],
+        verifier: PieceVerifier,
+        writer: PieceWriter | None = None,
+    ) -> Bitfield:
+        """
+        Bitfield of a download being (re)started.
+
+        The saved sidecar is used when it was written for this torrent
+        (same info-hash, size and piece count); otherwise the partial file
+        is rechecked in full.
+        """
+        bitfield = await asyncio.to_thread(Bitfield.load, sidecar_path(file_path))
+        if bitfield is None or not bitfield.matches(info_hash, file_size, len(piece_hashes)):
+            logger.info("No usable bitfield for %s, rechecking %s", movie_id, file_path)
+            flags = await verifier.recheck_file(file_path, piece_length, piece_hashes)
+            bitfield = Bitfield.from_flags(flags, info_hash, file_size)
+            await asyncio.to_thread(bitfield.save, sidecar_path(file_path))
+        self.track(movie_id, file_path, bitfield, writer)
+        return bitfield
+
+    def finish(self, movie_id: str) -> None:
+        """Stop tracking a completed download and drop its sidecar."""
+        entry = self.bitfields.pop(movie_id, None)
+        if entry:
+            entry.sidecar.unlink(missing_ok=True)
+
+    async def resume_downloads(self) -> int:
+        """
+        Load the bitfield of every video left DOWNLOADING by a restart.
+
+        Returns:
+            Number of downloads whose state was restored without hashing
+        """
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(Video.movie_id, Video.file_path).where(
+                    Video.status == StatusType.DOWNLOADING
+                )
+            )
+            rows = result.all()
+
+        restored = 0
+        for movie_id, file_path in rows:
+            bitfield = await asyncio.to_thread(Bitfield.load, sidecar_path(file_path))
+            if bitfield is None:
+                logger.warning("Download %s has no bitfield, it will be rechecked", movie_id)
+                continue
+            try:
+                size = os.stat(file_path).st_size
+            except FileNotFoundError:
+                size = None
+            if size != bitfield.file_size:
+                # The info-hash is checked once the torrent is loaded again
+                logger.warning(
+                    "Bitfield of %s does not match its file, it will be rechecked", movie_id
+                )
+                continue
+            self.track(movie_id, file_path, bitfield)
+            progress_hub.report(movie_id, StatusType.DOWNLOADING, bitfield.percent)
+            restored += 1
+        logger.info("Restored %d of %d interrupted downloads", restored, len(rows))
+        return restored
+
+    async def _checkpoint_one(self, entry: TrackedDownload, snapshot: Bitfield) -> None:
+        # Data first: the bitfield must never mark pieces whose bytes are
+        # still only in the page cache
+        if entry.writer is not None:
+            await entry.writer.flush(sync=True)
+        else:
+            await asyncio.to_thread(sync_file, entry.file_path)
+        await asyncio.to_thread(snapshot.save, entry.sidecar)
+
+    async def checkpoint(self) -> None:
+        """Persist every bitfield that changed since the last checkpoint."""
+        # Snapshot on the event loop so pieces completed during the write
+        # keep their bitfield dirty for the next checkpoint
+        snapshots = []
+        for entry in self.bitfields.values():
+            if entry.bitfield.dirty:
+                snapshots.append((entry, entry.bitfield.copy()))
+                entry.bitfield.dirty = False
+        for entry, snapshot in snapshots:
+            try:
+                await self._checkpoint_one(entry, snapshot)
+            except Exception:
+                # One failing disk must not keep the other downloads from
+                # their checkpoint; this one is retried at the next
+                entry.bitfield.dirty = True
+                logger.exception("Checkpointing %s failed", entry.file_path)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.TORRENT_BITFIELD_CHECKPOINT_SECONDS)
+            try:
+                await self.checkpoint()
+            except Exception:
+                logger.exception("Bitfield checkpoint failed")
+
+    async def start(self) -> None:
+        """Restore interrupted downloads and start checkpointing."""
+        try:
+            await self.resume_downloads()
+        except Exception:
+            logger.exception("Restoring interrupted downloads failed")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop checkpointing and persist the final state."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.checkpoint()
+
+
+resume_tracker = ResumeTracker()
@@ -0,0 +1,355 @@
+"""Fair-share bandwidth and peer slots across downloads, piece requests within one."""
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Hashable
+
+from app.core.config import settings
+from app.torrent.bitfield import Bitfield
+
+# A download whose playhead is about to run dry weighs up to 1 + URGENCY_BOOST
+# times as much as one with a full buffer
+URGENCY_BOOST = 3.0
+
+
+@dataclass
+class DownloadDemand:
+    """What one active download needs from the shared link."""
+
+    movie_id: str
+    viewers: int = 0
+    # Seconds of downloaded media ahead of the furthest-behind playhead,
+    # None when nobody is watching yet
+    buffer_seconds: float | None = None
+    # Throughput the swarm can currently deliver, None if unknown
+    max_rate: float | None = None
+    # Peers known in the swarm; more connection slots would be wasted
+    swarm_peers: int | None = None
+
+    @property
+    def weight(self) -> float:
+        """Share weight: more viewers and a shorter buffer mean a larger share."""
+        urgency = 1.0
+        if self.buffer_seconds is not None:
+            target = settings.TORRENT_TARGET_BUFFER_SECONDS
+            urgency += URGENCY_BOOST * max(0.0, 1.0 - self.buffer_seconds / target)
+        return (1 + self.viewers) * urgency
+
+
+@dataclass
+class Allocation:
+    """Share of the global caps granted to one download."""
+
+    rate: float | None  # bytes per second, None when unlimited
+    peer_slots: int
+
+
+def water_fill(
+    total: float, weights: dict[str, float], caps: dict[str, float | None]
+) -> dict[str, float]:
+    """
+    Weighted max-min fair split of `total`.
+
+    Each key gets total * weight / sum(weights), except keys capped below
+    that share, whose surplus is redistributed among the others.
+    """
+    shares = {key: 0.0 for key in weights}
+    active = {key for key, weight in weights.items() if weight > 0}
+    remaining = float(total)
+
+    while active and remaining > 1e-9:
+        weight_sum = sum(weights[key] for key in active)
+        capped = [
+            key
+            for key in active
+            if caps.get(key) is not None
+            and caps[key] - shares[key] <= remaining * weights[key] / weight_sum
+        ]
+        if not capped:
+            for key in active:
+                shares[key] += remaining * weights[key] / weight_sum
+            break
+        for key in capped:
+            remaining -= caps[key] - shares[key]
+            shares[key] = caps[key]
+            active.discard(key)
+    return shares
+
+
+def apportion(total: int, shares: dict[str, float]) -> dict[str, int]:
+    """Round float shares to integers summing to at most `total` (largest remainder)."""
+    floors = {key: math.floor(share) for key, share in shares.items()}
+    left = total - sum(floors.values())
+    by_remainder = sorted(shares, key=lambda key: (floors[key] - shares[key], key))
+    for key in by_remainder[:max(0, left)]:
+        if shares[key] > floors[key]:
+            floors[key] += 1
+    return floors
+
+
+class TokenBucket:
+    """Rate limiter that hands out waiting times instead of sleeping itself."""
+
+    def __init__(self, rate: float | None, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.rate = rate
+        self._tokens = 0.0
+        self._updated = clock()
+
+    @property
+    def burst(self) -> float:
+        # One second worth of data smooths over per-request jitter
+        return self.rate or 0.0
+
+    def _refill(self) -> None:
+        now = self.clock()
+        if self.rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float | None) -> None:
+        self._refill()
+        self.rate = rate
+
+    def reserve(self, nbytes: int) -> float:
+        """Take `nbytes` of tokens, return how long the caller must wait."""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        self._tokens -= nbytes
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class DownloadScheduler:
+    """
+    Splits the global download rate and peer connections across downloads.
+
+    Downloads report their demand through update(); every change
+    re-balances the allocations, weighted by viewers and by how close each
+    buffer is to its playhead. Capacity a swarm cannot use is handed to
+    the others. The clock is injectable so a simulated swarm can drive the
+    scheduler deterministically.
+    """
+
+    def __init__(
+        self,
+        max_rate: float | None = None,
+        max_peers: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_rate = max_rate if max_rate is not None else settings.TORRENT_MAX_DOWNLOAD_RATE
+        self.max_peers = max_peers if max_peers is not None else settings.TORRENT_MAX_PEER_CONNECTIONS
+        self.clock = clock
+        self.demands: dict[str, DownloadDemand] = {}
+        self.allocations: dict[str, Allocation] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def update(self, demand: DownloadDemand) -> Allocation:
+        """Register or refresh the demand of a download."""
+        self.demands[demand.movie_id] = demand
+        self.rebalance()
+        return self.allocations[demand.movie_id]
+
+    def remove(self, movie_id: str) -> None:
+        """Forget a finished or cancelled download."""
+        self.demands.pop(movie_id, None)
+        self._buckets.pop(movie_id, None)
+        self.allocations.pop(movie_id, None)
+        self.rebalance()
+
+    def rebalance(self) -> None:
+        """Recompute every allocation from the current demands."""
+        weights = {key: demand.weight for key, demand in self.demands.items()}
+
+        if self.max_rate:
+            rate_caps = {key: demand.max_rate for key, demand in self.demands.items()}
+            rates: dict[str, float | None] = dict(water_fill(self.max_rate, weights, rate_caps))
+        else:
+            rates = {key: None for key in self.demands}
+
+        # Every download keeps at least one connection while slots remain
+        slots = {key: 0 for key in self.demands}
+        spare = self.max_peers
+        for key in sorted(self.demands, key=lambda k: -weights[k]):
+            if spare <= 0:
+                break
+            if self.demands[key].swarm_peers != 0:
+                slots[key] = 1
+                spare -= 1
+        peer_caps = {
+            key: (None if demand.swarm_peers is None else max(0, demand.swarm_peers - slots[key]))
+            for key, demand in self.demands.items()
+        }
+        extra = apportion(spare, water_fill(spare, weights, peer_caps))
+
+        self.allocations = {}
+        for key in self.demands:
+            self.allocations[key] = Allocation(rate=rates[key], peer_slots=slots[key] + extra[key])
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = TokenBucket(rates[key], clock=self.clock)
+            else:
+                bucket.set_rate(rates[key])
+
+    def reserve(self, movie_id: str, nbytes: int) -> float:
+        """Account for `nbytes` received, return the delay before reading more."""
+        bucket = self._buckets.get(movie_id)
+        return bucket.reserve(nbytes) if bucket else 0.0
+
+    async def throttle(self, movie_id: str, nbytes: int) -> None:
+        """Wait until a download may read `nbytes` more from its peers."""
+        delay = self.reserve(movie_id, nbytes)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class PeerState:
+    """What the picker knows about one connected peer."""
+
+    pieces: set[int] = field(default_factory=set)
+    # Peers start choked: nothing may be requested before an unchoke
+    choked: bool = True
+    requested: set[int] = field(default_factory=set)
+
+
+class PiecePicker:
+    """
+    Chooses which pieces of one download to request from which peer.
+
+    Pieces are requested rarest first, counted over the connected peers,
+    with ties broken by a seeded RNG so peers do not all converge on the
+    same piece. At most `pipeline` requests are outstanding per peer, and
+    each missing piece is normally requested from a single peer.
+
+    A choke discards the peer's outstanding requests, as the peer will
+    not answer them, and returns them to the pool. Once every missing
+    piece is outstanding the download is in endgame: idle peers request
+    pieces already in flight elsewhere, and the first copy to arrive
+    yields cancels for the duplicates. Every method returns what to send,
+    the caller owns the connections.
+    """
+
+    def __init__(self, have: Bitfield, pipeline: int = 5, rng: random.Random | None = None):
+        self.have = have
+        self.pipeline = pipeline
+        self.rng = rng or random.Random()
+        self.availability = [0] * have.piece_count
+        self.peers: dict[Hashable, PeerState] = {}
+        # Piece -> peers it is requested from
+        self.requested: dict[int, set[Hashable]] = {}
+        self._missing = set(have.missing())
+
+    @property
+    def endgame(self) -> bool:
+        """Check if every missing piece already has a request in flight."""
+        return bool(self._missing) and all(self.requested.get(i) for i in self._missing)
+
+    @property
+    def is_complete(self) -> bool:
+        return not self._missing
+
+    def add_peer(self, peer_id: Hashable, pieces: Bitfield | None = None) -> None:
+        """Register a peer and the pieces of its bitfield message."""
+        self.peers.setdefault(peer_id, PeerState())
+        if pieces is not None:
+            for index in range(pieces.piece_count):
+                if pieces.has(index):
+                    self.on_have(peer_id, index)
+
+    def on_have(self, peer_id: Hashable, index: int) -> None:
+        """A peer announced a piece."""
+        peer = self.peers[peer_id]
+        if index not in peer.pieces:
+            peer.pieces.add(index)
+            self.availability[index] += 1
+
+    def _release(self, peer_id: Hashable, peer: PeerState) -> list[int]:
+        released = sorted(peer.requested)
+        for index in released:
+            holders = self.requested.get(index)
+            if holders is not None:
+                holders.discard(peer_id)
+                if not holders:
+                    del self.requested[index]
+        peer.requested.clear()
+        return released
+
+    def remove_peer(self, peer_id: Hashable) -> list[int]:
+        """Forget a disconnected peer, return its requests put back in the pool."""
+        peer = self.peers.pop(peer_id, None)
+        if peer is None:
+            return []
+        for index in peer.pieces:
+            self.availability[index] -= 1
+        return self._release(peer_id, peer)
+
+    def on_choke(self, peer_id: Hashable) -> list[int]:
+        """A peer choked us, return its discarded requests put back in the pool."""
+        peer = self.peers[peer_id]
+        peer.choked = True
+        return self._release(peer_id, peer)
+
+    def on_unchoke(self, peer_id: Hashable) -> list[int]:
+        """A peer unchoked us, return the pieces to request from it now."""
+        self.peers[peer_id].choked = False
+        return self.next_requests(peer_id)
+
+    def _rarest(self, candidates: set[int], count: int) -> list[int]:
+        # Random tie-break first, then a stable sort by availability
+        ordered = sorted(candidates)
+        self.rng.shuffle(ordered)
+        ordered.sort(key=lambda index: self.availability[index])
+        return ordered[:count]
+
+    def next_requests(self, peer_id: Hashable) -> list[int]:
+        """Pieces to request from a peer now, rarest first, and record them."""
+        peer = self.peers[peer_id]
+        room = self.pipeline - len(peer.requested)
+        if peer.choked or room <= 0:
+            return []
+
+        wanted = (peer.pieces & self._missing) - peer.requested
+        picks = self._rarest({i for i in wanted if not self.requested.get(i)}, room)
+        if not picks and self.endgame:
+            picks = self._rarest(wanted, room)
+
+        for index in picks:
+            peer.requested.add(index)
+            self.requested.setdefault(index, set()).add(peer_id)
+        return picks
+
+    def on_piece(self, peer_id: Hashable, index: int) -> list[Hashable]:
+        """
+        A piece arrived from a peer and passed its hash check.
+
+        Returns:
+            Peers whose duplicate request for the piece must be cancelled
+        """
+        self.have.set(index)
+        self._missing.discard(index)
+        holders = self.requested.pop(index, set())
+        cancels = []
+        for holder in sorted(holders - {peer_id}, key=str):
+            self.peers[holder].requested.discard(index)
+            cancels.append(holder)
+        peer = self.peers.get(peer_id)
+        if peer is not None:
+            peer.requested.discard(index)
+        return cancels
+
+    def on_failed(self, peer_id: Hashable, index: int) -> None:
+        """A piece from a peer failed its hash check; request it again elsewhere."""
+        peer = self.peers.get(peer_id)
+        if peer is not None:
+            peer.requested.discard(index)
+        holders = self.requested.get(index)
+        if holders is not None:
+            holders.discard(peer_id)
+            if not holders:
+                del self.requested[index]
+
+
+download_scheduler = DownloadScheduler()
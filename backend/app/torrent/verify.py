@@ -0,0 +1,127 @@
+"""SHA-1 piece verification off the event loop."""
+import asyncio
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Sequence
+
+from app.core.config import settings
+
+
+def hash_workers() -> int:
+    """Number of hashing threads, one per core unless configured."""
+    return settings.TORRENT_HASH_WORKERS or os.cpu_count() or 1
+
+
+def sha1_matches(data: bytes | memoryview, expected: bytes) -> bool:
+    """Check a piece against its expected digest (hashlib releases the GIL)."""
+    return hashlib.sha1(data).digest() == expected
+
+
+class ByteBudget:
+    """Bounds the number of piece bytes queued for hashing at once."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, size: int) -> None:
+        async with self._condition:
+            # A piece larger than the whole budget is let through alone
+            await self._condition.wait_for(
+                lambda: self.used == 0 or self.used + size <= self.limit
+            )
+            self.used += size
+
+    async def release(self, size: int) -> None:
+        async with self._condition:
+            self.used -= size
+            self._condition.notify_all()
+
+
+class PieceVerifier:
+    """
+    Verifies downloaded pieces in a thread pool.
+
+    Hashing a multi megabyte piece on the event loop would stall every
+    stream served by the worker. Pieces are hashed by a pool sized to the
+    CPU count instead, and at most `max_inflight_bytes` of piece data
+    waits in the pool so a fast swarm cannot queue unbounded memory.
+    """
+
+    def __init__(self, workers: int | None = None, max_inflight_bytes: int | None = None):
+        self.workers = workers or hash_workers()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="piece-hash"
+        )
+        self._budget = ByteBudget(
+            max_inflight_bytes or settings.TORRENT_HASH_MAX_INFLIGHT_BYTES
+        )
+
+    async def verify(self, data: bytes, expected: bytes) -> bool:
+        """Verify one freshly downloaded piece."""
+        size = len(data)
+        await self._budget.acquire(size)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, sha1_matches, data, expected)
+        finally:
+            await self._budget.release(size)
+
+    async def verify_many(self, pieces: Iterable[tuple[bytes, bytes]]) -> list[bool]:
+        """Verify a batch of (data, expected digest) pairs concurrently."""
+        return list(await asyncio.gather(*(self.verify(d, h) for d, h in pieces)))
+
+    async def recheck_file(
+        self, path: str, piece_length: int, piece_hashes: Sequence[bytes]
+    ) -> list[bool]:
+        """
+        Find which pieces of an existing partial file are valid.
+
+        Used when resuming without a saved bitfield. The file is memory
+        mapped and hashed in place, so there is no copy per piece.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._recheck_file_blocking, path, piece_length, piece_hashes
+        )
+
+    def _recheck_file_blocking(
+        self, path: str, piece_length: int, piece_hashes: Sequence[bytes]
+    ) -> list[bool]:
+        valid = [False] * len(piece_hashes)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return valid
+
+        try:
+            file_size = os.fstat(fd).st_size
+            if file_size == 0:
+                return valid
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                view = memoryview(mapped)
+                try:
+                    futures = {}
+                    for index, expected in enumerate(piece_hashes):
+                        start = index * piece_length
+                        end = min(start + piece_length, file_size)
+                        if start >= file_size:
+                            break
+                        futures[index] = self._executor.submit(
+                            sha1_matches, view[start:end], expected
+                        )
+                    for index, future in futures.items():
+                        valid[index] = future.result()
+                finally:
+                    view.release()
+        finally:
+            os.close(fd)
+        return valid
+
+    def shutdown(self) -> None:
+        """Stop the hashing threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,30 @@
+"""Trending API routes."""
+from fastapi import APIRouter, Depends, Query
+
+from app.auth.dependencies import get_current_active_user
+from app.core.config import settings
+from app.models.models import User
+from app.trending.schemas import TrendingItem, TrendingResponse
+from app.trending.service import trending
+
+router = APIRouter(prefix="/trending", tags=["trending"])
+
+
+@router.get("", response_model=TrendingResponse)
+async def get_trending(
+    limit: int = Query(20, ge=1, le=settings.TRENDING_MAX_ITEMS),
+    current_user: User = Depends(get_current_active_user),
+) -> TrendingResponse:
+    """
+    Get the movies with the most recent activity.
+
+    Served from memory; the ranking and each movie's distinct viewers over
+    the last TRENDING_VIEWERS_WINDOW_SECONDS are refreshed every
+    TRENDING_MERGE_SECONDS.
+    """
+    return TrendingResponse(
+        items=[
+            TrendingItem(movie_id=movie_id, score=score, viewers=trending.viewers(movie_id))
+            for movie_id, score in trending.top(limit)
+        ]
+    )
@@ -0,0 +1,16 @@
+"""Trending Pydantic schemas using v2."""
+from pydantic import BaseModel
+
+
+class TrendingItem(BaseModel):
+    """Schema for one trending movie."""
+
+    movie_id: str
+    score: float
+    viewers: int
+
+
+class TrendingResponse(BaseModel):
+    """Schema for the trending movies, best first."""
+
+    items: list[TrendingItem]
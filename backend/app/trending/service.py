@@ -0,0 +1,196 @@
+"""Exponentially decayed trending counters per movie."""
+import asyncio
+import heapq
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.security import utcnow
+from app.db.session import async_session_maker
+from app.history.service import WatchHistoryService
+from app.models.movie import Movie
+from app.models.trending_score import TrendingScore
+
+logger = logging.getLogger(__name__)
+
+# Weight of each signal, before decay
+STREAM_START_WEIGHT = 1.0
+HEARTBEAT_WEIGHT = 0.1
+COMMENT_WEIGHT = 3.0
+
+UPSERT_BATCH_SIZE = 1000
+
+
+class TrendingCounters:
+    """
+    Trending score of each movie: the sum of its signal weights, each
+    halved every TRENDING_HALF_LIFE_SECONDS.
+
+    Recording a signal adds to a per-worker dict using forward decay: a
+    weight is scaled up by exp(λ (t - landmark)) when recorded, so pending
+    values never need to be decayed one by one. Every TRENDING_MERGE_SECONDS
+    the pending values are brought back to the present and added to
+    trending_scores with one upsert, which decays the stored score to the
+    newer of the two timestamps first, so merges from any number of
+    workers commute. The merged table is then read back and its best
+    TRENDING_MAX_ITEMS kept, already ordered, for the trending endpoint,
+    along with their distinct viewers over TRENDING_VIEWERS_WINDOW_SECONDS
+    from the watch event log.
+    """
+
+    def __init__(self, half_life: int | None = None):
+        self.decay = math.log(2) / (half_life or settings.TRENDING_HALF_LIFE_SECONDS)
+        self._pending: dict[str, float] = {}
+        self._landmark = time.monotonic()
+        self._top: list[tuple[str, float]] = []
+        self._top_at: datetime | None = None
+        self._viewers: dict[str, int] = {}
+        self._task: asyncio.Task | None = None
+
+    def record(self, movie_id: str, weight: float) -> None:
+        """Count a signal of the given weight for a movie, now."""
+        boost = math.exp(self.decay * (time.monotonic() - self._landmark))
+        self._pending[movie_id] = self._pending.get(movie_id, 0.0) + weight * boost
+
+    def top(self, limit: int) -> list[tuple[str, float]]:
+        """Best movies as of the last merge, with their current scores."""
+        if self._top_at is None:
+            return []
+        age = (utcnow() - self._top_at).total_seconds()
+        factor = math.exp(-self.decay * age)
+        return [(movie_id, score * factor) for movie_id, score in self._top[:limit]]
+
+    def viewers(self, movie_id: str) -> int:
+        """Distinct recent viewers of a top movie, as of the last merge."""
+        return self._viewers.get(movie_id, 0)
+
+    def _take_pending(self, now: datetime) -> list[dict]:
+        """Pending values decayed to now, as trending_scores rows."""
+        pending, self._pending = self._pending, {}
+        moment = time.monotonic()
+        factor = math.exp(-self.decay * (moment - self._landmark))
+        self._landmark = moment
+        return [
+            {"movie_id": movie_id, "score": value * factor, "updated_at": now}
+            for movie_id, value in pending.items()
+        ]
+
+    def _restore(self, rows: list[dict]) -> None:
+        """Put back rows taken by a failed merge; the landmark is their timestamp."""
+        factor = math.exp(self.decay * (time.monotonic() - self._landmark))
+        for row in rows:
+            movie_id = row["movie_id"]
+            self._pending[movie_id] = self._pending.get(movie_id, 0.0) + row["score"] * factor
+
+    def _decayed(self, score, updated_at, now):
+        """SQL expression of a score stored at updated_at, as of now."""
+        return score * func.exp(-self.decay * func.extract("epoch", now - updated_at))
+
+    async def _write(self, db, rows: list[dict]) -> None:
+        # A movie deleted since its signal would fail the whole batch on the FK
+        result = await db.execute(
+            select(Movie.id).where(Movie.id.in_([row["movie_id"] for row in rows]))
+        )
+        existing = set(result.scalars().all())
+        rows = [row for row in rows if row["movie_id"] in existing]
+
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            statement = insert(TrendingScore).values(rows[i:i + UPSERT_BATCH_SIZE])
+            excluded = statement.excluded
+            latest = func.greatest(TrendingScore.updated_at, excluded.updated_at)
+            statement = statement.on_conflict_do_update(
+                index_elements=[TrendingScore.movie_id],
+                set_={
+                    "score": self._decayed(TrendingScore.score, TrendingScore.updated_at, latest)
+                    + self._decayed(excluded.score, excluded.updated_at, latest),
+                    "updated_at": latest,
+                },
+            )
+            await db.execute(statement)
+
+    async def merge(self) -> None:
+        """Add this worker's pending signals to the shared scores and reload the top."""
+        now = utcnow()
+        rows = self._take_pending(now)
+        try:
+            async with async_session_maker() as db:
+                if rows:
+                    await self._write(db, rows)
+                await db.execute(
+                    delete(TrendingScore).where(
+                        self._decayed(TrendingScore.score, TrendingScore.updated_at, now)
+                        < settings.TRENDING_MIN_SCORE
+                    )
+                )
+                await db.commit()
+        except Exception:
+            self._restore(rows)
+            raise
+
+        # Past the commit the rows are merged: a failed read must not restore them
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(TrendingScore.movie_id, TrendingScore.score, TrendingScore.updated_at)
+            )
+            scores = result.all()
+
+        self._top = heapq.nlargest(
+            settings.TRENDING_MAX_ITEMS,
+            (
+                (movie_id, score * math.exp(-self.decay * (now - updated_at).total_seconds()))
+                for movie_id, score, updated_at in scores
+            ),
+            key=lambda item: item[1],
+        )
+        self._top_at = now
+        await self._count_viewers(now)
+
+    async def _count_viewers(self, now: datetime) -> None:
+        """Refresh the viewer counts of the top; stale counts beat failing the merge."""
+        since = now - timedelta(seconds=settings.TRENDING_VIEWERS_WINDOW_SECONDS)
+        try:
+            async with async_session_maker() as db:
+                self._viewers = await WatchHistoryService.viewer_counts(
+                    db, since, now, movie_ids=[movie_id for movie_id, _ in self._top]
+                )
+        except Exception:
+            logger.exception("Counting trending viewers failed")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.TRENDING_MERGE_SECONDS)
+            try:
+                await self.merge()
+            except Exception:
+                logger.exception("Merging trending scores failed")
+
+    async def start(self) -> None:
+        """Load the current top, then merge periodically."""
+        try:
+            await self.merge()
+        except Exception:
+            logger.exception("Merging trending scores failed")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop merging and write what is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.merge()
+        except Exception:
+            logger.exception("Merging trending scores failed")
+
+
+trending = TrendingCounters()
@@ -0,0 +1,57 @@
+"""Opaque cursors for keyset pagination."""
+import base64
+import json
+from datetime import datetime
+
+# Range of a Postgres INTEGER, the type of the ids used as tie-breakers
+INT_MIN, INT_MAX = -(2**31), 2**31 - 1
+
+
+class InvalidCursor(Exception):
+    """Exception raised when a pagination cursor cannot be decoded."""
+    pass
+
+
+def encode_cursor(*values: datetime | int | str) -> str:
+    """Encode the sort key of the last row of a page as an opaque string."""
+    raw = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: tuple[type, ...]) -> list[datetime | int | str]:
+    """
+    Decode a cursor made by encode_cursor.
+
+    Each value must have the type at its position in `types`, so a
+    tampered cursor is rejected here instead of failing in the database.
+    Datetimes must be naive like the columns they come from, and integers
+    must fit an INTEGER column.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or does not match `types`
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(raw, list):
+            raise InvalidCursor("Expected a list of values")
+        values = [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in raw
+        ]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(str(e)) from e
+    if len(values) != len(types):
+        raise InvalidCursor(f"Expected {len(types)} values, got {len(values)}")
+    for value, expected in zip(values, types):
+        # bool is an int subclass but never a valid key
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise InvalidCursor(f"Expected {expected.__name__}, got {type(value).__name__}")
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            raise InvalidCursor("Expected a naive datetime")
+        if isinstance(value, int) and not INT_MIN <= value <= INT_MAX:
+            raise InvalidCursor("Integer out of range")
+    return values
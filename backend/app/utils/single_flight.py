@@ -0,0 +1,79 @@
+"""Single-flight execution of expensive per-key work."""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, TypeVar
+
+from app.db.locks import advisory_lock, is_advisory_locked
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Flight(Generic[T]):
+    """One in-progress unit of work that any number of callers can join."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self._task: asyncio.Task | None = None
+
+
+class SingleFlight:
+    """
+    Run at most one unit of work per key at a time.
+
+    Within a worker, the first caller for a key starts the work and later
+    callers attach to the same Flight. Across workers, the work runs under
+    a Postgres advisory lock on (namespace, key), so a second worker waits
+    for the first one and the work function is expected to re-check whether
+    anything is left to do once it holds the lock. Flights beyond
+    ADVISORY_LOCKS_MAX_HELD queue in this worker before taking the lock
+    (see advisory_lock).
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._flights: dict[str, Flight] = {}
+
+    def get(self, key: str) -> Flight | None:
+        """Get the in-progress flight of a key, if any."""
+        return self._flights.get(key)
+
+    async def is_running(self, key: str) -> bool:
+        """Check whether the work for a key is running in any worker."""
+        if key in self._flights:
+            return True
+        return await is_advisory_locked(self.namespace, key)
+
+    def start(self, key: str, work: Callable[[Flight], Awaitable[T]]) -> Flight[T]:
+        """Start the work for a key, or join the flight already running."""
+        flight = self._flights.get(key)
+        if flight is not None:
+            return flight
+
+        flight = Flight(key)
+        self._flights[key] = flight
+        flight._task = asyncio.create_task(self._execute(flight, work))
+        return flight
+
+    async def run(self, key: str, work: Callable[[Flight], Awaitable[T]]) -> T:
+        """Start or join the work for a key and wait for its result."""
+        return await asyncio.shield(self.start(key, work).future)
+
+    async def _execute(self, flight: Flight, work: Callable[[Flight], Awaitable[T]]) -> None:
+        try:
+            async with advisory_lock(self.namespace, flight.key):
+                result = await work(flight)
+        except Exception as e:
+            logger.exception("Single-flight work %s:%s failed", self.namespace, flight.key)
+            flight.future.set_exception(e)
+        else:
+            flight.future.set_result(result)
+        finally:
+            self._flights.pop(flight.key, None)
+            if not flight.future.done():
+                flight.future.cancel()
+            elif not flight.future.cancelled():
+                # Nobody may await the future; do not warn about an unretrieved error
+                flight.future.exception()
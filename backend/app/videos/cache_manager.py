@@ -0,0 +1,208 @@
+"""Disk quota and age based eviction of downloaded videos."""
+import asyncio
+import logging
+import os
+import shutil
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import utcnow
+from app.db.session import async_session_maker
+from app.models.video import StatusType, Video
+from app.videos.chunk_cache import chunk_cache
+from app.videos.paths import media_dir
+from app.videos.pins import StreamPins, stream_pins
+
+logger = logging.getLogger(__name__)
+
+
+class CacheManager:
+    """
+    Keep the video store under a byte quota and drop stale movies.
+
+    Videos are evicted least recently watched first. A video is never
+    evicted while it is downloading or converting, while this worker is
+    streaming it, or while another worker watched it within the pin grace
+    period (last_watched_at is kept fresh by every stream).
+    """
+
+    def __init__(self, pins: StreamPins = stream_pins):
+        self.pins = pins
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    # ------------------------------------------------------------------
+    # Accounting
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    async def used_bytes(db: AsyncSession) -> int:
+        """Total size of every video in the store, including partial downloads."""
+        result = await db.execute(select(func.coalesce(func.sum(Video.file_size), 0)))
+        return int(result.scalar_one())
+
+    @staticmethod
+    def free_bytes() -> int:
+        """Free space left on the media volume."""
+        media_root = Path(settings.MEDIA_ROOT)
+        media_root.mkdir(parents=True, exist_ok=True)
+        return shutil.disk_usage(media_root).free
+
+    async def bytes_to_free(self, db: AsyncSession, incoming: int = 0) -> int:
+        """How much must be evicted to fit `incoming` more bytes."""
+        over_quota = await self.used_bytes(db) + incoming - settings.VIDEO_STORE_MAX_BYTES
+        under_floor = settings.VIDEO_STORE_MIN_FREE_BYTES - (self.free_bytes() - incoming)
+        return max(0, over_quota, under_floor)
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    async def _candidates(self, db: AsyncSession, older_than) -> list[Video]:
+        """
+        Next batch of evictable videos, least recently watched first.
+
+        last_watched_at is set on every row, at creation and again when a
+        video becomes ready or fails, so a video never watched ages from
+        then; filtering and ordering on it alone is a range scan of
+        ix_videos_last_watched_at.
+        """
+        query = (
+            select(Video)
+            .where(
+                Video.last_watched_at < older_than,
+                Video.status.in_([StatusType.READY, StatusType.ERROR]),
+            )
+            .order_by(Video.last_watched_at.asc())
+            .limit(settings.VIDEO_EVICTION_BATCH_SIZE)
+            # Other workers running the same pass skip rows already claimed
+            .with_for_update(skip_locked=True)
+        )
+        pinned = self.pins.pinned_ids()
+        if pinned:
+            query = query.where(Video.movie_id.not_in(pinned))
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+    @staticmethod
+    def _disk_usage(path: Path) -> int:
+        """Bytes used by a file, or by every file under a directory."""
+        if path.is_file():
+            return path.stat().st_size
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.stat(os.path.join(root, name)).st_size
+                except OSError:
+                    pass
+        return total
+
+    @classmethod
+    def _remove_files(cls, videos: list[Video]) -> int:
+        """
+        Delete every file of a batch of videos (blocking, run in a thread).
+
+        Returns the bytes actually freed, measured on disk: file_size is
+        unknown for some rows and does not cover generated files.
+        """
+        freed = 0
+        for video in videos:
+            source, directory = Path(video.file_path), media_dir(video.movie_id)
+            paths = [directory]
+            # A converted video lives inside its media directory already
+            if not source.resolve().is_relative_to(directory.resolve()):
+                paths.append(source)
+            for path in paths:
+                try:
+                    freed += cls._disk_usage(path)
+                except OSError:
+                    pass
+            source.unlink(missing_ok=True)
+            shutil.rmtree(directory, ignore_errors=True)
+        return freed
+
+    async def _evict_batch(self, db: AsyncSession, videos: list[Video]) -> int:
+        """Delete files then rows of a batch, return the bytes reclaimed."""
+        # A stream may have pinned a video since the batch was selected
+        videos = [video for video in videos if not self.pins.is_pinned(video.movie_id)]
+        freed = await asyncio.to_thread(self._remove_files, videos)
+        for video in videos:
+            chunk_cache.invalidate(video.file_path)
+        await db.execute(delete(Video).where(Video.id.in_([v.id for v in videos])))
+        await db.commit()
+        logger.info("Evicted %d videos: %s", len(videos), [v.movie_id for v in videos])
+        return freed
+
+    async def evict_expired(self, db: AsyncSession) -> int:
+        """Evict every video not watched for VIDEO_MAX_AGE_DAYS."""
+        cutoff = utcnow() - timedelta(days=settings.VIDEO_MAX_AGE_DAYS)
+        evicted = 0
+        while batch := await self._candidates(db, cutoff):
+            await self._evict_batch(db, batch)
+            evicted += len(batch)
+        return evicted
+
+    async def evict_for_space(self, db: AsyncSession, incoming: int = 0) -> int:
+        """Evict least recently watched videos until `incoming` bytes fit."""
+        needed = await self.bytes_to_free(db, incoming)
+        if not needed:
+            return 0
+
+        grace = utcnow() - timedelta(seconds=settings.VIDEO_PIN_GRACE_SECONDS)
+        reclaimed = 0
+        while reclaimed < needed:
+            batch = await self._candidates(db, grace)
+            if not batch:
+                logger.warning(
+                    "Video store needs %d more bytes but nothing is evictable",
+                    needed - reclaimed,
+                )
+                break
+            reclaimed += await self._evict_batch(db, batch)
+        return reclaimed
+
+    async def enforce(self, incoming: int = 0) -> None:
+        """Run both the age and the quota passes."""
+        async with self._lock:
+            async with async_session_maker() as db:
+                await self.evict_expired(db)
+                await self.evict_for_space(db, incoming)
+
+    async def ensure_space(self, incoming: int) -> None:
+        """Make room before a new download of `incoming` bytes starts."""
+        await self.enforce(incoming)
+
+    # ------------------------------------------------------------------
+    # Background loop
+    # ------------------------------------------------------------------
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.enforce()
+            except Exception:
+                logger.exception("Video eviction pass failed")
+            await asyncio.sleep(settings.VIDEO_EVICTION_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        """Start the periodic eviction loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic eviction loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+cache_manager = CacheManager()
@@ -0,0 +1,125 @@
+"""Byte-budgeted LRU of video chunks shared by every stream of a worker."""
+import asyncio
+import os
+from collections import OrderedDict
+from typing import AsyncIterator
+
+from app.core.config import settings
+from app.videos.exceptions import ShortRead
+
+ChunkKey = tuple[str, int]
+
+
+def read_chunk(path: str, offset: int, size: int) -> bytes:
+    """Read one chunk with a positional read (blocking)."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.pread(fd, size, offset)
+    finally:
+        os.close(fd)
+
+
+class ChunkCache:
+    """
+    Hot chunks of video files, keyed by (file, aligned offset).
+
+    When dozens of viewers watch the same new release they read the same
+    ranges; each chunk is read from disk once and served from memory to
+    all of them. Concurrent misses on one chunk share a single read.
+    Callers get memoryview slices, so serving a range copies nothing.
+    """
+
+    def __init__(self, max_bytes: int | None = None, chunk_size: int | None = None):
+        self.max_bytes = max_bytes or settings.CHUNK_CACHE_MAX_BYTES
+        self.chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._chunks: OrderedDict[ChunkKey, bytes] = OrderedDict()
+        self._inflight: dict[ChunkKey, asyncio.Future[bytes]] = {}
+
+    def _store(self, key: ChunkKey, chunk: bytes) -> None:
+        if len(chunk) > self.max_bytes:
+            return
+        self._chunks[key] = chunk
+        self.size += len(chunk)
+        while self.size > self.max_bytes:
+            _, evicted = self._chunks.popitem(last=False)
+            self.size -= len(evicted)
+
+    async def get_chunk(self, path: str, offset: int) -> bytes:
+        """Get the chunk starting at an aligned offset, reading it on a miss."""
+        key = (path, offset)
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            self.hits += 1
+            return chunk
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The reader was cancelled, not us: read it ourselves
+                if inflight.cancelled():
+                    return await self.get_chunk(path, offset)
+                raise
+
+        self.misses += 1
+        future: asyncio.Future[bytes] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            chunk = await asyncio.to_thread(read_chunk, path, offset, self.chunk_size)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the error; nobody else needs to retrieve it
+            future.exception()
+            raise
+        else:
+            future.set_result(chunk)
+            self._store(key, chunk)
+            return chunk
+        finally:
+            self._inflight.pop(key, None)
+
+    async def read(
+        self, path: str, start: int, end: int, cacheable: bool = True
+    ) -> AsyncIterator[memoryview]:
+        """
+        Yield the bytes of [start, end] (inclusive) as chunk slices.
+
+        Files that are still being written are read with cacheable=False,
+        since their chunks may still contain unwritten holes.
+
+        Raises:
+            ShortRead: If the file ends before `end`, e.g. it was truncated
+                or replaced after its size was taken; the response must not
+                end cleanly with fewer bytes than its Content-Length
+        """
+        offset = start - start % self.chunk_size
+        while offset <= end:
+            if cacheable:
+                chunk = await self.get_chunk(path, offset)
+            else:
+                chunk = await asyncio.to_thread(read_chunk, path, offset, self.chunk_size)
+            if offset + len(chunk) <= min(end, offset + self.chunk_size - 1):
+                self.invalidate(path)
+                raise ShortRead(f"{path} ended at {offset + len(chunk)}, expected {end + 1}")
+            view = memoryview(chunk)
+            lo = max(start - offset, 0)
+            hi = min(end - offset + 1, len(chunk))
+            yield view[lo:hi]
+            offset += self.chunk_size
+
+    def invalidate(self, path: str) -> None:
+        """Drop every cached chunk of a file (replaced or deleted)."""
+        for key in [key for key in self._chunks if key[0] == path]:
+            self.size -= len(self._chunks.pop(key))
+
+
+chunk_cache = ChunkCache()
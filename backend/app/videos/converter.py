@@ -0,0 +1,197 @@
+"""Conversion of downloaded files into browser playable MP4."""
+import asyncio
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+from app.models.video import ConversionMode
+from app.videos.exceptions import ConversionError
+from app.videos.hls import hls_output_args, tee_escape, tee_output
+from app.videos.probe import ProbeResult
+
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+
+@dataclass
+class ConversionPlan:
+    """Which streams are copied and which are re-encoded."""
+
+    mode: ConversionMode
+    copy_video: bool
+    copy_audio: bool
+    has_audio: bool = True
+    # Stream indexes picked by the probe; 0:v:0 could be cover art
+    video_stream: int | None = None
+    audio_stream: int | None = None
+
+    def codec_args(self) -> list[str]:
+        """ffmpeg codec arguments for this plan."""
+        video_map = "0:v:0" if self.video_stream is None else f"0:{self.video_stream}"
+        audio_map = "0:a:0?" if self.audio_stream is None else f"0:{self.audio_stream}"
+        args = ["-map", video_map]
+        if self.has_audio:
+            args += ["-map", audio_map]
+        args += ["-sn", "-dn"]
+
+        if self.copy_video:
+            args += ["-c:v", "copy"]
+        else:
+            args += [
+                "-c:v", "libx264",
+                "-preset", "veryfast",
+                "-crf", "22",
+                "-pix_fmt", "yuv420p",
+            ]
+
+        if self.has_audio:
+            if self.copy_audio:
+                args += ["-c:a", "copy"]
+            else:
+                args += ["-c:a", "aac", "-b:a", "160k", "-ac", "2"]
+        return args
+
+
+def plan_conversion(result: ProbeResult) -> ConversionPlan:
+    """
+    Pick the cheapest conversion that yields a browser playable file.
+
+    Streams that are already compatible are copied, so an H.264/AAC MKV
+    only needs a container change instead of a full re-encode.
+    """
+    copy_video = result.video_copyable
+    copy_audio = result.audio_copyable
+    has_audio = result.audio_codec is not None
+
+    if copy_video and copy_audio:
+        mode = ConversionMode.NONE if result.is_mp4 else ConversionMode.REMUX
+    elif copy_video or (copy_audio and has_audio):
+        mode = ConversionMode.PARTIAL
+    else:
+        mode = ConversionMode.TRANSCODE
+
+    return ConversionPlan(
+        mode=mode,
+        copy_video=copy_video,
+        copy_audio=copy_audio,
+        has_audio=has_audio,
+        video_stream=result.video_index,
+        audio_stream=result.audio_index,
+    )
+
+
+async def run_ffmpeg(
+    args: list[str],
+    duration: float | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> None:
+    """
+    Run ffmpeg and report progress as a percentage of the source duration.
+
+    Raises:
+        ConversionError: If ffmpeg exits with a non zero status
+    """
+    process = await asyncio.create_subprocess_exec(
+        settings.FFMPEG_BINARY,
+        "-hide_banner",
+        "-loglevel", "error",
+        "-nostats",
+        "-progress", "pipe:1",
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    # stderr is drained concurrently so a chatty ffmpeg cannot block on a full pipe
+    stderr_task = asyncio.create_task(process.stderr.read())
+
+    last_percent = -1
+    assert process.stdout is not None
+    async for raw_line in process.stdout:
+        line = raw_line.decode(errors="replace").strip()
+        if not on_progress or not duration or not line.startswith("out_time_us="):
+            continue
+        try:
+            out_time = int(line.split("=", 1)[1]) / 1_000_000
+        except ValueError:
+            continue
+        percent = max(0, min(99, int(out_time * 100 / duration)))
+        if percent != last_percent:
+            last_percent = percent
+            await on_progress(percent)
+
+    stderr = await stderr_task
+    returncode = await process.wait()
+    if returncode != 0:
+        raise ConversionError(stderr.decode(errors="replace").strip() or "ffmpeg failed")
+
+
+def reset_directory(directory: Path) -> None:
+    """Empty a playlist directory; stale segments must not leak into a new playlist."""
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True, exist_ok=True)
+
+
+async def segment(
+    source: str,
+    hls_directory: Path,
+    plan: ConversionPlan,
+    duration: float | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> None:
+    """
+    Write the HLS playlist of a file that needs no conversion.
+
+    Every stream is copied, so this is a remux into fMP4 segments and
+    costs about as much as reading the file once.
+    """
+    reset_directory(hls_directory)
+    args = ["-y", "-i", source, *plan.codec_args(), *hls_output_args(hls_directory)]
+    await run_ffmpeg(args, duration=duration, on_progress=on_progress)
+    if on_progress:
+        await on_progress(100)
+
+
+async def convert(
+    source: str,
+    destination: Path,
+    plan: ConversionPlan,
+    duration: float | None = None,
+    on_progress: ProgressCallback | None = None,
+    hls_directory: Path | None = None,
+) -> Path:
+    """
+    Convert a source file to MP4 according to a plan.
+
+    The output is written to a temporary file and renamed on success, so a
+    reader never sees a half written destination. When hls_directory is
+    given the same encode is also segmented into a live HLS playlist, so
+    playback can start before the MP4 is complete.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = destination.with_name(f".{destination.name}.part")
+
+    if hls_directory is None:
+        output_args = ["-movflags", "+faststart", "-f", "mp4", str(tmp_path)]
+    else:
+        reset_directory(hls_directory)
+        # One encode, two muxers: the tee muxer needs global headers on encoders
+        output_args = [
+            "-flags", "+global_header",
+            "-f", "tee",
+            f"[f=mp4:movflags=+faststart]{tee_escape(str(tmp_path))}"
+            f"|{tee_output(hls_directory)}",
+        ]
+
+    args = ["-y", "-i", source, *plan.codec_args(), *output_args]
+    try:
+        await run_ffmpeg(args, duration=duration, on_progress=on_progress)
+        os.replace(tmp_path, destination)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    if on_progress:
+        await on_progress(100)
+    return destination
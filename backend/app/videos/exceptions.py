@@ -0,0 +1,19 @@
+class VideoNotFoundException(Exception):
+    """Exception raised when a movie has no video row."""
+    pass
+
+class ProbeError(Exception):
+    """Exception raised when ffprobe cannot read a source file."""
+    pass
+
+class ConversionError(Exception):
+    """Exception raised when ffmpeg fails to produce a playable file."""
+    pass
+
+class RangeNotSatisfiable(Exception):
+    """Exception raised when a Range header does not fit the file."""
+    pass
+
+class ShortRead(Exception):
+    """Exception raised when a video file ends before the range being sent."""
+    pass
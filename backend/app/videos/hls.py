@@ -0,0 +1,124 @@
+"""Live HLS playlists written while a video is being converted."""
+import re
+from pathlib import Path
+
+import aiofiles
+
+from app.core.config import settings
+from app.videos.paths import media_dir
+
+PLAYLIST_NAME = "index.m3u8"
+INIT_SEGMENT_NAME = "init.mp4"
+SEGMENT_PATTERN = "segment_%05d.m4s"
+
+_MAP_URI = re.compile(r'URI="([^"]+)"')
+_SEGMENT_NAME = re.compile(r"^segment_\d{5,}\.m4s$")
+
+
+def hls_dir(movie_id: str) -> Path:
+    """Directory holding the playlist and segments of a movie."""
+    return media_dir(movie_id) / "hls"
+
+
+def segment_base_url(movie_id: str) -> str:
+    """URL prefix of the segments, served by the authenticated videos router."""
+    return f"/videos/{movie_id}/hls/"
+
+
+def is_segment_name(name: str) -> bool:
+    """Check if a requested file name is one ffmpeg writes for a playlist."""
+    return name == INIT_SEGMENT_NAME or _SEGMENT_NAME.match(name) is not None
+
+
+def tee_escape(value: str) -> str:
+    """Escape a value for use inside an ffmpeg tee muxer slave spec."""
+    for char in ("\\", "'", ":", "|", "[", "]"):
+        value = value.replace(char, "\\" + char)
+    return value
+
+
+def hls_options(directory: Path) -> dict[str, str]:
+    """ffmpeg hls muxer options writing an incremental fMP4 event playlist."""
+    return {
+        "f": "hls",
+        "hls_time": str(settings.HLS_SEGMENT_SECONDS),
+        "hls_list_size": "0",
+        "hls_playlist_type": "event",
+        "hls_segment_type": "fmp4",
+        "hls_fmp4_init_filename": INIT_SEGMENT_NAME,
+        # temp_file: segments appear under their final name only once complete
+        "hls_flags": "independent_segments+temp_file",
+        "hls_segment_filename": str(directory / SEGMENT_PATTERN),
+    }
+
+
+def hls_output_args(directory: Path) -> list[str]:
+    """ffmpeg output arguments writing the playlist of a directory directly."""
+    args = []
+    for key, value in hls_options(directory).items():
+        args += [f"-{key}", value]
+    return args + [str(directory / PLAYLIST_NAME)]
+
+
+def tee_output(directory: Path) -> str:
+    """tee muxer slave spec writing an incremental fMP4 HLS event playlist."""
+    options = hls_options(directory)
+    options["hls_segment_filename"] = tee_escape(options["hls_segment_filename"])
+    spec = ":".join(f"{key}={value}" for key, value in options.items())
+    return f"[{spec}]{tee_escape(str(directory / PLAYLIST_NAME))}"
+
+
+def rewrite_playlist(text: str, base_url: str) -> str:
+    """
+    Point segment URIs of a playlist at the segment route.
+
+    ffmpeg writes URIs relative to the playlist file. A trailing line
+    without a newline may still be in the middle of being written, so it
+    is dropped along with a dangling #EXTINF.
+    """
+    lines = text.split("\n")
+    if not text.endswith("\n"):
+        lines = lines[:-1]
+
+    rewritten = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#EXT-X-MAP:"):
+            line = _MAP_URI.sub(
+                lambda m: f'URI="{base_url}{Path(m.group(1)).name}"', line
+            )
+        elif not line.startswith("#"):
+            line = base_url + Path(line).name
+        rewritten.append(line)
+
+    # A segment whose #EXTINF is written but whose URI is not yet is dropped
+    if rewritten and rewritten[-1].startswith("#EXTINF"):
+        rewritten.pop()
+    return "\n".join(rewritten) + "\n"
+
+
+def is_finished(playlist: str) -> bool:
+    """Check if ffmpeg has closed the playlist."""
+    return "#EXT-X-ENDLIST" in playlist
+
+
+async def read_playlist(movie_id: str) -> str | None:
+    """
+    Read the current playlist of a movie with public segment URIs.
+
+    Returns:
+        The playlist, or None if no segment has been written yet
+    """
+    path = hls_dir(movie_id) / PLAYLIST_NAME
+    try:
+        async with aiofiles.open(path, "r") as playlist_file:
+            text = await playlist_file.read()
+    except FileNotFoundError:
+        return None
+
+    playlist = rewrite_playlist(text, segment_base_url(movie_id))
+    if "#EXTINF" not in playlist:
+        return None
+    return playlist
@@ -0,0 +1,150 @@
+"""Keyframe time to byte offset index for seeking in progressive streams."""
+import asyncio
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+
+from app.core.config import settings
+from app.videos.exceptions import ProbeError
+
+MAGIC = b"HTKF"
+HEADER = struct.Struct("<4sHI")  # magic, identity length, keyframe count
+
+
+class KeyframeIndex:
+    """
+    Presentation times and byte offsets of the keyframes of a video.
+
+    Stored as two flat arrays (16 bytes per keyframe), so a two hour movie
+    with a keyframe every two seconds fits in about 60 KiB and a lookup is
+    a binary search.
+    """
+
+    def __init__(self, identity: str, times: array | None = None, offsets: array | None = None):
+        self.identity = identity
+        self.times = times if times is not None else array("d")
+        self.offsets = offsets if offsets is not None else array("q")
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def append(self, time: float, offset: int) -> None:
+        """Add a keyframe; keyframes must be added in presentation order."""
+        self.times.append(time)
+        self.offsets.append(offset)
+
+    def covers(self, time: float) -> bool:
+        """
+        Whether a time is at or before the last indexed keyframe.
+
+        An index of a partially downloaded file ends at the first hole, so
+        a later time has no known keyframe yet.
+        """
+        return bool(self.times) and time <= self.times[-1]
+
+    def lookup(self, time: float) -> tuple[float, int] | None:
+        """
+        Find the last keyframe at or before a time.
+
+        Returns:
+            (keyframe time, byte offset), or None if the index is empty
+        """
+        if not self.times:
+            return None
+        i = max(bisect_right(self.times, time) - 1, 0)
+        return self.times[i], self.offsets[i]
+
+    def save(self, path: str | Path) -> None:
+        """Atomically write the index to disk."""
+        path = Path(path)
+        identity = self.identity.encode()
+        times, offsets = array("d", self.times), array("q", self.offsets)
+        if sys.byteorder == "big":
+            times.byteswap()
+            offsets.byteswap()
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(identity), len(times)))
+            f.write(identity)
+            f.write(times.tobytes())
+            f.write(offsets.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "KeyframeIndex | None":
+        """Read a saved index, or None if missing or corrupt."""
+        try:
+            raw = Path(path).read_bytes()
+        except FileNotFoundError:
+            return None
+        if len(raw) < HEADER.size:
+            return None
+        magic, identity_length, count = HEADER.unpack_from(raw)
+        start = HEADER.size + identity_length
+        if magic != MAGIC or len(raw) != start + 16 * count:
+            return None
+
+        times, offsets = array("d"), array("q")
+        times.frombytes(raw[start:start + 8 * count])
+        offsets.frombytes(raw[start + 8 * count:])
+        if sys.byteorder == "big":
+            times.byteswap()
+            offsets.byteswap()
+        identity = raw[HEADER.size:start].decode(errors="replace")
+        return cls(identity, times, offsets)
+
+
+async def build_keyframe_index(path: str, identity: str) -> KeyframeIndex:
+    """
+    Index the keyframes of the first video stream of a file.
+
+    Only packet headers are read, nothing is decoded. Output is consumed
+    line by line, so memory stays flat however long the movie is. On a
+    partially downloaded file ffprobe stops at the first hole and the
+    index covers what precedes it.
+
+    Raises:
+        ProbeError: If ffprobe fails before finding any keyframe
+    """
+    process = await asyncio.create_subprocess_exec(
+        settings.FFPROBE_BINARY,
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,pos,flags",
+        "-of", "csv=p=0",
+        path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    # Holes in a partial file make ffprobe log a lot; drain stderr meanwhile
+    stderr_task = asyncio.create_task(process.stderr.read())
+    index = KeyframeIndex(identity)
+    last_time = float("-inf")
+    try:
+        async for line in process.stdout:
+            fields = line.decode(errors="replace").strip().split(",")
+            if len(fields) < 3 or "K" not in fields[2]:
+                continue
+            try:
+                time, offset = float(fields[0]), int(fields[1])
+            except ValueError:
+                # pts_time or pos is N/A
+                continue
+            # B-frame reordering never puts a keyframe before the previous
+            # one, but broken files do; keep the times sorted for bisect
+            if time > last_time:
+                index.append(time, offset)
+                last_time = time
+        stderr = await stderr_task
+        await process.wait()
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    if process.returncode != 0 and not index:
+        raise ProbeError(stderr.decode(errors="replace").strip() or "ffprobe failed")
+    return index
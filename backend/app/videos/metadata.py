@@ -0,0 +1,300 @@
+"""Probe metadata extracted once per file and cached by file identity."""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.models.video import StatusType, Video
+from app.videos.exceptions import ProbeError
+from app.videos.keyframes import KeyframeIndex, build_keyframe_index
+from app.videos.paths import media_dir
+from app.videos.probe import probe_streams, to_float, to_int
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_NAME = "probe.json"
+KEYFRAMES_NAME = "keyframes.bin"
+MEMORY_ENTRIES = 1024
+KEYFRAME_MEMORY_ENTRIES = 64
+
+
+def file_identity(path: str) -> str:
+    """
+    Identity of a file's content: device, inode, size and mtime.
+
+    A converted or re-downloaded file gets a new identity, so stale
+    metadata is never served for it.
+    """
+    st = os.stat(path)
+    return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+
+
+@dataclass
+class StreamInfo:
+    """One stream of a video file."""
+
+    index: int
+    codec_type: str | None
+    codec_name: str | None
+    language: str | None = None
+    width: int | None = None
+    height: int | None = None
+    channels: int | None = None
+    bit_rate: int | None = None
+
+
+@dataclass
+class VideoMetadata:
+    """What ffprobe knows about a video file."""
+
+    identity: str
+    duration: float | None
+    bit_rate: int | None
+    size: int | None
+    streams: list[StreamInfo] = field(default_factory=list)
+
+    @classmethod
+    def from_probe(cls, identity: str, data: dict) -> "VideoMetadata":
+        fmt = data.get("format", {})
+        streams = [
+            StreamInfo(
+                index=s.get("index", i),
+                codec_type=s.get("codec_type"),
+                codec_name=s.get("codec_name"),
+                language=s.get("tags", {}).get("language"),
+                width=s.get("width"),
+                height=s.get("height"),
+                channels=s.get("channels"),
+                bit_rate=to_int(s.get("bit_rate")),
+            )
+            for i, s in enumerate(data.get("streams", []))
+        ]
+        return cls(
+            identity=identity,
+            duration=to_float(fmt.get("duration")),
+            bit_rate=to_int(fmt.get("bit_rate")),
+            size=to_int(fmt.get("size")),
+            streams=streams,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VideoMetadata":
+        data = dict(data)
+        data["streams"] = [StreamInfo(**s) for s in data.get("streams", [])]
+        return cls(**data)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class MetadataStore:
+    """
+    Metadata of every video, extracted in the background.
+
+    Lookups cost a stat(): the file identity is checked against a small
+    in-memory LRU, then against the probe.json sidecar in the movie's
+    media directory. Misses are queued for a bounded pool of ffprobe
+    workers instead of probing inside the request. Extraction also builds
+    the keyframe index (keyframes.bin) and fills the nullable
+    Video.duration and Video.file_size columns of ready videos.
+    """
+
+    def __init__(self):
+        self._memory: OrderedDict[str, VideoMetadata] = OrderedDict()
+        self._keyframes: OrderedDict[str, KeyframeIndex] = OrderedDict()
+        # Monotonic time before which a movie's keyframes are not rebuilt again
+        self._rebuild_after: dict[str, float] = {}
+        self._queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
+        self._queued: set[str] = set()
+        self._workers: list[asyncio.Task] = []
+
+    @staticmethod
+    def sidecar(movie_id: str) -> Path:
+        return media_dir(movie_id) / SIDECAR_NAME
+
+    @staticmethod
+    def keyframes_sidecar(movie_id: str) -> Path:
+        return media_dir(movie_id) / KEYFRAMES_NAME
+
+    def _remember(self, metadata: VideoMetadata) -> None:
+        self._memory[metadata.identity] = metadata
+        self._memory.move_to_end(metadata.identity)
+        while len(self._memory) > MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def _remember_keyframes(self, movie_id: str, index: KeyframeIndex) -> None:
+        self._keyframes[movie_id] = index
+        self._keyframes.move_to_end(movie_id)
+        while len(self._keyframes) > KEYFRAME_MEMORY_ENTRIES:
+            evicted, _ = self._keyframes.popitem(last=False)
+            self._rebuild_after.pop(evicted, None)
+
+    @staticmethod
+    def _read_sidecar(path: Path) -> VideoMetadata | None:
+        try:
+            return VideoMetadata.from_dict(json.loads(path.read_text()))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+    @staticmethod
+    def _write_sidecar(path: Path, metadata: VideoMetadata) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(metadata.to_dict()))
+        os.replace(tmp_path, path)
+
+    async def get(self, movie_id: str, path: str) -> VideoMetadata | None:
+        """Cached metadata of a file, or None if not extracted yet."""
+        try:
+            identity = file_identity(path)
+        except FileNotFoundError:
+            return None
+
+        metadata = self._memory.get(identity)
+        if metadata is not None:
+            self._memory.move_to_end(identity)
+            return metadata
+
+        metadata = await asyncio.to_thread(self._read_sidecar, self.sidecar(movie_id))
+        if metadata is None or metadata.identity != identity:
+            return None
+        self._remember(metadata)
+        return metadata
+
+    async def keyframes(
+        self, movie_id: str, path: str, partial: bool = False
+    ) -> KeyframeIndex | None:
+        """
+        Keyframe index of a file, or None if not built yet.
+
+        The index is keyed on the full file identity, size and mtime
+        included. Keyframes of a file still being downloaded never move, so
+        with partial=True an index built from an earlier state of the same
+        file (same device and inode) is still returned for what it covers,
+        and a rebuild is requested.
+        """
+        try:
+            identity = file_identity(path)
+        except FileNotFoundError:
+            return None
+
+        index = self._keyframes.get(movie_id)
+        if index is None:
+            index = await asyncio.to_thread(KeyframeIndex.load, self.keyframes_sidecar(movie_id))
+            if index is None:
+                return None
+            self._remember_keyframes(movie_id, index)
+        else:
+            self._keyframes.move_to_end(movie_id)
+        if index.identity == identity:
+            return index
+        if partial and index.identity.split(":")[:2] == identity.split(":")[:2]:
+            self.rebuild(movie_id, path)
+            return index
+        return None
+
+    def rebuild(self, movie_id: str, path: str) -> None:
+        """
+        Queue extraction at most once per KEYFRAME_REBUILD_SECONDS per movie.
+
+        Every write to a file being downloaded changes its identity, and
+        extraction reads the whole file again, so seeking must not queue
+        it each time.
+        """
+        now = time.monotonic()
+        if now < self._rebuild_after.get(movie_id, 0):
+            return
+        self._rebuild_after[movie_id] = now + settings.KEYFRAME_REBUILD_SECONDS
+        self.enqueue(movie_id, path)
+
+    async def extract(self, movie_id: str, path: str) -> VideoMetadata:
+        """
+        Probe a file and index its keyframes, then cache and persist both.
+
+        Raises:
+            ProbeError: If ffprobe cannot read the file
+        """
+        identity = file_identity(path)
+        metadata = VideoMetadata.from_probe(identity, await probe_streams(path))
+        index = await build_keyframe_index(path, identity)
+        await asyncio.to_thread(self._write_sidecar, self.sidecar(movie_id), metadata)
+        await asyncio.to_thread(index.save, self.keyframes_sidecar(movie_id))
+        self._remember(metadata)
+        self._remember_keyframes(movie_id, index)
+
+        async with async_session_maker() as db:
+            await db.execute(
+                update(Video)
+                .where(
+                    Video.movie_id == movie_id,
+                    Video.file_path == path,
+                    Video.status == StatusType.READY,
+                )
+                .values(
+                    duration=int(metadata.duration) if metadata.duration else None,
+                    file_size=metadata.size or os.stat(path).st_size,
+                )
+            )
+            await db.commit()
+        return metadata
+
+    def enqueue(self, movie_id: str, path: str) -> None:
+        """Schedule extraction unless it is already queued."""
+        if movie_id in self._queued:
+            return
+        self._queued.add(movie_id)
+        self._queue.put_nowait((movie_id, path))
+
+    async def _worker(self) -> None:
+        while True:
+            movie_id, path = await self._queue.get()
+            try:
+                if await self.get(movie_id, path) is None:
+                    await self.extract(movie_id, path)
+            except (ProbeError, OSError) as e:
+                logger.warning("Probing %s failed: %s", movie_id, e)
+            except Exception:
+                logger.exception("Probing %s failed", movie_id)
+            finally:
+                self._queued.discard(movie_id)
+                self._queue.task_done()
+
+    async def backfill(self) -> None:
+        """Queue every ready video whose duration was never extracted."""
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(Video.movie_id, Video.file_path).where(
+                    Video.status == StatusType.READY, Video.duration.is_(None)
+                )
+            )
+            for movie_id, path in result.all():
+                self.enqueue(movie_id, path)
+
+    async def start(self) -> None:
+        """Start the probe workers and queue missing metadata."""
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(settings.PROBE_WORKERS)
+            ]
+        try:
+            await self.backfill()
+        except Exception:
+            logger.exception("Queueing missing video metadata failed")
+
+    async def stop(self) -> None:
+        """Stop the probe workers."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+metadata_store = MetadataStore()
@@ -0,0 +1,9 @@
+"""On-disk layout of the video store."""
+from pathlib import Path
+
+from app.core.config import settings
+
+
+def media_dir(movie_id: str) -> Path:
+    """Directory holding every generated file of a movie."""
+    return Path(settings.MEDIA_ROOT) / movie_id
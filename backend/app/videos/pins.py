@@ -0,0 +1,40 @@
+"""In-process registry of videos that must not be evicted."""
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class StreamPins:
+    """Reference count of active streams per movie in this worker."""
+
+    def __init__(self):
+        self._counts: Counter[str] = Counter()
+
+    def acquire(self, movie_id: str) -> None:
+        """Keep a movie's files on disk until the matching release()."""
+        self._counts[movie_id] += 1
+
+    def release(self, movie_id: str) -> None:
+        self._counts[movie_id] -= 1
+        if self._counts[movie_id] <= 0:
+            del self._counts[movie_id]
+
+    @contextmanager
+    def pin(self, movie_id: str) -> Iterator[None]:
+        """Keep a movie's files on disk for the duration of the block."""
+        self.acquire(movie_id)
+        try:
+            yield
+        finally:
+            self.release(movie_id)
+
+    def is_pinned(self, movie_id: str) -> bool:
+        """Check if a movie is currently streamed by this worker."""
+        return self._counts[movie_id] > 0
+
+    def pinned_ids(self) -> set[str]:
+        """Movies currently streamed by this worker."""
+        return set(self._counts)
+
+
+stream_pins = StreamPins()
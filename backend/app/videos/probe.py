@@ -0,0 +1,145 @@
+"""Source stream inspection with ffprobe."""
+import asyncio
+import json
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.videos.exceptions import ProbeError
+
+# Codecs every mainstream browser decodes inside an MP4 container
+MP4_VIDEO_CODECS = {"h264"}
+MP4_AUDIO_CODECS = {"aac", "mp3"}
+# 10-bit and 4:2:2/4:4:4 H.264 is not decoded by browsers, only 8-bit 4:2:0
+MP4_PIXEL_FORMATS = {"yuv420p", "yuvj420p"}
+
+# ffprobe reports format_name as a comma separated list of aliases
+MP4_CONTAINERS = {"mov", "mp4", "m4a", "3gp", "3g2", "mj2"}
+
+
+@dataclass
+class ProbeResult:
+    """Subset of ffprobe output needed to plan a conversion."""
+
+    container: str | None
+    video_codec: str | None
+    audio_codec: str | None
+    pix_fmt: str | None
+    duration: float | None
+    bit_rate: int | None
+    size: int | None
+    # Absolute stream indexes, to map exactly the streams described here
+    video_index: int | None = None
+    audio_index: int | None = None
+
+    @property
+    def is_mp4(self) -> bool:
+        """Check if the source container is already MP4."""
+        if not self.container:
+            return False
+        return bool(MP4_CONTAINERS.intersection(self.container.split(",")))
+
+    @property
+    def video_copyable(self) -> bool:
+        """Check if the video stream can be copied into an MP4 as is."""
+        return (
+            self.video_codec in MP4_VIDEO_CODECS
+            and (self.pix_fmt is None or self.pix_fmt in MP4_PIXEL_FORMATS)
+        )
+
+    @property
+    def audio_copyable(self) -> bool:
+        """Check if the audio stream can be copied into an MP4 as is (or is absent)."""
+        return self.audio_codec is None or self.audio_codec in MP4_AUDIO_CODECS
+
+    @property
+    def short_format(self) -> str | None:
+        """First container alias, short enough for Video.original_format."""
+        if not self.container:
+            return None
+        return self.container.split(",")[0][:10]
+
+
+def to_float(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_probe_output(data: dict) -> ProbeResult:
+    """Build a ProbeResult from ffprobe's JSON output."""
+    fmt = data.get("format", {})
+    streams = data.get("streams", [])
+
+    # Only the first stream of each kind is mapped into the output file
+    video = next((s for s in streams if s.get("codec_type") == "video"
+                  and not s.get("disposition", {}).get("attached_pic")), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    return ProbeResult(
+        container=fmt.get("format_name"),
+        video_codec=video.get("codec_name") if video else None,
+        audio_codec=audio.get("codec_name") if audio else None,
+        pix_fmt=video.get("pix_fmt") if video else None,
+        duration=to_float(fmt.get("duration")),
+        bit_rate=to_int(fmt.get("bit_rate")),
+        size=to_int(fmt.get("size")),
+        video_index=to_int(video.get("index")) if video else None,
+        audio_index=to_int(audio.get("index")) if audio else None,
+    )
+
+
+async def run_ffprobe(*args: str) -> dict:
+    """
+    Run ffprobe with JSON output.
+
+    Raises:
+        ProbeError: If ffprobe fails or returns unreadable output
+    """
+    process = await asyncio.create_subprocess_exec(
+        settings.FFPROBE_BINARY,
+        "-v", "error",
+        "-print_format", "json",
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise ProbeError(stderr.decode(errors="replace").strip() or "ffprobe failed")
+
+    try:
+        return json.loads(stdout)
+    except json.JSONDecodeError as e:
+        raise ProbeError(f"Invalid ffprobe output: {e}") from e
+
+
+async def probe_streams(path: str) -> dict:
+    """Raw ffprobe description of the container and every stream of a file."""
+    return await run_ffprobe("-show_format", "-show_streams", path)
+
+
+async def probe(path: str) -> ProbeResult:
+    """
+    Inspect the streams of a media file.
+
+    Args:
+        path: Path to the source file
+
+    Returns:
+        Parsed probe result
+
+    Raises:
+        ProbeError: If ffprobe fails or returns unreadable output
+    """
+    result = parse_probe_output(await probe_streams(path))
+    if result.video_codec is None:
+        raise ProbeError("No video stream found")
+    return result
@@ -0,0 +1,322 @@
+"""Progress fan-out across workers with write-behind persistence."""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator
+
+from sqlalchemy import bindparam, select, update
+
+from app.core.config import settings
+from app.db.session import async_session_maker, engine
+from app.models.video import StatusType, Video
+from app.videos.converter import ProgressCallback
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {StatusType.READY, StatusType.ERROR}
+
+# Postgres LISTEN/NOTIFY channel shared by every worker
+NOTIFY_CHANNEL = "video_progress"
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """Download or conversion state of a movie at one point in time."""
+
+    movie_id: str
+    status: StatusType
+    progress: int
+
+    @property
+    def is_final(self) -> bool:
+        """Check if no further event will follow."""
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["status"] = self.status.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ProgressEvent":
+        return cls(
+            movie_id=data["movie_id"],
+            status=StatusType(data["status"]),
+            progress=int(data["progress"]),
+        )
+
+
+class ProgressBroadcaster:
+    """Fans the events of one movie out to every subscriber."""
+
+    def __init__(self):
+        self.latest: ProgressEvent | None = None
+        # Monotonic time of the last event, to tell when to poll the database
+        self.published_at = time.monotonic()
+        self._subscribers: set[asyncio.Queue] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: ProgressEvent) -> None:
+        """Deliver an event; slow subscribers only ever see the latest one."""
+        self.latest = event
+        self.published_at = time.monotonic()
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def add(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        if self.latest is not None:
+            queue.put_nowait(self.latest)
+        self._subscribers.add(queue)
+        return queue
+
+    def remove(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+
+class ProgressHub:
+    """
+    Single entry point for download and conversion progress.
+
+    Every report is published immediately to the movie's broadcaster in
+    this worker, and relayed to the other workers through Postgres
+    NOTIFY on a connection this hub keeps listening on. Relayed events
+    are coalesced per movie over PROGRESS_NOTIFY_SECONDS, so a fast
+    download does not flood the channel. Movies with subscribers that
+    heard nothing for SSE_KEEPALIVE_SECONDS have Video.status and progress
+    read back in one query per worker, and any change is published, so
+    subscribers still end if a notification was lost.
+
+    Download progress is also buffered and written to Video.progress in
+    one batched UPDATE per flush interval (write-behind), keeping only
+    the latest value per movie. Status transitions are committed by the
+    caller, not here.
+    """
+
+    def __init__(self):
+        self._broadcasters: dict[str, ProgressBroadcaster] = {}
+        self._pending: dict[str, int] = {}
+        self._task: asyncio.Task | None = None
+        # Tells this worker's own notifications apart from the others'
+        self.worker_id = uuid.uuid4().hex
+        self._outbox: dict[str, ProgressEvent] = {}
+        self._outbox_ready = asyncio.Event()
+        self._listener: asyncio.Task | None = None
+        self._poller: asyncio.Task | None = None
+
+    def latest(self, movie_id: str) -> ProgressEvent | None:
+        """Last event seen by this worker for a movie, if any."""
+        broadcaster = self._broadcasters.get(movie_id)
+        return broadcaster.latest if broadcaster else None
+
+    def _publish(self, event: ProgressEvent) -> None:
+        """Deliver an event to the subscribers of this worker."""
+        broadcaster = self._broadcasters.get(event.movie_id)
+        if broadcaster is None:
+            broadcaster = self._broadcasters[event.movie_id] = ProgressBroadcaster()
+        broadcaster.publish(event)
+        if event.is_final and not broadcaster.subscriber_count:
+            del self._broadcasters[event.movie_id]
+
+    def report(self, movie_id: str, status: StatusType, progress: int) -> None:
+        """Publish a progress update to every worker and queue it for persistence."""
+        event = ProgressEvent(movie_id=movie_id, status=status, progress=progress)
+        self._publish(event)
+        self._outbox[movie_id] = event
+        self._outbox_ready.set()
+        if status == StatusType.DOWNLOADING:
+            self._pending[movie_id] = progress
+
+    def reporter(self, movie_id: str, status: StatusType) -> ProgressCallback:
+        """Progress callback for a long running stage of a movie."""
+
+        async def on_progress(progress: int) -> None:
+            self.report(movie_id, status, progress)
+
+        return on_progress
+
+    async def subscribe(
+        self, movie_id: str, initial: ProgressEvent | None = None
+    ) -> AsyncIterator[ProgressEvent | None]:
+        """
+        Yield events of a movie until it is ready or failed.
+
+        `initial` seeds a broadcaster this worker has not seen any event
+        for yet. None is yielded after SSE_KEEPALIVE_SECONDS of silence so
+        the caller can keep the connection alive; the database is polled
+        for all subscribers at once by _poll_silent, not here.
+        """
+        broadcaster = self._broadcasters.get(movie_id)
+        if broadcaster is None:
+            broadcaster = self._broadcasters[movie_id] = ProgressBroadcaster()
+        if broadcaster.latest is None and initial is not None:
+            broadcaster.latest = initial
+
+        queue = broadcaster.add()
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=settings.SSE_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event.is_final:
+                    return
+        finally:
+            broadcaster.remove(queue)
+            if not broadcaster.subscriber_count and (
+                broadcaster.latest is None or broadcaster.latest.is_final
+            ):
+                self._broadcasters.pop(movie_id, None)
+
+    async def _poll_silent(self) -> None:
+        """Publish the database state of subscribed movies without recent events."""
+        silent_since = time.monotonic() - settings.SSE_KEEPALIVE_SECONDS
+        movie_ids = [
+            movie_id
+            for movie_id, broadcaster in self._broadcasters.items()
+            if broadcaster.subscriber_count and broadcaster.published_at <= silent_since
+        ]
+        if not movie_ids:
+            return
+
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(Video.movie_id, Video.status, Video.progress).where(
+                    Video.movie_id.in_(movie_ids)
+                )
+            )
+            rows = result.all()
+        for movie_id, status, progress in rows:
+            event = ProgressEvent(
+                movie_id=movie_id, status=StatusType(status), progress=progress or 0
+            )
+            broadcaster = self._broadcasters.get(movie_id)
+            if broadcaster is not None and event != broadcaster.latest:
+                self._publish(event)
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        """asyncpg listener: publish an event relayed by another worker."""
+        try:
+            data = json.loads(payload)
+            if data.pop("worker") == self.worker_id:
+                return
+            event = ProgressEvent.from_dict(data)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed progress notification %r", payload)
+            return
+        self._publish(event)
+
+    async def _relay(self, driver) -> None:
+        """Send the events reported since the last call as NOTIFY payloads."""
+        try:
+            await asyncio.wait_for(
+                self._outbox_ready.wait(), timeout=settings.SSE_KEEPALIVE_SECONDS
+            )
+        except asyncio.TimeoutError:
+            return
+        self._outbox_ready.clear()
+        outbox, self._outbox = self._outbox, {}
+        for event in outbox.values():
+            payload = json.dumps({"worker": self.worker_id, **event.to_dict()})
+            await driver.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, payload)
+        # Later reports of the same movie are coalesced meanwhile
+        await asyncio.sleep(settings.PROGRESS_NOTIFY_SECONDS)
+
+    async def _listen(self) -> None:
+        """Keep a connection listening on the channel, relaying our own events on it."""
+        while True:
+            try:
+                async with engine.connect() as connection:
+                    raw = await connection.get_raw_connection()
+                    driver = raw.driver_connection
+                    await driver.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                    try:
+                        while not driver.is_closed():
+                            await self._relay(driver)
+                    finally:
+                        if not driver.is_closed():
+                            await driver.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Progress notification connection failed")
+                await asyncio.sleep(settings.PROGRESS_FLUSH_SECONDS)
+
+    async def flush(self) -> None:
+        """Persist buffered download progress with a single batched UPDATE."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+
+        table = Video.__table__
+        statement = (
+            update(table)
+            .where(table.c.movie_id == bindparam("b_movie_id"))
+            .values(progress=bindparam("b_progress"))
+        )
+        params = [
+            {"b_movie_id": movie_id, "b_progress": progress}
+            for movie_id, progress in pending.items()
+        ]
+        try:
+            async with async_session_maker() as db:
+                connection = await db.connection()
+                await connection.execute(statement, params)
+                await db.commit()
+        except Exception:
+            # Put the values back unless a newer report superseded them
+            for movie_id, progress in pending.items():
+                self._pending.setdefault(movie_id, progress)
+            raise
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.PROGRESS_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing video progress failed")
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.SSE_KEEPALIVE_SECONDS)
+            try:
+                await self._poll_silent()
+            except Exception:
+                logger.exception("Polling video progress failed")
+
+    def start(self) -> None:
+        """Start the periodic write-behind flush, the cross-worker relay and the poll."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        if self._poller is None:
+            self._poller = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        """Stop the loops and persist what is still buffered."""
+        for task in (self._task, self._listener, self._poller):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._listener = self._poller = None
+        await self.flush()
+
+
+progress_hub = ProgressHub()
@@ -0,0 +1,102 @@
+"""Adaptive read-ahead for sequential Range requests."""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.videos.chunk_cache import ChunkCache, chunk_cache
+from app.videos.exceptions import ShortRead
+
+logger = logging.getLogger(__name__)
+
+SessionKey = tuple[int, str]
+
+
+@dataclass
+class ReadAheadSession:
+    """Access pattern of one viewer on one video."""
+
+    next_offset: int
+    window: int = 0
+    last_seen: float = field(default_factory=time.monotonic)
+    task: asyncio.Task | None = None
+
+
+class ReadAhead:
+    """
+    Prefetches the next window of a video into the chunk cache.
+
+    Players fetch a movie as many small sequential Range requests. When a
+    viewer's request starts where the previous one ended, the following
+    window is read into the chunk cache in the background, so the next
+    request is a memory hit. The window doubles while access stays
+    sequential, up to READAHEAD_MAX_BYTES; a seek resets it.
+    """
+
+    def __init__(self, cache: ChunkCache = chunk_cache):
+        self.cache = cache
+        self._sessions: dict[SessionKey, ReadAheadSession] = {}
+        self._last_expiry = time.monotonic()
+
+    def _is_sequential(self, session: ReadAheadSession, start: int) -> bool:
+        # Players often re-request the tail of the previous range; tolerate
+        # an overlap or gap of one chunk
+        return abs(start - session.next_offset) <= self.cache.chunk_size
+
+    def on_request(
+        self, user_id: int, movie_id: str, path: str, start: int, end: int, size: int
+    ) -> int:
+        """
+        Record a Range request and prefetch after it if access is sequential.
+
+        Returns:
+            The read-ahead window now in effect, in bytes
+        """
+        self._expire()
+        key = (user_id, movie_id)
+        session = self._sessions.get(key)
+
+        if session is None or not self._is_sequential(session, start):
+            if session is not None and session.task is not None:
+                session.task.cancel()
+            self._sessions[key] = ReadAheadSession(next_offset=end + 1)
+            return 0
+
+        if session.window:
+            session.window = min(session.window * 2, settings.READAHEAD_MAX_BYTES)
+        else:
+            session.window = settings.READAHEAD_MIN_BYTES
+        session.next_offset = end + 1
+        session.last_seen = time.monotonic()
+
+        prefetch_end = min(end + session.window, size - 1)
+        if prefetch_end > end and (session.task is None or session.task.done()):
+            session.task = asyncio.create_task(self._prefetch(path, end + 1, prefetch_end))
+        return session.window
+
+    async def _prefetch(self, path: str, start: int, end: int) -> None:
+        chunk_size = self.cache.chunk_size
+        offset = start - start % chunk_size
+        try:
+            while offset <= end:
+                await self.cache.get_chunk(path, offset)
+                offset += chunk_size
+        except (OSError, ShortRead) as e:
+            logger.debug("Read-ahead of %s stopped: %s", path, e)
+        except Exception:
+            logger.exception("Read-ahead of %s failed", path)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        if now - self._last_expiry < settings.READAHEAD_SESSION_TTL_SECONDS:
+            return
+        self._last_expiry = now
+        deadline = now - settings.READAHEAD_SESSION_TTL_SECONDS
+        for key in [k for k, s in self._sessions.items() if s.last_seen < deadline]:
+            session = self._sessions.pop(key)
+            if session.task is not None:
+                session.task.cancel()
+
+
+read_ahead = ReadAhead()
@@ -0,0 +1,361 @@
+"""Video API routes."""
+import json
+import logging
+import os
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import get_current_active_user
+from app.db.session import get_db
+from app.history.session_tracker import watch_sessions
+from app.models.models import User
+from app.models.video import StatusType, Video
+from app.videos.chunk_cache import chunk_cache
+from app.videos.exceptions import RangeNotSatisfiable
+from app.videos.hls import (
+    INIT_SEGMENT_NAME,
+    hls_dir,
+    is_finished,
+    is_segment_name,
+    read_playlist,
+)
+from app.videos.metadata import metadata_store
+from app.videos.pins import stream_pins
+from app.videos.progress import ProgressEvent, progress_hub
+from app.videos.readahead import read_ahead
+from app.videos.schemas import SeekResponse, VideoMetadataResponse, VideoResponse
+from app.videos.service import VideoService, video_jobs
+from app.videos.streaming import ZeroCopyStreamingResponse, content_type, parse_range
+from app.videos.thumbnails import VTT_NAME, is_thumbnail_name, thumbnails_dir
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/videos", tags=["videos"])
+
+
+async def get_video_or_404(movie_id: str, db: AsyncSession) -> Video:
+    """Get the video of a movie or raise 404."""
+    video = await VideoService.get_by_movie_id(db, movie_id)
+    if not video:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Video not found",
+        )
+    return video
+
+
+@router.get("/{movie_id}", response_model=VideoResponse)
+async def get_video(
+    movie_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> Video:
+    """Get video status of a movie."""
+    return await get_video_or_404(movie_id, db)
+
+
+@router.post(
+    "/{movie_id}/convert",
+    response_model=VideoResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def convert_video(
+    movie_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> Video:
+    """
+    Probe a downloaded video and convert it in the background if needed.
+
+    Concurrent requests for the same movie join the conversion already
+    running instead of starting another one. A video left CONVERTING by a
+    worker that died, whose lock went away with its session, is converted
+    again.
+    """
+    video = await get_video_or_404(movie_id, db)
+
+    if video.status == StatusType.READY:
+        return video
+    if video.status == StatusType.CONVERTING:
+        if await video_jobs.is_running(movie_id):
+            return video
+        logger.warning("Conversion of %s was abandoned, restarting it", movie_id)
+
+    if not video.is_complete:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Download is not finished",
+        )
+
+    video_jobs.start(
+        movie_id,
+        lambda flight: VideoService.process(movie_id),
+    )
+    return video
+
+
+@router.get("/{movie_id}/metadata", response_model=VideoMetadataResponse)
+async def get_video_metadata(
+    movie_id: str,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """
+    Get the container and stream metadata of a ready video.
+
+    Metadata comes from the probe cache; when it has not been extracted
+    yet, extraction is queued and 202 is returned without any metadata.
+    """
+    video = await get_video_or_404(movie_id, db)
+    if video.status != StatusType.READY:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Video is not ready",
+        )
+
+    metadata = await metadata_store.get(movie_id, video.file_path)
+    if metadata is None:
+        metadata_store.enqueue(movie_id, video.file_path)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"movie_id": movie_id, "ready": False}
+    return {"movie_id": movie_id, "ready": True, **metadata.to_dict()}
+
+
+@router.get("/{movie_id}/seek", response_model=SeekResponse)
+async def seek_video(
+    movie_id: str,
+    response: Response,
+    t: float = Query(..., ge=0, description="Target time in seconds"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """
+    Get the byte offset of the last keyframe at or before a time.
+
+    The player can then issue a single Range request from that offset
+    instead of probing the file. While the video is still downloading, an
+    index built from an earlier state of the file answers up to its last
+    keyframe; later times get a 202 while the index is rebuilt.
+    """
+    video = await get_video_or_404(movie_id, db)
+    if not video.is_streamable:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Video is not streamable yet",
+        )
+
+    partial = video.status != StatusType.READY
+    index = await metadata_store.keyframes(movie_id, video.file_path, partial=partial)
+    keyframe = None
+    if index is not None and (not partial or index.covers(t)):
+        keyframe = index.lookup(t)
+    if keyframe is None:
+        if partial:
+            metadata_store.rebuild(movie_id, video.file_path)
+        else:
+            metadata_store.enqueue(movie_id, video.file_path)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"movie_id": movie_id, "ready": False}
+    time, offset = keyframe
+    return {"movie_id": movie_id, "ready": True, "time": time, "offset": offset}
+
+
+@router.get("/{movie_id}/hls/index.m3u8")
+async def get_hls_playlist(
+    movie_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Get the HLS playlist of a movie.
+
+    While the video is converting the playlist grows as segments are
+    written, so playback can start as soon as the first segment exists.
+    Segments are served by get_hls_segment, behind the same authentication.
+    """
+    video = await get_video_or_404(movie_id, db)
+    if video.status not in (StatusType.CONVERTING, StatusType.READY):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Video is not being converted",
+        )
+
+    playlist = await read_playlist(movie_id)
+    if playlist is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Playlist not available yet",
+        )
+
+    # A live playlist must be refetched by the player, a finished one is immutable
+    cache_control = "private, max-age=3600" if is_finished(playlist) else "no-cache"
+    return Response(
+        content=playlist,
+        media_type="application/vnd.apple.mpegurl",
+        headers={"Cache-Control": cache_control},
+    )
+
+
+@router.get("/{movie_id}/hls/{name}")
+async def get_hls_segment(
+    movie_id: str,
+    name: str,
+    current_user: User = Depends(get_current_active_user),
+) -> FileResponse:
+    """Get the init segment or a media segment of a movie's HLS playlist."""
+    if not is_segment_name(name):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Segment not found",
+        )
+    path = hls_dir(movie_id) / name
+    if not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Segment not found",
+        )
+    # Segments only appear once complete and never change afterwards
+    return FileResponse(
+        path,
+        media_type="video/mp4" if name == INIT_SEGMENT_NAME else "video/iso.segment",
+        headers={"Cache-Control": "private, max-age=3600"},
+    )
+
+
+@router.get("/{movie_id}/thumbnails/{name}")
+async def get_thumbnails(
+    movie_id: str,
+    name: str,
+    current_user: User = Depends(get_current_active_user),
+) -> FileResponse:
+    """Get the WebVTT hover-scrub map of a movie or one of its sprite sheets."""
+    if not is_thumbnail_name(name):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thumbnail not found",
+        )
+    path = thumbnails_dir(movie_id) / name
+    if not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thumbnail not found",
+        )
+    media_type = "text/vtt" if name == VTT_NAME else "image/jpeg"
+    return FileResponse(path, media_type=media_type, headers={"Cache-Control": "private, no-cache"})
+
+
+@router.get("/{movie_id}/progress")
+async def stream_progress(
+    movie_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> StreamingResponse:
+    """
+    Server-sent events with the download and conversion progress of a movie.
+
+    Events come from the progress hub, which relays them between workers,
+    so the subscriber does not have to be on the worker doing the work.
+    The database is only read to start, and by one query per worker per
+    keep-alive interval for all silent movies, whatever the number of
+    subscribers. The stream ends once the video is ready or failed.
+    """
+    initial = progress_hub.latest(movie_id)
+    if initial is None:
+        video = await get_video_or_404(movie_id, db)
+        initial = ProgressEvent(
+            movie_id=movie_id, status=StatusType(video.status), progress=video.progress
+        )
+
+    async def events() -> AsyncIterator[str]:
+        async for event in progress_hub.subscribe(movie_id, initial):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: progress\ndata: {json.dumps(event.to_dict())}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{movie_id}/stream")
+async def stream_video(
+    movie_id: str,
+    range_header: str | None = Header(None, alias="range"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> ZeroCopyStreamingResponse:
+    """
+    Stream a video with HTTP Range support.
+
+    Ready videos are served through the shared chunk cache, so viewers of
+    the same title share disk reads, and sequential requests of a viewer
+    prefetch the following window into it. The video is pinned against eviction
+    from before its size is read until the response is over.
+    """
+    video = await get_video_or_404(movie_id, db)
+    if not video.is_streamable:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Video is not streamable yet",
+        )
+
+    # Pinned before the size is taken: eviction must not delete the file
+    # between the stat that sets Content-Length and the last byte sent
+    stream_pins.acquire(movie_id)
+    try:
+        path = video.file_path
+        try:
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Video file not found",
+            )
+        if not size:
+            # Nothing written yet, and no range of it can be served
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Video is not streamable yet",
+            )
+
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{size}"},
+            )
+    except Exception:
+        stream_pins.release(movie_id)
+        raise
+
+    start, end = byte_range or (0, size - 1)
+    served_seconds = None
+    if video.duration:
+        served_seconds = (end - start + 1) / size * video.duration
+    watch_sessions.record(current_user.id, movie_id, served_seconds)
+    cacheable = video.status == StatusType.READY
+    if cacheable:
+        read_ahead.on_request(current_user.id, movie_id, path, start, end, size)
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(end - start + 1),
+    }
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return ZeroCopyStreamingResponse(
+        chunk_cache.read(path, start, end, cacheable=cacheable),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+        media_type=content_type(path),
+        headers=headers,
+        on_close=lambda: stream_pins.release(movie_id),
+    )
@@ -0,0 +1,57 @@
+"""Video Pydantic schemas using v2."""
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class VideoResponse(BaseModel):
+    """Schema for video response."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    movie_id: str
+    status: str
+    progress: int
+    original_format: str | None = None
+    converted_format: str | None = None
+    video_codec: str | None = None
+    audio_codec: str | None = None
+    conversion_mode: str | None = None
+    file_size: int | None = None
+    duration: int | None = None
+    downloaded_at: datetime | None = None
+    last_watched_at: datetime | None = None
+
+
+class StreamInfoResponse(BaseModel):
+    """Schema for one stream of a video file."""
+
+    index: int
+    codec_type: str | None = None
+    codec_name: str | None = None
+    language: str | None = None
+    width: int | None = None
+    height: int | None = None
+    channels: int | None = None
+    bit_rate: int | None = None
+
+
+class VideoMetadataResponse(BaseModel):
+    """Schema for probed video metadata, empty until extracted."""
+
+    movie_id: str
+    ready: bool
+    duration: float | None = None
+    bit_rate: int | None = None
+    size: int | None = None
+    streams: list[StreamInfoResponse] = []
+
+
+class SeekResponse(BaseModel):
+    """Schema for the keyframe to seek to, empty until indexed."""
+
+    movie_id: str
+    ready: bool
+    time: float | None = None
+    offset: int | None = None
@@ -0,0 +1,164 @@
+"""Video service layer for business logic."""
+import logging
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import utcnow
+from app.db.session import async_session_maker
+from app.models.video import ConversionMode, StatusType, Video
+from app.torrent.bitfield import sidecar_path
+from app.utils.single_flight import SingleFlight
+from app.videos.cache_manager import cache_manager
+from app.videos.converter import convert, plan_conversion, segment
+from app.videos.exceptions import ConversionError, ProbeError, VideoNotFoundException
+from app.videos.hls import hls_dir
+from app.videos.metadata import metadata_store
+from app.videos.paths import media_dir
+from app.videos.probe import ProbeResult, probe
+from app.videos.progress import progress_hub
+from app.videos.thumbnails import thumbnail_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class VideoService:
+    """Service layer for video operations."""
+
+    @staticmethod
+    async def get_by_movie_id(db: AsyncSession, movie_id: str) -> Video | None:
+        """Get video by movie ID."""
+        result = await db.execute(select(Video).where(Video.movie_id == movie_id))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def prepare(db: AsyncSession, video: Video) -> Video:
+        """
+        Probe a downloaded video and make it browser playable.
+
+        The probe result is recorded on the row first, then the file is
+        remuxed, partially or fully transcoded depending on its streams.
+
+        Raises:
+            ProbeError: If the source cannot be inspected
+            ConversionError: If ffmpeg fails
+        """
+        # 1) Inspect source streams
+        result = await probe(video.file_path)
+        plan = plan_conversion(result)
+
+        video.original_format = result.short_format
+        video.video_codec = result.video_codec
+        video.audio_codec = result.audio_codec
+        video.conversion_mode = plan.mode
+        video.status = StatusType.CONVERTING
+        if result.duration:
+            video.duration = int(result.duration)
+        await db.commit()
+        progress_hub.report(video.movie_id, StatusType.CONVERTING, 0)
+
+        # 2) Convert, or serve the source as is when it is already playable
+        source = None
+        if plan.mode != ConversionMode.NONE:
+            logger.info("Converting %s (%s)", video.movie_id, plan.mode.value)
+            destination = media_dir(video.movie_id) / "video.mp4"
+            await convert(
+                video.file_path,
+                destination,
+                plan,
+                duration=result.duration,
+                on_progress=progress_hub.reporter(video.movie_id, StatusType.CONVERTING),
+                hls_directory=hls_dir(video.movie_id),
+            )
+            await VideoService.verify_output(destination, result)
+            source, video.file_path = video.file_path, str(destination)
+        else:
+            # Already playable as is, only the HLS playlist is written
+            try:
+                await segment(
+                    video.file_path,
+                    hls_dir(video.movie_id),
+                    plan,
+                    duration=result.duration,
+                    on_progress=progress_hub.reporter(video.movie_id, StatusType.CONVERTING),
+                )
+            except ConversionError as e:
+                # Progressive playback through /stream still works
+                logger.warning("Segmenting %s failed: %s", video.movie_id, e)
+
+        # 3) Mark ready
+        video.converted_format = "mp4"
+        video.file_size = Path(video.file_path).stat().st_size
+        video.status = StatusType.READY
+        video.downloaded_at = video.downloaded_at or utcnow()
+        # Restarts the eviction clock, a download may have taken days
+        video.last_watched_at = utcnow()
+        await db.commit()
+        if source is not None:
+            # The row points at the converted copy now, the download is not needed
+            VideoService.remove_source(source)
+        progress_hub.report(video.movie_id, StatusType.READY, 100)
+        metadata_store.enqueue(video.movie_id, video.file_path)
+        thumbnail_jobs.enqueue(video.movie_id, video.file_path)
+        return video
+
+    @staticmethod
+    async def verify_output(path: Path, source: ProbeResult) -> None:
+        """
+        Check that a converted file is readable and as long as its source.
+
+        Raises:
+            ConversionError: If the output is unreadable or truncated
+        """
+        try:
+            output = await probe(str(path))
+        except ProbeError as e:
+            raise ConversionError(f"Unreadable output: {e}") from e
+        if source.duration and output.duration is not None:
+            # Containers round differently, allow a second of slack
+            if output.duration < source.duration - 1:
+                raise ConversionError(
+                    f"Output is {output.duration:.1f}s long, source {source.duration:.1f}s"
+                )
+
+    @staticmethod
+    def remove_source(path: str) -> None:
+        """Delete a downloaded file and its bitfield once it has been converted."""
+        for leftover in (Path(path), sidecar_path(path)):
+            try:
+                leftover.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning("Could not remove %s: %s", leftover, e)
+
+    @staticmethod
+    async def process(movie_id: str) -> None:
+        """
+        Background task: prepare a video in its own session.
+
+        Runs under video_jobs, so another worker may have finished the same
+        video while this one waited for the lock; the row is re-read first.
+        Only READY is final: holding the lock means a CONVERTING row was
+        left by a worker that died mid-conversion, and it is redone.
+        """
+        async with async_session_maker() as db:
+            video = await VideoService.get_by_movie_id(db, movie_id)
+            if not video:
+                raise VideoNotFoundException(f"No video for movie {movie_id}")
+            if video.status == StatusType.READY:
+                return
+            try:
+                # The converted copy is at most about the size of the source
+                await cache_manager.ensure_space(video.file_size or 0)
+                await VideoService.prepare(db, video)
+            except (ProbeError, ConversionError, OSError) as e:
+                logger.error("Preparing video %s failed: %s", movie_id, e)
+                await db.rollback()
+                video.status = StatusType.ERROR
+                video.last_watched_at = utcnow()
+                await db.commit()
+                progress_hub.report(movie_id, StatusType.ERROR, video.progress)
+
+
+# Download and conversion work per movie, deduplicated across requests and workers
+video_jobs = SingleFlight("video")
@@ -0,0 +1,79 @@
+"""HTTP Range streaming of video files."""
+import mimetypes
+import re
+from typing import Callable
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.videos.exceptions import RangeNotSatisfiable
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single byte range against a file size.
+
+    Returns:
+        Inclusive (start, end), or None to send the whole file
+
+    Raises:
+        RangeNotSatisfiable: If the range is malformed or outside the file
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        raise RangeNotSatisfiable(header)
+
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def content_type(path: str) -> str:
+    """MIME type of a video file, from its extension."""
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+class ZeroCopyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that sends memoryview chunks as they are.
+
+    Starlette would call .encode() on anything that is not bytes; the ASGI
+    servers we run on accept any bytes-like body, so chunk cache slices go
+    to the transport without a copy. `on_close` runs once the response is
+    over, whether it was sent in full, failed or was never started, so a
+    resource taken by the route before the body can be released.
+    """
+
+    def __init__(self, *args, on_close: Callable[[], None] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+
+    async def stream_response(self, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        async for chunk in self.body_iterator:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -0,0 +1,255 @@
+"""Hover-scrub preview sprite sheets generated in a low priority process pool."""
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+from app.models.video import StatusType, Video
+from app.videos.exceptions import ConversionError
+from app.videos.paths import media_dir
+
+logger = logging.getLogger(__name__)
+
+VTT_NAME = "thumbnails.vtt"
+SPRITE_PATTERN = "sprite_%03d.jpg"
+_SPRITE_NAME = re.compile(r"^sprite_\d{3,}\.jpg$")
+
+
+@dataclass(frozen=True)
+class SpriteLayout:
+    """How thumbnails are sampled and packed into sheets."""
+
+    interval: int
+    width: int
+    columns: int
+    rows: int
+
+    @classmethod
+    def from_settings(cls) -> "SpriteLayout":
+        return cls(
+            interval=settings.THUMBNAIL_INTERVAL_SECONDS,
+            width=settings.THUMBNAIL_WIDTH,
+            columns=settings.THUMBNAIL_COLUMNS,
+            rows=settings.THUMBNAIL_ROWS,
+        )
+
+    @property
+    def per_sheet(self) -> int:
+        return self.columns * self.rows
+
+    def thumbnail_height(self, width: int, height: int) -> int:
+        """Height keeping the source aspect ratio, rounded to even for the encoder."""
+        return max(2, round(self.width * height / width / 2) * 2)
+
+
+def thumbnails_dir(movie_id: str) -> Path:
+    """Directory holding the sprite sheets and WebVTT map of a movie."""
+    return media_dir(movie_id) / "thumbnails"
+
+
+def is_thumbnail_name(name: str) -> bool:
+    """Check if a requested file name is the WebVTT map or a sprite sheet."""
+    return name == VTT_NAME or _SPRITE_NAME.match(name) is not None
+
+
+def vtt_timestamp(seconds: float) -> str:
+    """Format seconds as a WebVTT timestamp (HH:MM:SS.mmm)."""
+    millis = round(seconds * 1000)
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+
+def build_vtt(duration: float, layout: SpriteLayout, height: int) -> str:
+    """WebVTT map from time ranges to tiles of the sprite sheets."""
+    lines = ["WEBVTT", ""]
+    count = math.ceil(duration / layout.interval)
+    for i in range(count):
+        start = i * layout.interval
+        end = min(start + layout.interval, duration)
+        sheet, tile = divmod(i, layout.per_sheet)
+        row, column = divmod(tile, layout.columns)
+        lines += [
+            f"{vtt_timestamp(start)} --> {vtt_timestamp(end)}",
+            f"{SPRITE_PATTERN % (sheet + 1)}"
+            f"#xywh={column * layout.width},{row * height},{layout.width},{height}",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def _lower_priority() -> None:
+    """Pool initializer: ffmpeg children inherit the niceness of the worker."""
+    os.nice(settings.THUMBNAIL_NICENESS)
+
+
+def generate_sprites(
+    source: str, directory: str, layout: SpriteLayout, ffmpeg: str, ffprobe: str
+) -> int:
+    """
+    Render the sprite sheets and WebVTT map of a video (runs in a pool process).
+
+    Everything is rendered into a temporary directory swapped in at the
+    end, so the VTT never points at sheets that do not exist yet.
+
+    Returns:
+        Number of thumbnails
+
+    Raises:
+        ConversionError: If ffprobe or ffmpeg fails
+    """
+    probe = subprocess.run(
+        [
+            ffprobe, "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=width,height:format=duration",
+            "-of", "json",
+            source,
+        ],
+        capture_output=True,
+    )
+    try:
+        data = json.loads(probe.stdout)
+        stream = data["streams"][0]
+        width, height = int(stream["width"]), int(stream["height"])
+        duration = float(data["format"]["duration"])
+    except (ValueError, KeyError, IndexError) as e:
+        raise ConversionError(
+            probe.stderr.decode(errors="replace").strip() or f"Cannot probe {source}: {e}"
+        )
+
+    tile_height = layout.thumbnail_height(width, height)
+    target = Path(directory)
+    tmp_dir = target.with_name(target.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    filters = (
+        f"fps=1/{layout.interval},"
+        f"scale={layout.width}:{tile_height},"
+        f"tile={layout.columns}x{layout.rows}"
+    )
+    result = subprocess.run(
+        [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-nostats",
+            # Only keyframes are decoded: thumbnails need no exact timing
+            "-skip_frame", "nokey",
+            "-i", source,
+            "-an", "-sn",
+            "-vf", filters,
+            "-vsync", "vfr",
+            "-q:v", "5",
+            str(tmp_dir / SPRITE_PATTERN),
+        ],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise ConversionError(result.stderr.decode(errors="replace").strip() or "ffmpeg failed")
+
+    (tmp_dir / VTT_NAME).write_text(build_vtt(duration, layout, tile_height))
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp_dir, target)
+    return math.ceil(duration / layout.interval)
+
+
+class ThumbnailJobs:
+    """
+    Sprite sheet generation for ready videos.
+
+    Jobs run in a small process pool whose workers are reniced, so
+    thumbnail extraction only uses CPU left over by active transcodes and
+    never slows down a conversion a viewer is waiting for. A movie is
+    queued at most once at a time.
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.workers = workers or settings.THUMBNAIL_WORKERS
+        self._executor: ProcessPoolExecutor | None = None
+        self._jobs: dict[str, asyncio.Task] = {}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process running an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_lower_priority,
+            )
+        return self._executor
+
+    @staticmethod
+    def vtt_path(movie_id: str) -> Path:
+        return thumbnails_dir(movie_id) / VTT_NAME
+
+    def enqueue(self, movie_id: str, path: str) -> None:
+        """Queue sprite generation for a movie unless already queued."""
+        if movie_id in self._jobs:
+            return
+        self._jobs[movie_id] = asyncio.create_task(self._run(movie_id, path))
+
+    async def _run(self, movie_id: str, path: str) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            count = await loop.run_in_executor(
+                self._pool(),
+                generate_sprites,
+                path,
+                str(thumbnails_dir(movie_id)),
+                SpriteLayout.from_settings(),
+                settings.FFMPEG_BINARY,
+                settings.FFPROBE_BINARY,
+            )
+            logger.info("Generated %d thumbnails for %s", count, movie_id)
+        except (ConversionError, OSError) as e:
+            logger.warning("Thumbnails of %s failed: %s", movie_id, e)
+        except Exception:
+            logger.exception("Thumbnails of %s failed", movie_id)
+        finally:
+            self._jobs.pop(movie_id, None)
+
+    async def backfill(self) -> None:
+        """Queue every ready video that has no thumbnails yet."""
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(Video.movie_id, Video.file_path).where(Video.status == StatusType.READY)
+            )
+            rows = result.all()
+        missing = await asyncio.to_thread(
+            lambda: [(m, p) for m, p in rows if not self.vtt_path(m).exists()]
+        )
+        for movie_id, path in missing:
+            self.enqueue(movie_id, path)
+
+    async def start(self) -> None:
+        """Queue thumbnails missing since the last run."""
+        try:
+            await self.backfill()
+        except Exception:
+            logger.exception("Queueing missing thumbnails failed")
+
+    async def stop(self) -> None:
+        """Drop queued jobs and shut the pool down."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for task in list(self._jobs.values()):
+            task.cancel()
+        await asyncio.gather(*self._jobs.values(), return_exceptions=True)
+        self._jobs = {}
+
+
+thumbnail_jobs = ThumbnailJobs()
@@ -0,0 +1,112 @@
+"""
+Keyset vs OFFSET pagination of a movie's comment thread.
+
+Seeds a temporary copy of comments (same columns and indexes, so the
+migrations must be applied) with one long thread, then times fetching a
+page at increasing depths: the keyset listing used by the comments
+endpoint, author projection included, and a classic OFFSET query. The
+temporary table shadows the real one for the benchmark's connection only
+and disappears with it.
+
+Run from backend/ against a disposable database (settings are read from
+.env as usual):
+
+    python -m benchmarks.comments --comments 100000 --authors 1000
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.comments.service import CommentService
+from app.db.session import engine
+from app.models.comment import Comment
+from app.utils.cursor import encode_cursor
+from benchmarks.continue_watching import timed
+
+MOVIE_ID = "tt-benchmark"
+
+
+async def seed(db: AsyncSession, comments: int, authors: int) -> None:
+    await db.execute(text(
+        "CREATE TEMP TABLE comments "
+        "(LIKE public.comments INCLUDING DEFAULTS INCLUDING INDEXES)"
+    ))
+    # One comment per second, authors taken round robin
+    await db.execute(
+        text(
+            "INSERT INTO comments (id, movie_id, user_id, content, created_at, updated_at) "
+            "SELECT g, :movie_id, g % :authors + 1, repeat('x', 200), "
+            "now() - g * interval '1 second', now() - g * interval '1 second' "
+            "FROM generate_series(1, :comments) AS g"
+        ),
+        {"movie_id": MOVIE_ID, "comments": comments, "authors": authors},
+    )
+    await db.execute(text("ANALYZE comments"))
+
+
+async def cursor_at(db: AsyncSession, offset: int) -> str | None:
+    """Cursor a client would hold after reading `offset` comments."""
+    if offset == 0:
+        return None
+    result = await db.execute(
+        select(Comment.created_at, Comment.id)
+        .where(Comment.movie_id == MOVIE_ID)
+        .order_by(Comment.created_at.desc(), Comment.id.desc())
+        .offset(offset - 1)
+        .limit(1)
+    )
+    created_at, comment_id = result.one()
+    return encode_cursor(created_at, comment_id)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--comments", type=int, default=100_000)
+    parser.add_argument("--authors", type=int, default=1_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    async with engine.connect() as connection:
+        db = AsyncSession(bind=connection)
+        start = time.perf_counter()
+        await seed(db, args.comments, args.authors)
+        print(f"seeded {args.comments} comments in {time.perf_counter() - start:.1f}s\n")
+
+        depths = [
+            d for d in (0, 1_000, 10_000, 50_000, args.comments - args.limit)
+            if 0 <= d < args.comments
+        ]
+        cursors = {depth: await cursor_at(db, depth) for depth in depths}
+
+        async def keyset(depth: int):
+            await CommentService.list_by_movie(db, MOVIE_ID, args.limit, cursors[depth])
+
+        async def offset(depth: int):
+            await db.execute(
+                select(Comment)
+                .where(Comment.movie_id == MOVIE_ID)
+                .order_by(Comment.created_at.desc(), Comment.id.desc())
+                .offset(depth)
+                .limit(args.limit + 1)
+            )
+
+        results = {}
+        for depth in depths:
+            results[depth] = (
+                await timed(lambda: keyset(depth), args.repeat),
+                await timed(lambda: offset(depth), args.repeat),
+            )
+        await db.rollback()
+
+    print(f"{'depth':>8} {'keyset ms':>10} {'offset ms':>10}")
+    for depth in depths:
+        keyset_ms, offset_ms = results[depth]
+        print(f"{depth:>8} {keyset_ms:>10.2f} {offset_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+Keyset vs OFFSET pagination of the continue watching feed.
+
+Seeds a temporary copy of watch_history (same columns and indexes, so
+the migrations must be applied) with a million rows spread over a few
+users, then times fetching a page at increasing depths of one user's
+history: the keyset query used by the feed, the same query without the
+composite index, and a classic OFFSET query. The temporary table shadows
+the real one for the benchmark's connection only and disappears with it.
+
+Run from backend/ against a disposable database (settings are read from
+.env as usual):
+
+    python -m benchmarks.continue_watching --rows 1000000 --users 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import false, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import engine
+from app.history.service import WatchHistoryService
+from app.models.watch_history import WatchHistory
+from app.utils.cursor import encode_cursor
+
+# LIKE ... INCLUDING INDEXES renames copied indexes, find ours by its columns
+INDEX_COLUMNS = "(user_id, completed, watched_at DESC, id DESC)"
+
+
+async def timed(run, repeat: int) -> float:
+    """Median wall time of a coroutine factory, in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def seed(db: AsyncSession, rows: int, users: int) -> None:
+    await db.execute(text(
+        "CREATE TEMP TABLE watch_history "
+        "(LIKE public.watch_history INCLUDING DEFAULTS INCLUDING INDEXES)"
+    ))
+    # One row per (movie, user), a quarter of them completed, one per second
+    await db.execute(
+        text(
+            "INSERT INTO watch_history "
+            "(id, movie_id, user_id, watched_at, watch_duration, completed) "
+            "SELECT g, 'tt' || (g / :users), g % :users + 1, "
+            "now() - g * interval '1 second', 600, g % 4 = 0 "
+            "FROM generate_series(1, :rows) AS g"
+        ),
+        {"rows": rows, "users": users},
+    )
+    await db.execute(text("ANALYZE watch_history"))
+
+
+async def cursor_at(db: AsyncSession, user_id: int, offset: int) -> str | None:
+    """Cursor a client would hold after reading `offset` rows."""
+    if offset == 0:
+        return None
+    result = await db.execute(
+        select(WatchHistory.watched_at, WatchHistory.id)
+        .where(WatchHistory.user_id == user_id, WatchHistory.completed == false())
+        .order_by(WatchHistory.watched_at.desc(), WatchHistory.id.desc())
+        .offset(offset - 1)
+        .limit(1)
+    )
+    watched_at, row_id = result.one()
+    return encode_cursor(watched_at, row_id)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    user_id = 1
+
+    async with engine.connect() as connection:
+        db = AsyncSession(bind=connection)
+        start = time.perf_counter()
+        await seed(db, args.rows, args.users)
+        per_user = (await db.execute(text(
+            "SELECT count(*) FROM watch_history WHERE user_id = :user_id AND NOT completed"
+        ), {"user_id": user_id})).scalar_one()
+        print(f"seeded {args.rows} rows in {time.perf_counter() - start:.1f}s, "
+              f"{per_user} unfinished rows for user {user_id}\n")
+
+        depths = [
+            d for d in (0, 1_000, 10_000, 50_000, per_user - args.limit) if 0 <= d < per_user
+        ]
+
+        cursors = {depth: await cursor_at(db, user_id, depth) for depth in depths}
+
+        async def keyset(depth: int):
+            await WatchHistoryService.continue_watching(db, user_id, args.limit, cursors[depth])
+
+        async def offset(depth: int):
+            await db.execute(
+                select(WatchHistory)
+                .where(WatchHistory.user_id == user_id, WatchHistory.completed == false())
+                .order_by(WatchHistory.watched_at.desc(), WatchHistory.id.desc())
+                .offset(depth)
+                .limit(args.limit + 1)
+            )
+
+        results = {depth: {} for depth in depths}
+        for depth in depths:
+            results[depth]["keyset"] = await timed(lambda: keyset(depth), args.repeat)
+            results[depth]["offset"] = await timed(lambda: offset(depth), args.repeat)
+
+        index_name = (await db.execute(
+            text(
+                "SELECT indexname FROM pg_indexes "
+                "WHERE tablename = 'watch_history' AND schemaname LIKE 'pg_temp%' "
+                "AND indexdef LIKE '%' || :columns"
+            ),
+            {"columns": INDEX_COLUMNS},
+        )).scalar_one()
+        await db.execute(text(f'DROP INDEX pg_temp."{index_name}"'))
+        for depth in depths:
+            results[depth]["no index"] = await timed(lambda: keyset(depth), args.repeat)
+        await db.rollback()
+
+    print(f"{'depth':>8} {'keyset ms':>10} {'offset ms':>10} {'keyset, no index ms':>20}")
+    for depth in depths:
+        r = results[depth]
+        print(f"{depth:>8} {r['keyset']:>10.2f} {r['offset']:>10.2f} {r['no index']:>20.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,218 @@
+"""Download scheduler and piece picker driven by a seeded simulated swarm."""
+import random
+from dataclasses import dataclass, field
+
+import pytest
+
+from app.torrent.bitfield import Bitfield
+from app.torrent.scheduler import DownloadDemand, DownloadScheduler, PiecePicker
+
+MIB = 1024**2
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def bitfield_of(piece_count: int, pieces) -> Bitfield:
+    return Bitfield.from_flags([index in set(pieces) for index in range(piece_count)])
+
+
+@dataclass
+class SimulatedPeer:
+    """A local peer that owns some pieces and chokes us at random."""
+
+    peer_id: str
+    pieces: set[int]
+    choke_rate: float
+    choked: bool = True
+    inbox: list[int] = field(default_factory=list)
+
+
+class SimulatedSwarm:
+    """
+    Peers exchanging whole pieces with one picker, one tick at a time.
+
+    Every tick each peer may flip its choke state, and an unchoked peer
+    answers the oldest request it received. Everything random comes from
+    the seeded RNG, so a seed always replays the same swarm.
+    """
+
+    def __init__(self, seed: int, piece_count: int = 64, peer_count: int = 8):
+        self.rng = random.Random(seed)
+        self.piece_count = piece_count
+        self.peers = {}
+        for i in range(peer_count):
+            share = self.rng.uniform(0.2, 0.9)
+            pieces = {p for p in range(piece_count) if self.rng.random() < share}
+            self.peers[f"peer-{i}"] = SimulatedPeer(f"peer-{i}", pieces, self.rng.uniform(0, 0.3))
+        # Every piece exists somewhere, or the download could never finish
+        for index in range(piece_count):
+            if not any(index in peer.pieces for peer in self.peers.values()):
+                self.rng.choice(list(self.peers.values())).pieces.add(index)
+
+        self.picker = PiecePicker(Bitfield(piece_count), pipeline=4, rng=random.Random(seed))
+        for peer in self.peers.values():
+            self.picker.add_peer(peer.peer_id, bitfield_of(piece_count, peer.pieces))
+        self.received: list[tuple[str, int]] = []
+        self.cancels: list[tuple[str, int]] = []
+
+    def send_requests(self, peer: SimulatedPeer, pieces: list[int]) -> None:
+        for index in pieces:
+            assert not peer.choked, "requested a piece from a choked peer"
+            assert index in peer.pieces, "requested a piece the peer does not have"
+            peer.inbox.append(index)
+
+    def tick(self) -> None:
+        for peer in self.peers.values():
+            if self.rng.random() < peer.choke_rate:
+                peer.choked = not peer.choked
+                if peer.choked:
+                    # A choking peer drops every request it has not answered
+                    peer.inbox.clear()
+                    self.picker.on_choke(peer.peer_id)
+                else:
+                    self.send_requests(peer, self.picker.on_unchoke(peer.peer_id))
+            elif peer.choked and self.rng.random() < 0.5:
+                peer.choked = False
+                self.send_requests(peer, self.picker.on_unchoke(peer.peer_id))
+
+        for peer in self.peers.values():
+            if peer.choked or not peer.inbox:
+                continue
+            index = peer.inbox.pop(0)
+            self.received.append((peer.peer_id, index))
+            for holder in self.picker.on_piece(peer.peer_id, index):
+                self.peers[holder].inbox.remove(index)
+                self.cancels.append((holder, index))
+            self.send_requests(peer, self.picker.next_requests(peer.peer_id))
+
+        for peer in self.peers.values():
+            if not peer.choked:
+                self.send_requests(peer, self.picker.next_requests(peer.peer_id))
+
+
+@pytest.mark.parametrize("seed", [1, 7, 42])
+def test_simulated_swarm_completes_without_invalid_requests(seed):
+    swarm = SimulatedSwarm(seed)
+    for _ in range(2000):
+        if swarm.picker.is_complete:
+            break
+        swarm.tick()
+
+    assert swarm.picker.is_complete
+    assert swarm.picker.have.is_complete
+    # Endgame duplicates were cancelled before a second copy arrived
+    assert swarm.cancels
+    assert sorted(index for _, index in swarm.received) == list(range(swarm.piece_count))
+    assert not swarm.picker.requested
+
+
+def test_simulated_swarm_is_deterministic():
+    first, second = SimulatedSwarm(7), SimulatedSwarm(7)
+    for _ in range(50):
+        first.tick()
+        second.tick()
+    assert first.received == second.received
+    assert first.cancels == second.cancels
+
+
+def test_rarest_first_order_follows_availability():
+    piece_count = 5
+    picker = PiecePicker(Bitfield(piece_count), pipeline=piece_count, rng=random.Random(3))
+    holders = {0: 4, 1: 1, 2: 3, 3: 2, 4: 5}
+    for peer in range(5):
+        picker.add_peer(peer, bitfield_of(piece_count, [i for i, n in holders.items() if peer < n]))
+    picker.add_peer("seed", bitfield_of(piece_count, range(piece_count)))
+
+    assert picker.on_unchoke("seed") == [1, 3, 2, 0, 4]
+
+
+def test_choked_peer_gets_no_requests_and_releases_them():
+    picker = PiecePicker(Bitfield(4), pipeline=4, rng=random.Random(0))
+    picker.add_peer("a", bitfield_of(4, range(4)))
+    picker.add_peer("b", bitfield_of(4, range(4)))
+
+    # Peers start choked
+    assert picker.next_requests("a") == []
+    requested = picker.on_unchoke("a")
+    assert sorted(requested) == [0, 1, 2, 3]
+
+    assert sorted(picker.on_choke("a")) == [0, 1, 2, 3]
+    assert picker.next_requests("a") == []
+    assert not picker.requested
+    # Released pieces go to another peer, not as endgame duplicates
+    assert sorted(picker.on_unchoke("b")) == [0, 1, 2, 3]
+    assert picker.requested == {i: {"b"} for i in range(4)}
+
+
+def test_endgame_duplicates_requests_and_cancels_them():
+    picker = PiecePicker(bitfield_of(4, [0, 1]), pipeline=4, rng=random.Random(0))
+    picker.add_peer("a", bitfield_of(4, range(4)))
+    picker.add_peer("b", bitfield_of(4, range(4)))
+
+    assert sorted(picker.on_unchoke("a")) == [2, 3]
+    assert picker.endgame
+    # Every missing piece is in flight, the idle peer duplicates them
+    assert sorted(picker.on_unchoke("b")) == [2, 3]
+    assert picker.requested == {2: {"a", "b"}, 3: {"a", "b"}}
+
+    assert picker.on_piece("b", 2) == ["a"]
+    assert picker.peers["a"].requested == {3}
+    assert picker.on_piece("a", 3) == ["b"]
+    assert picker.is_complete
+    assert not picker.requested
+    assert not picker.peers["a"].requested and not picker.peers["b"].requested
+
+
+def test_disconnect_and_failed_hash_return_pieces_to_the_pool():
+    picker = PiecePicker(Bitfield(2), pipeline=2, rng=random.Random(0))
+    picker.add_peer("a", bitfield_of(2, [0, 1]))
+    picker.add_peer("b", bitfield_of(2, [0]))
+    picker.on_unchoke("a")
+
+    picker.on_failed("a", 0)
+    assert 0 not in picker.requested
+    assert sorted(picker.remove_peer("a")) == [1]
+    assert picker.availability == [1, 0]
+    assert picker.on_unchoke("b") == [0]
+
+
+def test_fair_share_follows_viewers_and_urgency():
+    clock = FakeClock()
+    scheduler = DownloadScheduler(max_rate=10 * MIB, max_peers=20, clock=clock)
+    scheduler.update(DownloadDemand("hot", viewers=9, buffer_seconds=0))
+    scheduler.update(DownloadDemand("calm", viewers=1, buffer_seconds=600))
+    scheduler.update(DownloadDemand("prefetch"))
+
+    rates = {key: allocation.rate for key, allocation in scheduler.allocations.items()}
+    assert rates["hot"] > rates["calm"] > 0
+    assert rates["calm"] >= rates["prefetch"] > 0
+    assert sum(rates.values()) == pytest.approx(10 * MIB)
+    assert sum(a.peer_slots for a in scheduler.allocations.values()) <= 20
+    assert all(a.peer_slots >= 1 for a in scheduler.allocations.values())
+
+
+def test_capacity_a_swarm_cannot_use_goes_to_the_others():
+    scheduler = DownloadScheduler(max_rate=10 * MIB, max_peers=10, clock=FakeClock())
+    scheduler.update(DownloadDemand("slow", viewers=50, max_rate=1 * MIB, swarm_peers=2))
+    scheduler.update(DownloadDemand("fast", viewers=0))
+
+    assert scheduler.allocations["slow"].rate == pytest.approx(1 * MIB)
+    assert scheduler.allocations["fast"].rate == pytest.approx(9 * MIB)
+    assert scheduler.allocations["slow"].peer_slots == 2
+    assert scheduler.allocations["fast"].peer_slots == 8
+
+
+def test_token_bucket_enforces_the_allocated_rate():
+    clock = FakeClock()
+    scheduler = DownloadScheduler(max_rate=1 * MIB, max_peers=4, clock=clock)
+    scheduler.update(DownloadDemand("only"))
+
+    assert scheduler.reserve("only", 2 * MIB) == pytest.approx(2.0)
+    clock.now += 2.0
+    assert scheduler.reserve("only", MIB // 2) == pytest.approx(0.5)
@@ -0,0 +1,220 @@
+"""Subtitle sources and fallback against a local stand-in of the OpenSubtitles API."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.core.config import settings
+from app.subtitles.exceptions import SubtitleSourceError
+from app.subtitles.service import SubtitleFetcher
+from app.subtitles.sources import OpenSubtitlesSource, SubtitleSource
+
+SRT = b"1\n00:00:01,000 --> 00:00:02,000\nHello\n"
+
+
+class StandInServer:
+    """
+    Answers requests from a table of (method, path) -> handler.
+
+    A handler gets the query and JSON body and returns (status, payload);
+    dicts are sent as JSON, bytes as is. Every request is logged.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _answer(self, method):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                server.requests.append((method, url.path, query, body, dict(self.headers)))
+
+                handler = server.routes.get((method, url.path))
+                status, payload = handler(query, body) if handler else (404, {})
+                if isinstance(payload, dict):
+                    payload = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._answer("GET")
+
+            def do_POST(self):
+                self._answer("POST")
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_subtitle(self, prefix: str, data: bytes = SRT, file_id: int = 42) -> None:
+        """Answer a search, a download and the file itself under a prefix."""
+        self.routes[("GET", f"{prefix}/subtitles")] = lambda query, body: (
+            200,
+            {"data": [{"attributes": {"files": [{"file_id": file_id}]}}]},
+        )
+        self.routes[("POST", f"{prefix}/download")] = lambda query, body: (
+            200,
+            {"link": f"{self.url}{prefix}/files/{body['file_id']}.srt"},
+        )
+        self.routes[("GET", f"{prefix}/files/{file_id}.srt")] = lambda query, body: (200, data)
+
+
+@pytest.fixture
+def stand_in():
+    server = StandInServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest_asyncio.fixture
+async def client():
+    async with httpx.AsyncClient() as client:
+        yield client
+
+
+def source_at(server: StandInServer, prefix: str, timeout: float = 2) -> OpenSubtitlesSource:
+    return OpenSubtitlesSource(api_url=server.url + prefix, api_key="key", timeout=timeout)
+
+
+def test_source_is_abstract():
+    with pytest.raises(TypeError):
+        SubtitleSource()
+
+
+@pytest.mark.asyncio
+async def test_fetch_searches_downloads_and_follows_the_link(stand_in, client):
+    stand_in.serve_subtitle("/api")
+
+    data = await source_at(stand_in, "/api").fetch(client, "tt0111161", "fr")
+
+    assert data == SRT
+    search, download, file = stand_in.requests
+    assert search[:2] == ("GET", "/api/subtitles")
+    assert search[2] == {"imdb_id": "111161", "languages": "fr", "order_by": "download_count"}
+    assert search[4]["Api-Key"] == "key"
+    assert download[:2] == ("POST", "/api/download")
+    assert download[3] == {"file_id": 42, "sub_format": "srt"}
+    assert file[:2] == ("GET", "/api/files/42.srt")
+
+
+@pytest.mark.asyncio
+async def test_fetch_returns_none_without_results(stand_in, client):
+    stand_in.routes[("GET", "/api/subtitles")] = lambda query, body: (200, {"data": []})
+
+    assert await source_at(stand_in, "/api").fetch(client, "tt0111161", "fr") is None
+    assert len(stand_in.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_skips_ids_that_are_not_imdb(stand_in, client):
+    assert await source_at(stand_in, "/api").fetch(client, "yts-1234", "fr") is None
+    assert stand_in.requests == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("failing", ["/api/subtitles", "/api/download", "/api/files/42.srt"])
+async def test_fetch_raises_on_error_status(stand_in, client, failing):
+    stand_in.serve_subtitle("/api")
+    method = "POST" if failing.endswith("download") else "GET"
+    stand_in.routes[(method, failing)] = lambda query, body: (500, {})
+
+    with pytest.raises(SubtitleSourceError):
+        await source_at(stand_in, "/api").fetch(client, "tt0111161", "fr")
+
+
+@pytest.mark.asyncio
+async def test_fetcher_falls_back_to_the_next_source_on_error(stand_in):
+    stand_in.routes[("GET", "/broken/subtitles")] = lambda query, body: (503, {})
+    stand_in.serve_subtitle("/backup")
+    broken, backup = source_at(stand_in, "/broken"), source_at(stand_in, "/backup")
+    broken.name = "broken"
+    fetcher = SubtitleFetcher(sources=[broken, backup])
+    try:
+        found = await fetcher._from_sources("tt0111161", "fr")
+    finally:
+        await fetcher.stop()
+
+    assert found == (backup, SRT)
+
+
+@pytest.mark.asyncio
+async def test_fetcher_prefers_the_first_source_that_answers(stand_in):
+    stand_in.serve_subtitle("/first", data=b"first")
+    stand_in.serve_subtitle("/second", data=b"second")
+    first, second = source_at(stand_in, "/first"), source_at(stand_in, "/second")
+    fetcher = SubtitleFetcher(sources=[first, second])
+    try:
+        found = await fetcher._from_sources("tt0111161", "fr")
+    finally:
+        await fetcher.stop()
+
+    assert found == (first, b"first")
+
+
+@pytest.mark.asyncio
+async def test_fetcher_gives_up_on_a_slow_source(stand_in):
+    def slow(query, body):
+        time.sleep(1)
+        return 200, {"data": []}
+
+    stand_in.routes[("GET", "/slow/subtitles")] = slow
+    stand_in.serve_subtitle("/fast")
+    slow_source, fast = source_at(stand_in, "/slow", timeout=0.2), source_at(stand_in, "/fast")
+    fetcher = SubtitleFetcher(sources=[slow_source, fast])
+    try:
+        started = time.monotonic()
+        found = await fetcher._from_sources("tt0111161", "fr")
+        elapsed = time.monotonic() - started
+    finally:
+        await fetcher.stop()
+
+    assert found == (fast, SRT)
+    assert elapsed < 1
+
+
+@pytest.mark.asyncio
+async def test_fetcher_rejects_oversized_files(stand_in, monkeypatch):
+    monkeypatch.setattr(settings, "SUBTITLE_MAX_BYTES", 8)
+    stand_in.serve_subtitle("/api")
+    fetcher = SubtitleFetcher(sources=[source_at(stand_in, "/api")])
+    try:
+        assert await fetcher._from_sources("tt0111161", "fr") is None
+    finally:
+        await fetcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_fetcher_survives_an_unreachable_source():
+    fetcher = SubtitleFetcher(
+        sources=[OpenSubtitlesSource(api_url="http://127.0.0.1:9", api_key="key", timeout=2)]
+    )
+    try:
+        assert await fetcher._from_sources("tt0111161", "fr") is None
+    finally:
+        await fetcher.stop()